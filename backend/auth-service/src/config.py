@@ -24,6 +24,11 @@ class Config:
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv("JWT_ACCESS_TOKEN_EXPIRES", 3600)))
     JWT_REFRESH_TOKEN_EXPIRES = timedelta(seconds=int(os.getenv("JWT_REFRESH_TOKEN_EXPIRES", 604800)))
     
+    # Logged-out access-token JTIs are written under this prefix in REDIS_URL, so services that
+    # verify tokens locally can reject them; revocation is skipped when REDIS_URL is unset
+    REDIS_URL = os.getenv("REDIS_URL")
+    REVOKED_TOKENS_KEY = os.getenv("REVOKED_TOKENS_KEY", "revoked:jti")
+    
     # Security configuration
     PASSWORD_SALT = os.getenv("PASSWORD_SALT", "dev_salt")
     CORS_ORIGINS = os.getenv("CORS_ORIGINS", "http://localhost:3000").split(",")
@@ -38,6 +38,8 @@ def authenticate(f):
         g.username = payload.get('username')
         g.roles = payload.get('roles', [])
         g.permissions = payload.get('permissions', [])
+        g.token_jti = payload.get('jti')
+        g.token_exp = payload.get('exp')
         
         return f(*args, **kwargs)
     
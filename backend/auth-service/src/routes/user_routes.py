@@ -1,5 +1,6 @@
 from datetime import datetime
 import jwt
+import redis
 from flask import Blueprint, request, jsonify, g, current_app
 
 from ..models import User
@@ -124,7 +125,15 @@ def change_password():
 @user_bp.route('/me/logout', methods=['POST'])
 @authenticate
 def logout():
-    """Logout current user by revoking the refresh token."""
+    """Logout current user by revoking the access token and the refresh token."""
+    # Services that verify access tokens locally only see a logout through the revocation list
+    if g.token_jti:
+        try:
+            AuthService.revoke_access_token(g.token_jti, g.token_exp)
+        except redis.RedisError as e:
+            current_app.logger.error("Error revoking access token: %s", e)
+            return jsonify({"error": "Could not revoke access token"}), 503
+    
     data = request.get_json()
     refresh_token = data.get('refresh_token')
     
@@ -1,8 +1,10 @@
 import datetime
+import time
 import uuid
 from typing import Dict, Tuple, Optional, List
 
 import jwt
+import redis
 from jwt.exceptions import InvalidTokenError
 from sqlalchemy.orm import Session
 from passlib.hash import pbkdf2_sha256
@@ -10,6 +12,9 @@ from passlib.hash import pbkdf2_sha256
 from ..models import User, RefreshToken, Role
 from ..config import app_config
 
+# Client for the revocation list shared with the other services, created on first use
+_revocation_client = None
+
 class AuthService:
     """Service for handling authentication logic."""
     
@@ -34,7 +39,9 @@ class AuthService:
             'permissions': [perm for role in user.roles for perm in role.get_permissions()],
             'exp': datetime.datetime.utcnow() + app_config.JWT_ACCESS_TOKEN_EXPIRES,
             'iat': datetime.datetime.utcnow(),
-            'jti': str(uuid.uuid4())
+            'jti': str(uuid.uuid4()),
+            # Refresh tokens share the signing key; services accepting access tokens check this
+            'type': 'access'
         }
         
         access_token = jwt.encode(
@@ -49,7 +56,8 @@ class AuthService:
             'sub': str(user.id),
             'exp': datetime.datetime.utcnow() + app_config.JWT_REFRESH_TOKEN_EXPIRES,
             'iat': datetime.datetime.utcnow(),
-            'jti': refresh_token_jti
+            'jti': refresh_token_jti,
+            'type': 'refresh'
         }
         
         refresh_token = jwt.encode(
@@ -91,6 +99,23 @@ class AuthService:
         
         return False
     
+    @staticmethod
+    def revoke_access_token(token_jti: str, expires_at: int) -> bool:
+        """
+        Add an access token to the revocation list in Redis until it expires.
+        Returns False when no REDIS_URL is configured.
+        """
+        global _revocation_client
+        if not app_config.REDIS_URL:
+            return False
+        if _revocation_client is None:
+            _revocation_client = redis.Redis.from_url(app_config.REDIS_URL)
+        
+        ttl = int(expires_at - time.time())
+        if ttl > 0:
+            _revocation_client.setex(f"{app_config.REVOKED_TOKENS_KEY}:{token_jti}", ttl, 1)
+        return True
+    
     @staticmethod
     def validate_access_token(token: str) -> Tuple[bool, Dict]:
         """Validate an access token."""
@@ -100,6 +125,8 @@ class AuthService:
                 app_config.JWT_SECRET_KEY,
                 algorithms=['HS256']
             )
+            if payload.get('type') != 'access':
+                return False, {}
             return True, payload
         except InvalidTokenError:
             return False, {}
@@ -436,5 +436,23 @@ class TestAuthService(unittest.TestCase):
         
         self.assertEqual(refresh_response.status_code, 401)
 
+class TestTokenTypes(unittest.TestCase):
+    """Access and refresh tokens share a signing key, so they are told apart by their type claim."""
+    def setUp(self):
+        role = MagicMock()
+        role.name = "user"
+        role.get_permissions.return_value = ["read_self"]
+        user = MagicMock(id=42, username="regularuser", roles=[role])
+        self.access_token, self.refresh_token, _ = AuthService.generate_tokens(user)
+
+    def test_tokens_carry_their_type(self):
+        options = {"verify_signature": False}
+        self.assertEqual(jwt.decode(self.access_token, options=options)["type"], "access")
+        self.assertEqual(jwt.decode(self.refresh_token, options=options)["type"], "refresh")
+
+    def test_refresh_token_is_not_a_valid_access_token(self):
+        self.assertTrue(AuthService.validate_access_token(self.access_token)[0])
+        self.assertEqual(AuthService.validate_access_token(self.refresh_token), (False, {}))
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
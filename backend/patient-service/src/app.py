@@ -5,19 +5,24 @@ from werkzeug.exceptions import HTTPException
 import time
 import uuid
 from flask_caching import Cache
+from flask_compress import Compress
 from flask_cors import CORS
 
 from .config import app_config
-from .utils.db import init_db, close_db_session, ensure_indexes
+from .utils.db import init_db, close_db_session, ensure_indexes, schema_lock
+from .utils.serialization import ORJSONProvider
 from .routes.patient_routes import patient_bp
 from .middleware.security_middleware import setup_security_headers
-from .middleware.auth_middleware import require_auth
+from .middleware.auth_middleware import setup_auth
 
 # Create Flask application
 def create_app(config_object=app_config):
     """Create and configure the Flask application."""
     app = Flask(__name__)
     app.config.from_object(config_object)
+    
+    # Use orjson for all jsonify() responses and request parsing
+    app.json = ORJSONProvider(app)
 
     # Set up logging
     logging.basicConfig(
@@ -31,11 +36,22 @@ def create_app(config_object=app_config):
     # Set up caching
     cache = Cache(app)
 
+    # Gzip JSON responses for clients that accept it
+    Compress(app)
+
+    # Flag lazy relationship loads (N+1 queries) in development
+    if app.config.get('NPLUSONE_ENABLED'):
+        from nplusone.ext.flask_sqlalchemy import NPlusOne
+        NPlusOne(app)
+
     # Set up security headers
     setup_security_headers(app)
 
+    # Set up authentication for views marked with require_auth/require_permissions/require_roles
+    setup_auth(app)
+
     # Initialize database
-    with app.app_context():
+    with app.app_context(), schema_lock():
         init_db()
         ensure_indexes()
         app.logger.info("Database initialized and indexes ensured")
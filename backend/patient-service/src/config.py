@@ -21,12 +21,18 @@ class Config:
     SQLALCHEMY_DATABASE_URI = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SQLALCHEMY_ECHO = False  # Log SQL queries to console (for development)
+    NPLUSONE_ENABLED = False  # Log lazy loads that cause N+1 queries (for development)
     
     # Database connection pool settings
     DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))  # Default number of connections
     DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))  # Max extra connections when pool is full
     DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a connection
     DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Recycle connections after N seconds
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"  # Test pooled connections before use
+    DB_QUERY_CACHE_SIZE = int(os.getenv("DB_QUERY_CACHE_SIZE", "1200"))  # Compiled SQL statements kept per engine
+    DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # Server-side limit per statement
+    DB_WORK_MEM = os.getenv("DB_WORK_MEM", "64MB")  # Per sort/hash node, so scale with pool size in mind
+    DB_JIT = os.getenv("DB_JIT", "False").lower() == "true"  # JIT compilation costs more than these short queries save
     
     # Query performance settings
     SLOW_QUERY_THRESHOLD = float(os.getenv("SLOW_QUERY_THRESHOLD", "0.5"))  # Log queries slower than N seconds
@@ -37,16 +43,39 @@ class Config:
     
     # Authentication configuration
     AUTH_SERVICE_URL = os.getenv("AUTH_SERVICE_URL", "http://localhost:5001")
+    AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", "30"))  # Seconds a validated token is trusted locally
+    AUTH_CACHE_MAXSIZE = int(os.getenv("AUTH_CACHE_MAXSIZE", "10000"))
+    
+    # When the auth service's signing key is shared, tokens are verified locally
+    # instead of calling the auth service on every request
+    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+    JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+    # Prefix of the Redis keys (<prefix>:<jti>) the auth service sets on logout, until the token
+    # expires; checked after local verification
+    REVOKED_TOKENS_KEY = os.getenv("REVOKED_TOKENS_KEY", "revoked:jti")
     
     # Pagination defaults
     DEFAULT_PAGE_SIZE = int(os.getenv("DEFAULT_PAGE_SIZE", "20"))
     MAX_PAGE_SIZE = int(os.getenv("MAX_PAGE_SIZE", "100"))
+    COUNT_CACHE_TTL = int(os.getenv("COUNT_CACHE_TTL", "60"))  # Seconds a with_total count is reused
+    STREAM_RESPONSE_MIN_ROWS = int(os.getenv("STREAM_RESPONSE_MIN_ROWS", "50"))  # Stream list responses this large
+    BULK_IMPORT_BATCH_SIZE = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "500"))  # Records inserted and committed together
+    LIST_CACHE_MAX_AGE = int(os.getenv("LIST_CACHE_MAX_AGE", "30"))  # Seconds browsers may reuse a list page
+    
+    # Redis connection shared by token revocation checks and response caching
+    REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+    REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", "32"))
+    REDIS_POOL_TIMEOUT = int(os.getenv("REDIS_POOL_TIMEOUT", "2"))  # Seconds to wait for a free connection
+    PATIENT_CACHE_TTL = int(os.getenv("PATIENT_CACHE_TTL", "300"))  # Seconds a GET /patients/<id> response is cached
     
     # Caching configuration
     CACHE_TYPE = os.getenv("CACHE_TYPE", "simple")  # Options: simple, redis, memcached
     CACHE_REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
     CACHE_DEFAULT_TIMEOUT = int(os.getenv("CACHE_DEFAULT_TIMEOUT", "300"))  # 5 minutes default
     
+    # Response compression (Flask-Compress)
+    COMPRESS_MIN_SIZE = int(os.getenv("COMPRESS_MIN_SIZE", "500"))  # Bytes; smaller responses are sent as-is
+    
     # Logging configuration
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
     LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
@@ -63,6 +92,7 @@ class DevelopmentConfig(Config):
     """Development configuration."""
     DEBUG = True
     SQLALCHEMY_ECHO = True
+    NPLUSONE_ENABLED = True
     LOG_LEVEL = "DEBUG"
 
 class TestingConfig(Config):
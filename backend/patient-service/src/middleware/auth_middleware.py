@@ -1,93 +1,227 @@
 import functools
+import hashlib
+import threading
+import jwt
+import redis
 import requests
 import json
-from flask import request, g, jsonify, current_app
-from functools import wraps
+from cachetools import TTLCache
+from flask import request, g, jsonify, current_app, Response
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-def require_auth(f):
-    """Middleware to authenticate requests using JWT via auth service."""
-    @functools.wraps(f)
-    def decorated_function(*args, **kwargs):
-        auth_header = request.headers.get('Authorization')
+from ..config import app_config
+from ..utils.redis_client import get_redis_client
+
+# Shared session so token validation reuses keep-alive connections to the auth service
+# instead of paying a TCP/TLS handshake on every request
+_AUTH_SESSION = requests.Session()
+_auth_adapter = HTTPAdapter(
+    pool_connections=10,
+    pool_maxsize=50,
+    max_retries=Retry(total=2, backoff_factor=0.1)
+)
+_AUTH_SESSION.mount('http://', _auth_adapter)
+_AUTH_SESSION.mount('https://', _auth_adapter)
+
+# (connect, read) timeouts in seconds for auth service calls
+AUTH_SERVICE_TIMEOUT = (1.0, 2.0)
+
+# Validated user data keyed by a SHA-256 digest of the token, so repeated requests with
+# the same token skip the auth service round-trip and raw tokens are never stored
+_TOKEN_CACHE = TTLCache(maxsize=app_config.AUTH_CACHE_MAXSIZE, ttl=app_config.AUTH_CACHE_TTL)
+_TOKEN_CACHE_LOCK = threading.RLock()
+
+# Pre-serialized bodies for rejected headers; a fresh Response is still built per request
+# because after_request hooks add headers to it
+_MISSING_HEADER_BODY = b'{"error":"Missing authorization header"}'
+_INVALID_HEADER_BODY = b'{"error":"Invalid authorization header format"}'
+
+# Token validation endpoint of the auth service, used when no signing key is configured
+VALIDATE_TOKEN_URL = f"{app_config.AUTH_SERVICE_URL}/validate-token"
+
+# The decorators below store a view's auth requirements in this attribute, which functools.wraps
+# copies onto outer wrappers; a single before_request hook checks them once per request
+_REQUIREMENTS_ATTR = '_auth_requirements'
+
+def _unauthorized(body):
+    return Response(body, status=401, mimetype='application/json')
+
+def _set_user_context(user_data):
+    """Store user information in Flask's g object."""
+    g.user_id = user_data.get('id')
+    g.username = user_data.get('username')
+    g.roles = frozenset(user_data.get('roles', ()))
+    g.permissions = frozenset(user_data.get('permissions', ()))
+
+def _decode_token_locally(token):
+    """
+    Verify the token signature and expiry with the shared signing key, and that it is an access token.
+    Returns the user data, or None if the token is invalid.
+    """
+    try:
+        payload = jwt.decode(
+            token,
+            app_config.JWT_SECRET_KEY,
+            algorithms=[app_config.JWT_ALGORITHM],
+            options={"require": ["exp", "iat", "sub", "username", "type"]}
+        )
+    except jwt.InvalidTokenError:
+        return None
+    
+    # Refresh tokens are signed with the same key but must not authenticate requests
+    if payload['type'] != 'access':
+        return None
+    
+    return {
+        'jti': payload.get('jti'),
+        'id': payload.get('sub'),
+        'username': payload.get('username'),
+        'roles': payload.get('roles', []),
+        'permissions': payload.get('permissions', [])
+    }
+
+def _authenticate():
+    """
+    Parse the Authorization header and verify the token.
+    Returns an error response, or None once the user context has been set.
+    """
+    auth_header = request.headers.get('Authorization', '')
+    
+    if not auth_header:
+        return _unauthorized(_MISSING_HEADER_BODY)
+    
+    # Expect exactly "Bearer <token>" (scheme is case-insensitive)
+    token = auth_header[7:]
+    if len(auth_header) < 8 or auth_header[6] != ' ' or auth_header[:6].lower() != 'bearer' or ' ' in token:
+        return _unauthorized(_INVALID_HEADER_BODY)
+    
+    # Verify locally when the signing key is available, skipping the network hop entirely
+    if app_config.JWT_SECRET_KEY:
+        user_data = _decode_token_locally(token)
+        if user_data is None:
+            return jsonify({"error": "Invalid or expired token"}), 401
         
-        if not auth_header:
-            return jsonify({"error": "Missing authorization header"}), 401
+        # Signature checks cannot see logouts; consult the revocation list the auth service writes
+        if user_data['jti']:
+            try:
+                if get_redis_client().exists(f"{app_config.REVOKED_TOKENS_KEY}:{user_data['jti']}"):
+                    return jsonify({"error": "Token has been revoked"}), 401
+            except redis.RedisError as e:
+                current_app.logger.error("Error checking token revocation: %s", e)
+                return jsonify({"error": "Authentication service unavailable"}), 503
+        _set_user_context(user_data)
+        return None
+    
+    token_hash = hashlib.sha256(token.encode()).hexdigest()[:32]
+    
+    with _TOKEN_CACHE_LOCK:
+        cached_user = _TOKEN_CACHE.get(token_hash)
+    if cached_user is not None:
+        _set_user_context(cached_user)
+        return None
+    
+    # Validate token with auth service
+    try:
+        response = _AUTH_SESSION.get(
+            VALIDATE_TOKEN_URL,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=AUTH_SERVICE_TIMEOUT
+        )
         
-        parts = auth_header.split()
+        if response.status_code != 200:
+            return jsonify({"error": "Invalid or expired token"}), 401
         
-        if parts[0].lower() != 'bearer' or len(parts) != 2:
-            return jsonify({"error": "Invalid authorization header format"}), 401
+        # Store user information in Flask's g object
+        user_data = response.json().get('user', {})
+        with _TOKEN_CACHE_LOCK:
+            _TOKEN_CACHE[token_hash] = user_data
+        _set_user_context(user_data)
         
-        token = parts[1]
+        return None
+    except requests.RequestException as e:
+        current_app.logger.error("Error validating token with auth service: %s", e)
+        return jsonify({"error": "Authentication service unavailable"}), 503
+
+def _authorize(requirements):
+    """
+    Verify the token and check a view's requirements.
+    Returns an error response, or None once the request is authorized.
+    """
+    error = _authenticate()
+    if error is not None:
+        return error
+    
+    for kind, required, require_all in requirements:
+        # g.permissions / g.roles were set by _authenticate
+        granted = g.permissions if kind == 'permissions' else g.roles
+        if require_all:
+            # Check if user has all required entries
+            allowed = required <= granted
+        else:
+            # Check if user has any of the required entries
+            allowed = not required.isdisjoint(granted)
+        if not allowed:
+            return jsonify({"error": f"Insufficient {kind}"}), 403
+    
+    g.auth_checked = True
+    return None
+
+def _register(f, requirement=None):
+    """Record that a view needs authentication, plus an optional permission/role check."""
+    requirements = getattr(f, _REQUIREMENTS_ATTR, None)
+    if requirements is None:
+        requirements = []
         
-        # Validate token with auth service
-        try:
-            response = requests.get(
-                f"{current_app.config.get('AUTH_SERVICE_URL')}/validate-token",
-                headers={"Authorization": f"Bearer {token}"}
-            )
-            
-            if response.status_code != 200:
-                return jsonify({"error": "Invalid or expired token"}), 401
-            
-            # Store user information in Flask's g object
-            user_data = response.json().get('user', {})
-            g.user_id = user_data.get('id')
-            g.username = user_data.get('username')
-            g.roles = user_data.get('roles', [])
-            g.permissions = user_data.get('permissions', [])
-            
+        @functools.wraps(f)
+        def guarded_view(*args, **kwargs):
+            # The hook could not see the requirements if an outer wrapper dropped the attribute;
+            # check them here rather than run the view unauthenticated
+            if not g.get('auth_checked'):
+                error = _authorize(requirements)
+                if error is not None:
+                    return error
             return f(*args, **kwargs)
-        except requests.RequestException as e:
-            current_app.logger.error(f"Error validating token with auth service: {str(e)}")
-            return jsonify({"error": "Authentication service unavailable"}), 503
+        
+        setattr(guarded_view, _REQUIREMENTS_ATTR, requirements)
+    else:
+        guarded_view = f
     
-    return decorated_function
+    if requirement is not None:
+        requirements.append(requirement)
+    return guarded_view
+
+def require_auth(f):
+    """Mark a view as requiring a valid JWT; enforced by the hook from setup_auth()."""
+    return _register(f)
 
 def require_permissions(permissions, require_all=False):
-    """Middleware to check if the user has required permissions."""
+    """Mark a view as requiring permissions; enforced by the hook from setup_auth()."""
+    requirement = ('permissions', frozenset(permissions), require_all)
+    
     def decorator(f):
-        @wraps(f)
-        @require_auth
-        def decorated_function(*args, **kwargs):
-            # Get user permissions from g object set by require_auth
-            user_permissions = g.permissions
-            
-            if require_all:
-                # Check if user has all required permissions
-                if not all(perm in user_permissions for perm in permissions):
-                    return jsonify({"error": "Insufficient permissions"}), 403
-            else:
-                # Check if user has any of the required permissions
-                if not any(perm in user_permissions for perm in permissions):
-                    return jsonify({"error": "Insufficient permissions"}), 403
-            
-            return f(*args, **kwargs)
-        
-        return decorated_function
+        return _register(f, requirement)
     
     return decorator
 
 def require_roles(roles, require_all=False):
-    """Middleware to check if the user has required roles."""
+    """Mark a view as requiring roles; enforced by the hook from setup_auth()."""
+    requirement = ('roles', frozenset(roles), require_all)
+    
     def decorator(f):
-        @wraps(f)
-        @require_auth
-        def decorated_function(*args, **kwargs):
-            # Get user roles from g object set by require_auth
-            user_roles = g.roles
-            
-            if require_all:
-                # Check if user has all required roles
-                if not all(role in user_roles for role in roles):
-                    return jsonify({"error": "Insufficient roles"}), 403
-            else:
-                # Check if user has any of the required roles
-                if not any(role in user_roles for role in roles):
-                    return jsonify({"error": "Insufficient roles"}), 403
-            
-            return f(*args, **kwargs)
-        
-        return decorated_function
+        return _register(f, requirement)
     
-    return decorator
\ No newline at end of file
+    return decorator
+
+def setup_auth(app):
+    """Authenticate and authorize requests to marked views in a single before_request hook."""
+    @app.before_request
+    def authorize_request():
+        """Verify the token once and check the view's requirements."""
+        # CORS preflights carry no credentials; Flask answers them without calling the view
+        if request.method == 'OPTIONS':
+            return None
+        requirements = getattr(app.view_functions.get(request.endpoint), _REQUIREMENTS_ATTR, None)
+        if requirements is None:
+            return None
+        return _authorize(requirements)
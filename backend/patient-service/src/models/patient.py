@@ -1,12 +1,16 @@
-from datetime import datetime
+from datetime import datetime, date
+from typing import List, Optional
+import uuid
 from uuid import uuid4
-from sqlalchemy import Column, String, DateTime, Date, Boolean, Integer, Float, ForeignKey, Text, Enum, Table
-from sqlalchemy.dialects.postgresql import UUID, JSONB
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship
+from sqlalchemy import func, Column, Computed, String, DateTime, Date, Boolean, Integer, SmallInteger, Float, ForeignKey, Text, Table, Index
+from sqlalchemy.types import TypeDecorator
+from sqlalchemy.dialects.postgresql import UUID, JSONB, TSVECTOR
+from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 import enum
 
-Base = declarative_base()
+class Base(DeclarativeBase):
+    """Declarative base for all patient service models."""
+    pass
 
 class Gender(enum.Enum):
     MALE = "MALE"
@@ -25,145 +29,264 @@ class BloodType(enum.Enum):
     O_NEGATIVE = "O-"
     UNKNOWN = "Unknown"
 
-# Association tables for many-to-many relationships
+# Timestamps are generated by PostgreSQL as naive UTC, matching the previous datetime.utcnow values
+UTC_NOW = func.timezone('utc', func.now())
+
+FULL_NAME_EXPRESSION = "lower(first_name || ' ' || last_name)"
+
+# Document searched by advanced_search's search_text, stored as a generated tsvector column
+SEARCH_VECTOR_EXPRESSION = (
+    "to_tsvector('english', coalesce(first_name, '') || ' ' || coalesce(last_name, '') || ' ' || "
+    "coalesce(mrn, '') || ' ' || coalesce(address_line1, '') || ' ' || coalesce(city, '') || ' ' || "
+    "coalesce(state, ''))"
+)
+
+class IntCodedEnum(TypeDecorator):
+    """
+    Stores a Python enum as a SMALLINT code instead of a PostgreSQL ENUM.
+    Codes follow the enum's definition order, so new members must only be appended.
+    Binds accept an enum member, its value ("A+") or its name ("A_POSITIVE").
+    """
+    impl = SmallInteger
+    cache_ok = True
+    
+    def __init__(self, enum_class):
+        super().__init__()
+        self.enum_class = enum_class
+        members = list(enum_class)
+        self._code_by_key = {}
+        for code, member in enumerate(members):
+            self._code_by_key[member] = code
+            self._code_by_key[member.value] = code
+            self._code_by_key[member.name] = code
+        self._member_by_code = dict(enumerate(members))
+    
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        try:
+            return self._code_by_key[value]
+        except KeyError:
+            raise ValueError(f"{value!r} is not a valid {self.enum_class.__name__}")
+    
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        return self._member_by_code[value]
+
+# Association tables for many-to-many relationships.
+# The composite primary key makes per-patient lookups an index-only scan; the reverse
+# index serves lookups from the child side (e.g. advanced_search by allergy name).
 patient_allergies = Table(
     'patient_allergies',
     Base.metadata,
-    Column('patient_id', UUID(as_uuid=True), ForeignKey('patients.id')),
-    Column('allergy_id', UUID(as_uuid=True), ForeignKey('allergies.id'))
+    Column('patient_id', UUID(as_uuid=True), ForeignKey('patients.id', ondelete='CASCADE'), primary_key=True),
+    Column('allergy_id', UUID(as_uuid=True), ForeignKey('allergies.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_patient_allergies_allergy_patient', 'allergy_id', 'patient_id')
 )
 
 patient_conditions = Table(
     'patient_conditions',
     Base.metadata,
-    Column('patient_id', UUID(as_uuid=True), ForeignKey('patients.id')),
-    Column('condition_id', UUID(as_uuid=True), ForeignKey('conditions.id'))
+    Column('patient_id', UUID(as_uuid=True), ForeignKey('patients.id', ondelete='CASCADE'), primary_key=True),
+    Column('condition_id', UUID(as_uuid=True), ForeignKey('conditions.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_patient_conditions_condition_patient', 'condition_id', 'patient_id')
 )
 
 patient_medications = Table(
     'patient_medications',
     Base.metadata,
-    Column('patient_id', UUID(as_uuid=True), ForeignKey('patients.id')),
-    Column('medication_id', UUID(as_uuid=True), ForeignKey('medications.id'))
+    Column('patient_id', UUID(as_uuid=True), ForeignKey('patients.id', ondelete='CASCADE'), primary_key=True),
+    Column('medication_id', UUID(as_uuid=True), ForeignKey('medications.id', ondelete='CASCADE'), primary_key=True),
+    Index('ix_patient_medications_medication_patient', 'medication_id', 'patient_id')
 )
 
 class Patient(Base):
     """Patient model for storing basic patient information."""
     __tablename__ = 'patients'
-    
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    mrn = Column(String(20), unique=True, nullable=False, index=True, comment="Medical Record Number")
-    first_name = Column(String(100), nullable=False)
-    middle_name = Column(String(100))
-    last_name = Column(String(100), nullable=False)
-    date_of_birth = Column(Date, nullable=False, index=True)
-    gender = Column(Enum(Gender), nullable=False)
-    blood_type = Column(Enum(BloodType), default=BloodType.UNKNOWN)
+    __table_args__ = (
+        # Name lookups and the default sort order
+        Index('ix_patients_last_first', 'last_name', 'first_name'),
+        # Keyset pages in the default order resume with an index seek on (last_name, id)
+        Index('ix_patients_last_name_id', 'last_name', 'id'),
+        # Substring name search (requires the pg_trgm extension, created in init_db)
+        Index('ix_patients_full_name_trgm', 'full_name',
+              postgresql_using='gin', postgresql_ops={'full_name': 'gin_trgm_ops'}),
+        # Substring ILIKE search on the identifiers clinicians look patients up by
+        Index('ix_patients_mrn_trgm', 'mrn',
+              postgresql_using='gin', postgresql_ops={'mrn': 'gin_trgm_ops'}),
+        Index('ix_patients_email_trgm', 'email',
+              postgresql_using='gin', postgresql_ops={'email': 'gin_trgm_ops'}),
+        Index('ix_patients_phone_trgm', 'phone_number',
+              postgresql_using='gin', postgresql_ops={'phone_number': 'gin_trgm_ops'}),
+        # Containment (@>) filters on the free-form metadata document
+        Index('ix_patients_metadata_path_ops', 'patient_metadata',
+              postgresql_using='gin', postgresql_ops={'patient_metadata': 'jsonb_path_ops'}),
+        # Full-text search_text queries
+        Index('ix_patients_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+    # Fetch server-generated values in the INSERT/UPDATE itself instead of on next access
+    __mapper_args__ = {"eager_defaults": True}
+    
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    mrn: Mapped[str] = mapped_column(String(20), unique=True, nullable=False, index=True, comment="Medical Record Number")
+    first_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    middle_name: Mapped[Optional[str]] = mapped_column(String(100))
+    last_name: Mapped[str] = mapped_column(String(100), nullable=False)
+    # Lower-cased "first last", maintained by PostgreSQL for indexed name search
+    full_name: Mapped[Optional[str]] = mapped_column(
+        String(201), Computed(FULL_NAME_EXPRESSION, persisted=True)
+    )
+    # Maintained by PostgreSQL for indexed full-text search; deferred so listings never fetch it
+    search_vector: Mapped[Optional[str]] = mapped_column(
+        TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True), deferred=True
+    )
+    date_of_birth: Mapped[date] = mapped_column(Date, nullable=False, index=True)
+    gender: Mapped[Gender] = mapped_column(IntCodedEnum(Gender), nullable=False)
+    blood_type: Mapped[Optional[BloodType]] = mapped_column(IntCodedEnum(BloodType), default=BloodType.UNKNOWN)
     
     # Contact information
-    email = Column(String(255))
-    phone_number = Column(String(20))
-    address_line1 = Column(String(255))
-    address_line2 = Column(String(255))
-    city = Column(String(100))
-    state = Column(String(100))
-    postal_code = Column(String(20))
-    country = Column(String(100))
+    email: Mapped[Optional[str]] = mapped_column(String(255))
+    phone_number: Mapped[Optional[str]] = mapped_column(String(20))
+    address_line1: Mapped[Optional[str]] = mapped_column(String(255))
+    address_line2: Mapped[Optional[str]] = mapped_column(String(255))
+    city: Mapped[Optional[str]] = mapped_column(String(100))
+    state: Mapped[Optional[str]] = mapped_column(String(100))
+    postal_code: Mapped[Optional[str]] = mapped_column(String(20))
+    country: Mapped[Optional[str]] = mapped_column(String(100))
     
     # Emergency contact
-    emergency_contact_name = Column(String(200))
-    emergency_contact_relationship = Column(String(100))
-    emergency_contact_phone = Column(String(20))
+    emergency_contact_name: Mapped[Optional[str]] = mapped_column(String(200))
+    emergency_contact_relationship: Mapped[Optional[str]] = mapped_column(String(100))
+    emergency_contact_phone: Mapped[Optional[str]] = mapped_column(String(20))
     
     # Insurance information
-    insurance_provider = Column(String(200))
-    insurance_policy_number = Column(String(100))
-    insurance_group_number = Column(String(100))
+    insurance_provider: Mapped[Optional[str]] = mapped_column(String(200))
+    insurance_policy_number: Mapped[Optional[str]] = mapped_column(String(100))
+    insurance_group_number: Mapped[Optional[str]] = mapped_column(String(100))
     
     # Additional fields
-    height_cm = Column(Float)
-    weight_kg = Column(Float)
-    primary_care_physician = Column(String(200))
-    notes = Column(Text)
-    is_active = Column(Boolean, default=True)
+    height_cm: Mapped[Optional[float]] = mapped_column(Float)
+    weight_kg: Mapped[Optional[float]] = mapped_column(Float)
+    primary_care_physician: Mapped[Optional[str]] = mapped_column(String(200))
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    is_active: Mapped[Optional[bool]] = mapped_column(Boolean, default=True)
     
     # Additional structured data can be stored here
-    patient_metadata = Column(JSONB, default={})
+    patient_metadata: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
     
     # Timestamps
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
-    last_visit_date = Column(DateTime)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=UTC_NOW)
+    last_visit_date: Mapped[Optional[datetime]] = mapped_column(DateTime)
     
     # Relationships
-    allergies = relationship("Allergy", secondary=patient_allergies, back_populates="patients")
-    conditions = relationship("Condition", secondary=patient_conditions, back_populates="patients")
-    medications = relationship("Medication", secondary=patient_medications, back_populates="patients")
-    lab_results = relationship("LabResult", back_populates="patient", cascade="all, delete-orphan")
-    visits = relationship("Visit", back_populates="patient", cascade="all, delete-orphan")
+    allergies: Mapped[List["Allergy"]] = relationship("Allergy", secondary=patient_allergies, back_populates="patients")
+    conditions: Mapped[List["Condition"]] = relationship("Condition", secondary=patient_conditions, back_populates="patients")
+    medications: Mapped[List["Medication"]] = relationship("Medication", secondary=patient_medications, back_populates="patients")
+    lab_results: Mapped[List["LabResult"]] = relationship("LabResult", back_populates="patient", cascade="all, delete-orphan")
+    visits: Mapped[List["Visit"]] = relationship("Visit", back_populates="patient", cascade="all, delete-orphan")
     
     def __repr__(self):
         return f"<Patient {self.first_name} {self.last_name}, MRN: {self.mrn}>"
     
     def to_dict(self):
-        """Convert patient object to dictionary."""
+        """
+        Convert patient object to dictionary.
+        Dates are left as date/datetime objects and serialized to ISO 8601 by the app's orjson provider.
+        """
+        return Patient.to_dicts((self,))[0]
+    
+    @staticmethod
+    def summary_row_to_dict(row):
+        """
+        Convert a patient summary row (see PATIENT_SUMMARY_COLUMNS) to a dictionary.
+        Accepts any mapping keyed by attribute name, e.g. a RowMapping from a column query.
+        """
         return {
-            "id": str(self.id),
-            "mrn": self.mrn,
-            "first_name": self.first_name,
-            "middle_name": self.middle_name,
-            "last_name": self.last_name,
-            "date_of_birth": self.date_of_birth.isoformat() if self.date_of_birth else None,
-            "gender": self.gender.value if self.gender else None,
-            "blood_type": self.blood_type.value if self.blood_type else None,
-            "email": self.email,
-            "phone_number": self.phone_number,
-            "address": {
-                "line1": self.address_line1,
-                "line2": self.address_line2,
-                "city": self.city,
-                "state": self.state,
-                "postal_code": self.postal_code,
-                "country": self.country
-            },
-            "emergency_contact": {
-                "name": self.emergency_contact_name,
-                "relationship": self.emergency_contact_relationship,
-                "phone": self.emergency_contact_phone
-            },
-            "insurance": {
-                "provider": self.insurance_provider,
-                "policy_number": self.insurance_policy_number,
-                "group_number": self.insurance_group_number
-            },
-            "height_cm": self.height_cm,
-            "weight_kg": self.weight_kg,
-            "primary_care_physician": self.primary_care_physician,
-            "notes": self.notes,
-            "is_active": self.is_active,
-            "metadata": self.patient_metadata,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None,
-            "last_visit_date": self.last_visit_date.isoformat() if self.last_visit_date else None,
-            "allergies": [a.to_dict() for a in self.allergies] if self.allergies else [],
-            "conditions": [c.to_dict() for c in self.conditions] if self.conditions else [],
-            "medications": [m.to_dict() for m in self.medications] if self.medications else []
+            "id": str(row["id"]),
+            "mrn": row["mrn"],
+            "first_name": row["first_name"],
+            "last_name": row["last_name"],
+            "date_of_birth": row["date_of_birth"],
+            "last_visit_date": row["last_visit_date"],
+            "is_active": row["is_active"]
         }
+    
+    @classmethod
+    def to_dicts(cls, patients):
+        """
+        Convert a sequence of patients to dictionaries.
+        List endpoints use this directly so the per-row work stays in a single tight loop.
+        """
+        # The dict keys are identifier-like literals, which CPython interns at compile time
+        # (with their hashes cached), so no explicit sys.intern or key tuples are needed here.
+        allergy_to_dict = Allergy.to_dict
+        condition_to_dict = Condition.to_dict
+        medication_to_dict = Medication.to_dict
+        result = []
+        append = result.append
+        for p in patients:
+            gender = p.gender
+            blood_type = p.blood_type
+            append({
+                "id": str(p.id),
+                "mrn": p.mrn,
+                "first_name": p.first_name,
+                "middle_name": p.middle_name,
+                "last_name": p.last_name,
+                "date_of_birth": p.date_of_birth,
+                "gender": gender.value if gender else None,
+                "blood_type": blood_type.value if blood_type else None,
+                "email": p.email,
+                "phone_number": p.phone_number,
+                "address": {
+                    "line1": p.address_line1,
+                    "line2": p.address_line2,
+                    "city": p.city,
+                    "state": p.state,
+                    "postal_code": p.postal_code,
+                    "country": p.country
+                },
+                "emergency_contact": {
+                    "name": p.emergency_contact_name,
+                    "relationship": p.emergency_contact_relationship,
+                    "phone": p.emergency_contact_phone
+                },
+                "insurance": {
+                    "provider": p.insurance_provider,
+                    "policy_number": p.insurance_policy_number,
+                    "group_number": p.insurance_group_number
+                },
+                "height_cm": p.height_cm,
+                "weight_kg": p.weight_kg,
+                "primary_care_physician": p.primary_care_physician,
+                "notes": p.notes,
+                "is_active": p.is_active,
+                "metadata": p.patient_metadata,
+                "created_at": p.created_at,
+                "updated_at": p.updated_at,
+                "last_visit_date": p.last_visit_date,
+                "allergies": [allergy_to_dict(a) for a in p.allergies],
+                "conditions": [condition_to_dict(c) for c in p.conditions],
+                "medications": [medication_to_dict(m) for m in p.medications]
+            })
+        return result
 
 class Allergy(Base):
     """Model for patient allergies."""
     __tablename__ = 'allergies'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    name = Column(String(200), nullable=False, index=True)
-    description = Column(Text)
-    severity = Column(String(50))  # Mild, Moderate, Severe
-    reaction = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    name: Mapped[str] = mapped_column(String(200), nullable=False, index=True)
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    severity: Mapped[Optional[str]] = mapped_column(String(50))  # Mild, Moderate, Severe
+    reaction: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=UTC_NOW)
     
     # Relationships
-    patients = relationship("Patient", secondary=patient_allergies, back_populates="allergies")
+    patients: Mapped[List["Patient"]] = relationship("Patient", secondary=patient_allergies, back_populates="allergies")
     
     def __repr__(self):
         return f"<Allergy {self.name}>"
@@ -175,28 +298,28 @@ class Allergy(Base):
             "description": self.description,
             "severity": self.severity,
             "reaction": self.reaction,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
         }
 
 class Condition(Base):
     """Model for patient medical conditions."""
     __tablename__ = 'conditions'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    name = Column(String(200), nullable=False, index=True)
-    description = Column(Text)
-    status = Column(String(50))  # Active, Resolved, etc.
-    onset_date = Column(Date)
-    resolution_date = Column(Date)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    name: Mapped[str] = mapped_column(String(200), nullable=False, index=True)
+    description: Mapped[Optional[str]] = mapped_column(Text)
+    status: Mapped[Optional[str]] = mapped_column(String(50))  # Active, Resolved, etc.
+    onset_date: Mapped[Optional[date]] = mapped_column(Date)
+    resolution_date: Mapped[Optional[date]] = mapped_column(Date)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=UTC_NOW)
     
     # ICD-10 code (International Classification of Diseases)
-    icd_code = Column(String(20), index=True)
+    icd_code: Mapped[Optional[str]] = mapped_column(String(20), index=True)
     
     # Relationships
-    patients = relationship("Patient", secondary=patient_conditions, back_populates="conditions")
+    patients: Mapped[List["Patient"]] = relationship("Patient", secondary=patient_conditions, back_populates="conditions")
     
     def __repr__(self):
         return f"<Condition {self.name}>"
@@ -208,33 +331,33 @@ class Condition(Base):
             "description": self.description,
             "status": self.status,
             "icd_code": self.icd_code,
-            "onset_date": self.onset_date.isoformat() if self.onset_date else None,
-            "resolution_date": self.resolution_date.isoformat() if self.resolution_date else None,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            "onset_date": self.onset_date,
+            "resolution_date": self.resolution_date,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
         }
 
 class Medication(Base):
     """Model for medications patients are taking."""
     __tablename__ = 'medications'
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    name = Column(String(200), nullable=False, index=True)
-    dosage = Column(String(100))
-    frequency = Column(String(100))
-    instructions = Column(Text)
-    start_date = Column(Date)
-    end_date = Column(Date)
-    prescribing_doctor = Column(String(200))
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    name: Mapped[str] = mapped_column(String(200), nullable=False, index=True)
+    dosage: Mapped[Optional[str]] = mapped_column(String(100))
+    frequency: Mapped[Optional[str]] = mapped_column(String(100))
+    instructions: Mapped[Optional[str]] = mapped_column(Text)
+    start_date: Mapped[Optional[date]] = mapped_column(Date)
+    end_date: Mapped[Optional[date]] = mapped_column(Date)
+    prescribing_doctor: Mapped[Optional[str]] = mapped_column(String(200))
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=UTC_NOW)
     
     # Additional details
-    ndc_code = Column(String(20), index=True)  # National Drug Code
-    form = Column(String(50))  # Tablet, Liquid, etc.
+    ndc_code: Mapped[Optional[str]] = mapped_column(String(20), index=True)  # National Drug Code
+    form: Mapped[Optional[str]] = mapped_column(String(50))  # Tablet, Liquid, etc.
     
     # Relationships
-    patients = relationship("Patient", secondary=patient_medications, back_populates="medications")
+    patients: Mapped[List["Patient"]] = relationship("Patient", secondary=patient_medications, back_populates="medications")
     
     def __repr__(self):
         return f"<Medication {self.name}>"
@@ -246,119 +369,147 @@ class Medication(Base):
             "dosage": self.dosage,
             "frequency": self.frequency,
             "instructions": self.instructions,
-            "start_date": self.start_date.isoformat() if self.start_date else None,
-            "end_date": self.end_date.isoformat() if self.end_date else None,
+            "start_date": self.start_date,
+            "end_date": self.end_date,
             "prescribing_doctor": self.prescribing_doctor,
             "ndc_code": self.ndc_code,
             "form": self.form,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            "created_at": self.created_at,
+            "updated_at": self.updated_at
         }
 
 class LabResult(Base):
     """Model for patient lab results."""
     __tablename__ = 'lab_results'
-    
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    patient_id = Column(UUID(as_uuid=True), ForeignKey('patients.id'), nullable=False)
-    test_name = Column(String(200), nullable=False, index=True)
-    test_date = Column(DateTime, nullable=False)
-    result_value = Column(String(100), nullable=False)
-    unit = Column(String(50))
-    reference_range = Column(String(100))
-    abnormal_flag = Column(Boolean, default=False)
-    status = Column(String(50), default="Final")  # Preliminary, Final, etc.
-    performing_lab = Column(String(200))
-    ordering_provider = Column(String(200))
-    notes = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    __table_args__ = (
+        # Per-patient listings ordered by (date, id), read backwards for newest first; and
+        # per-patient lookups by LOINC code
+        Index('ix_labresults_patient_date_id', 'patient_id', 'test_date', 'id'),
+        Index('ix_labresults_patient_loinc', 'patient_id', 'loinc_code'),
+    )
+    
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    patient_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('patients.id'), nullable=False)
+    test_name: Mapped[str] = mapped_column(String(200), nullable=False, index=True)
+    test_date: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+    result_value: Mapped[str] = mapped_column(String(100), nullable=False)
+    unit: Mapped[Optional[str]] = mapped_column(String(50))
+    reference_range: Mapped[Optional[str]] = mapped_column(String(100))
+    abnormal_flag: Mapped[Optional[bool]] = mapped_column(Boolean, default=False)
+    status: Mapped[Optional[str]] = mapped_column(String(50), default="Final")  # Preliminary, Final, etc.
+    performing_lab: Mapped[Optional[str]] = mapped_column(String(200))
+    ordering_provider: Mapped[Optional[str]] = mapped_column(String(200))
+    notes: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=UTC_NOW)
     
     # LOINC code (Logical Observation Identifiers Names and Codes)
-    loinc_code = Column(String(20), index=True)
+    loinc_code: Mapped[Optional[str]] = mapped_column(String(20))
     
     # Additional structured data can be stored here
-    lab_metadata = Column(JSONB, default={})
+    lab_metadata: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
     
     # Relationships
-    patient = relationship("Patient", back_populates="lab_results")
+    patient: Mapped["Patient"] = relationship("Patient", back_populates="lab_results")
     
     def __repr__(self):
         return f"<LabResult {self.test_name} for patient {self.patient_id}>"
     
     def to_dict(self):
+        return LabResult.row_to_dict({c.key: getattr(self, c.key) for c in self.__table__.columns})
+    
+    @staticmethod
+    def row_to_dict(row):
+        """
+        Convert a lab_results row to a dictionary.
+        Accepts any mapping keyed by column name, e.g. a RowMapping from a Core select,
+        so list endpoints can skip ORM hydration.
+        """
         return {
-            "id": str(self.id),
-            "patient_id": str(self.patient_id),
-            "test_name": self.test_name,
-            "test_date": self.test_date.isoformat() if self.test_date else None,
-            "result_value": self.result_value,
-            "unit": self.unit,
-            "reference_range": self.reference_range,
-            "abnormal_flag": self.abnormal_flag,
-            "status": self.status,
-            "performing_lab": self.performing_lab,
-            "ordering_provider": self.ordering_provider,
-            "notes": self.notes,
-            "loinc_code": self.loinc_code,
-            "metadata": self.lab_metadata,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            "id": str(row["id"]),
+            "patient_id": str(row["patient_id"]),
+            "test_name": row["test_name"],
+            "test_date": row["test_date"],
+            "result_value": row["result_value"],
+            "unit": row["unit"],
+            "reference_range": row["reference_range"],
+            "abnormal_flag": row["abnormal_flag"],
+            "status": row["status"],
+            "performing_lab": row["performing_lab"],
+            "ordering_provider": row["ordering_provider"],
+            "notes": row["notes"],
+            "loinc_code": row["loinc_code"],
+            "metadata": row["lab_metadata"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
         }
 
 class Visit(Base):
     """Model for patient visits/encounters."""
     __tablename__ = 'visits'
-    
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
-    patient_id = Column(UUID(as_uuid=True), ForeignKey('patients.id'), nullable=False)
-    visit_date = Column(DateTime, nullable=False, index=True)
-    provider_name = Column(String(200), nullable=False)
-    visit_type = Column(String(100), nullable=False)  # Office visit, ER, etc.
-    chief_complaint = Column(Text)
-    diagnosis = Column(Text)
-    treatment_plan = Column(Text)
-    follow_up_instructions = Column(Text)
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    __table_args__ = (
+        # Per-patient listings ordered by (date, id), read backwards for newest first
+        Index('ix_visits_patient_date_id', 'patient_id', 'visit_date', 'id'),
+    )
+    
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid4)
+    patient_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey('patients.id'), nullable=False)
+    visit_date: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
+    provider_name: Mapped[str] = mapped_column(String(200), nullable=False)
+    visit_type: Mapped[str] = mapped_column(String(100), nullable=False)  # Office visit, ER, etc.
+    chief_complaint: Mapped[Optional[str]] = mapped_column(Text)
+    diagnosis: Mapped[Optional[str]] = mapped_column(Text)
+    treatment_plan: Mapped[Optional[str]] = mapped_column(Text)
+    follow_up_instructions: Mapped[Optional[str]] = mapped_column(Text)
+    created_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW)
+    updated_at: Mapped[Optional[datetime]] = mapped_column(DateTime, server_default=UTC_NOW, onupdate=UTC_NOW)
     
     # Vital signs
-    temperature = Column(Float)
-    heart_rate = Column(Integer)
-    blood_pressure_systolic = Column(Integer)
-    blood_pressure_diastolic = Column(Integer)
-    respiratory_rate = Column(Integer)
-    oxygen_saturation = Column(Float)
+    temperature: Mapped[Optional[float]] = mapped_column(Float)
+    heart_rate: Mapped[Optional[int]] = mapped_column(Integer)
+    blood_pressure_systolic: Mapped[Optional[int]] = mapped_column(Integer)
+    blood_pressure_diastolic: Mapped[Optional[int]] = mapped_column(Integer)
+    respiratory_rate: Mapped[Optional[int]] = mapped_column(Integer)
+    oxygen_saturation: Mapped[Optional[float]] = mapped_column(Float)
     
     # Additional structured data can be stored here
-    visit_metadata = Column(JSONB, default={})
+    visit_metadata: Mapped[Optional[dict]] = mapped_column(JSONB, default=dict)
     
     # Relationships
-    patient = relationship("Patient", back_populates="visits")
+    patient: Mapped["Patient"] = relationship("Patient", back_populates="visits")
     
     def __repr__(self):
         return f"<Visit {self.visit_date} for patient {self.patient_id}>"
     
     def to_dict(self):
+        return Visit.row_to_dict({c.key: getattr(self, c.key) for c in self.__table__.columns})
+    
+    @staticmethod
+    def row_to_dict(row):
+        """
+        Convert a visits row to a dictionary.
+        Accepts any mapping keyed by column name, e.g. a RowMapping from a Core select,
+        so list endpoints can skip ORM hydration.
+        """
         return {
-            "id": str(self.id),
-            "patient_id": str(self.patient_id),
-            "visit_date": self.visit_date.isoformat() if self.visit_date else None,
-            "provider_name": self.provider_name,
-            "visit_type": self.visit_type,
-            "chief_complaint": self.chief_complaint,
-            "diagnosis": self.diagnosis,
-            "treatment_plan": self.treatment_plan,
-            "follow_up_instructions": self.follow_up_instructions,
+            "id": str(row["id"]),
+            "patient_id": str(row["patient_id"]),
+            "visit_date": row["visit_date"],
+            "provider_name": row["provider_name"],
+            "visit_type": row["visit_type"],
+            "chief_complaint": row["chief_complaint"],
+            "diagnosis": row["diagnosis"],
+            "treatment_plan": row["treatment_plan"],
+            "follow_up_instructions": row["follow_up_instructions"],
             "vital_signs": {
-                "temperature": self.temperature,
-                "heart_rate": self.heart_rate,
-                "blood_pressure": f"{self.blood_pressure_systolic}/{self.blood_pressure_diastolic}" 
-                    if self.blood_pressure_systolic and self.blood_pressure_diastolic else None,
-                "respiratory_rate": self.respiratory_rate,
-                "oxygen_saturation": self.oxygen_saturation
+                "temperature": row["temperature"],
+                "heart_rate": row["heart_rate"],
+                "blood_pressure": f"{row['blood_pressure_systolic']}/{row['blood_pressure_diastolic']}" 
+                    if row["blood_pressure_systolic"] and row["blood_pressure_diastolic"] else None,
+                "respiratory_rate": row["respiratory_rate"],
+                "oxygen_saturation": row["oxygen_saturation"]
             },
-            "visit_metadata": self.metadata,
-            "created_at": self.created_at.isoformat() if self.created_at else None,
-            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+            "visit_metadata": row["visit_metadata"],
+            "created_at": row["created_at"],
+            "updated_at": row["updated_at"]
         }
\ No newline at end of file
@@ -1,92 +1,191 @@
-from flask import Blueprint, request, jsonify, current_app
+from flask import Blueprint, request, jsonify, current_app, g, Response, stream_with_context
 import json
-from datetime import datetime
+import uuid
+
+import redis
+from pydantic import ValidationError
+from werkzeug.exceptions import BadRequest
 
 from ..utils.db import get_db_session, close_db_session
 from ..services.patient_service import PatientService
-from ..utils.validation import validate_patient_data, validate_lab_result, validate_visit, validate_allergy, validate_condition, validate_medication
+from ..models.patient import Patient, LabResult, Visit
+from ..utils.pagination import InvalidCursorError
+from ..utils.serialization import stream_json_list
+from ..utils.redis_client import get_redis_client
+from ..utils.validation import validate_patient_data, validate_lab_result, validate_visit, validate_allergy, validate_condition, validate_medication, validate_advanced_search
+from ..utils.validation import PatientIn, PATIENT_LIST_ADAPTER, format_validation_errors, parse_iso_date, parse_iso_datetime
 
 # Create blueprint
 patient_bp = Blueprint('patient', __name__, url_prefix='/api/v1/patients')
 
+# Pagination/control parameters that are not patient filters
+LIST_CONTROL_ARGS = frozenset(('page', 'page_size', 'include_inactive', 'cursor', 'with_total'))
+SEARCH_CONTROL_KEYS = frozenset(('page', 'page_size', 'cursor', 'with_total'))
+
+# GET list endpoints whose pages browsers may briefly reuse (see add_list_cache_control)
+CACHEABLE_LIST_ENDPOINTS = frozenset(('patient.get_patients', 'patient.get_lab_results', 'patient.get_visits', 'patient.get_recent'))
+
+# Page size limits, copied from the app config when the blueprint is registered
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Rows per patient returned by GET /recent/<kind> by default, and at most
+RECENT_PER_PATIENT = 5
+MAX_RECENT_PER_PATIENT = 20
+
+@patient_bp.record_once
+def load_page_size_limits(state):
+    """Read the page size limits once instead of through current_app on every list request."""
+    global DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+    DEFAULT_PAGE_SIZE = state.app.config.get('DEFAULT_PAGE_SIZE', DEFAULT_PAGE_SIZE)
+    MAX_PAGE_SIZE = state.app.config.get('MAX_PAGE_SIZE', MAX_PAGE_SIZE)
+
+def _paging(params):
+    """
+    Read (page, page_size) from query args or a JSON body, clamping page_size to MAX_PAGE_SIZE.
+    Raises BadRequest if either value is not a positive integer.
+    """
+    try:
+        page = int(params.get('page', 1))
+        page_size = min(int(params.get('page_size', DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE)
+    except (TypeError, ValueError):
+        raise BadRequest("page and page_size must be integers")
+    
+    if page < 1 or page_size < 1:
+        raise BadRequest("page and page_size must be positive")
+    
+    return page, page_size
+
+@patient_bp.before_request
+def open_db_session():
+    """Attach the thread's scoped database session to the request."""
+    g.db = get_db_session()
+
+@patient_bp.teardown_request
+def remove_db_session(exception=None):
+    """Return the session's connection to the pool, even when the view raised."""
+    close_db_session()
+
+@patient_bp.after_request
+def add_conditional_etag(response):
+    """Give complete GET responses an ETag and turn matching If-None-Match requests into empty 304s."""
+    if request.method == 'GET' and response.status_code == 200 and not response.is_streamed:
+        # Keeps an ETag the view already set (get_patient); otherwise hashes the body
+        response.add_etag()
+        response.make_conditional(request)
+    return response
+
+@patient_bp.after_request
+def add_list_cache_control(response):
+    """Let the browser reuse a list page for a few seconds; it revalidates with the ETag afterwards."""
+    if request.endpoint in CACHEABLE_LIST_ENDPOINTS and response.status_code == 200:
+        response.cache_control.private = True
+        response.cache_control.max_age = current_app.config.get('LIST_CACHE_MAX_AGE')
+    return response
+
+def _list_response(key, rows, serialize, pagination):
+    """
+    Build a {key: [...], "pagination": {...}} response.
+    Large pages are streamed row by row instead of being serialized in one piece.
+    """
+    if len(rows) >= current_app.config.get('STREAM_RESPONSE_MIN_ROWS'):
+        body = stream_json_list(key, rows, serialize, {"pagination": pagination})
+        return Response(stream_with_context(body), status=200, mimetype='application/json')
+    
+    return jsonify({
+        key: [serialize(row) for row in rows],
+        "pagination": pagination
+    }), 200
+
+def _patient_cache_key(version):
+    """
+    Redis key for a patient's cached GET response at a given version (see get_patient_version).
+    A change bumps updated_at and so the key, which makes a stale body unreachable instead of
+    relying on invalidation; superseded entries expire after PATIENT_CACHE_TTL.
+    """
+    return f"patient:{version}:full"
+
 @patient_bp.route('', methods=['POST'])
 def create_patient():
     """Create a new patient."""
-    data = request.get_json()
-    
-    # Validate patient data
-    is_valid, errors = validate_patient_data(data)
-    if not is_valid:
-        return jsonify({"errors": errors}), 400
-    
-    # Handle date fields
-    if 'date_of_birth' in data and isinstance(data['date_of_birth'], str):
-        try:
-            data['date_of_birth'] = datetime.fromisoformat(data['date_of_birth'].replace('Z', '+00:00')).date()
-        except ValueError:
-            return jsonify({"error": "Invalid date_of_birth format. Use ISO format (YYYY-MM-DD)."}), 400
+    # Decode, validate and parse dates in a single pass
+    try:
+        data = PatientIn.model_validate_json(request.get_data()).model_dump(exclude_unset=True)
+    except ValidationError as e:
+        return jsonify({"errors": format_validation_errors(e)}), 400
     
-    db_session = get_db_session()
     try:
-        # Check if patient with MRN already exists
-        if 'mrn' in data and PatientService.get_patient_by_mrn(db_session, data['mrn']):
+        # The insert skips taken MRNs atomically, so no separate existence check is needed
+        patient = PatientService.create_patient(g.db, data)
+        if patient is None:
             return jsonify({"error": f"Patient with MRN {data['mrn']} already exists"}), 409
         
-        patient = PatientService.create_patient(db_session, data)
-        
         return jsonify({
             "message": "Patient created successfully",
             "patient": patient.to_dict()
         }), 201
-    except Exception as e:
-        current_app.logger.error(f"Error creating patient: {str(e)}")
+    except Exception:
+        current_app.logger.exception("Error creating patient")
         return jsonify({"error": "An error occurred while creating the patient"}), 500
-    finally:
-        close_db_session()
 
 @patient_bp.route('', methods=['GET'])
 def get_patients():
     """Get all patients with pagination and filtering."""
     # Parse query parameters
-    page = int(request.args.get('page', 1))
-    page_size = min(int(request.args.get('page_size', current_app.config.get('DEFAULT_PAGE_SIZE'))), 
-                   current_app.config.get('MAX_PAGE_SIZE'))
+    page, page_size = _paging(request.args)
     include_inactive = request.args.get('include_inactive', 'false').lower() == 'true'
+    with_total = request.args.get('with_total', 'false').lower() == 'true'
     
     # Handle search parameters
-    search_params = {}
-    for key in request.args:
-        if key not in ['page', 'page_size', 'include_inactive']:
-            search_params[key] = request.args.get(key)
+    search_params = {key: value for key, value in request.args.items() if key not in LIST_CONTROL_ARGS}
     
-    db_session = get_db_session()
     try:
+        # A cursor (empty for the first page) selects keyset pagination; page is the legacy fallback
+        if 'cursor' in request.args:
+            patients, next_cursor = PatientService.list_patients_after(
+                g.db, search_params, request.args['cursor'], page_size, include_inactive
+            )
+            return jsonify({
+                "patients": [Patient.summary_row_to_dict(row) for row in patients],
+                "pagination": {
+                    "page_size": page_size,
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None
+                }
+            }), 200
+        
         # Use search if parameters are provided, otherwise get all
         if search_params:
-            patients, total_count = PatientService.search_patients(db_session, search_params, page, page_size)
+            patients, has_next = PatientService.search_patients(g.db, search_params, page, page_size)
         else:
-            patients, total_count = PatientService.get_all_patients(db_session, page, page_size, include_inactive)
+            patients, has_next = PatientService.get_all_patients(g.db, page, page_size, include_inactive)
+        
+        # Listings return summaries; GET /<patient_id> has the full record
+        patient_list = [Patient.summary_row_to_dict(row) for row in patients]
         
-        # Convert patients to dictionaries
-        patient_list = [patient.to_dict() for patient in patients]
+        pagination = {"page": page, "page_size": page_size, "has_next": has_next}
         
-        # Calculate pagination metadata
-        total_pages = (total_count + page_size - 1) // page_size  # Ceiling division
+        # Totals cost a COUNT(*), so they are only computed on request
+        if with_total:
+            # The unfiltered table size comes from planner statistics instead of a full scan
+            total_count = None
+            if include_inactive and not search_params:
+                total_count = PatientService.estimate_patient_count(g.db)
+                pagination["total_is_estimate"] = total_count is not None
+            if total_count is None:
+                total_count = PatientService.count_patients(g.db, search_params, include_inactive)
+            pagination["total_count"] = total_count
+            pagination["total_pages"] = (total_count + page_size - 1) // page_size  # Ceiling division
         
         return jsonify({
             "patients": patient_list,
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total_count": total_count,
-                "total_pages": total_pages
-            }
+            "pagination": pagination
         }), 200
-    except Exception as e:
-        current_app.logger.error(f"Error retrieving patients: {str(e)}")
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        current_app.logger.exception("Error retrieving patients")
         return jsonify({"error": "An error occurred while retrieving patients"}), 500
-    finally:
-        close_db_session()
 
 @patient_bp.route('/search', methods=['POST'])
 def advanced_search():
@@ -94,54 +193,94 @@ def advanced_search():
     data = request.get_json() or {}
     
     # Parse pagination parameters
-    page = int(data.get('page', 1))
-    page_size = min(int(data.get('page_size', current_app.config.get('DEFAULT_PAGE_SIZE'))), 
-                   current_app.config.get('MAX_PAGE_SIZE'))
+    page, page_size = _paging(data)
     
     # Extract search parameters
-    query_params = {k: v for k, v in data.items() if k not in ['page', 'page_size']}
+    with_total = bool(data.get('with_total', False))
+    query_params = {k: v for k, v in data.items() if k not in SEARCH_CONTROL_KEYS}
+    
+    # Reject unknown filters and unbounded name lists before building any query
+    is_valid, errors = validate_advanced_search(query_params)
+    if not is_valid:
+        return jsonify({"errors": errors}), 400
     
-    db_session = get_db_session()
     try:
-        patients, total_count = PatientService.advanced_search(db_session, query_params, page, page_size)
-        
-        # Convert patients to dictionaries
-        patient_list = [patient.to_dict() for patient in patients]
-        
-        # Calculate pagination metadata
-        total_pages = (total_count + page_size - 1) // page_size
+        # A cursor (null/empty for the first page) selects keyset pagination; page is the legacy fallback
+        if 'cursor' in data:
+            patients, next_cursor = PatientService.advanced_search_after(g.db, query_params, data['cursor'], page_size)
+            return jsonify({
+                "patients": [Patient.summary_row_to_dict(row) for row in patients],
+                "pagination": {
+                    "page_size": page_size,
+                    "next_cursor": next_cursor,
+                    "has_more": next_cursor is not None
+                }
+            }), 200
+        
+        patients, has_next = PatientService.advanced_search(g.db, query_params, page, page_size)
+        
+        # Searches return summaries; GET /<patient_id> has the full record
+        patient_list = [Patient.summary_row_to_dict(row) for row in patients]
+        
+        pagination = {"page": page, "page_size": page_size, "has_next": has_next}
+        
+        # Totals cost a COUNT(*), so they are only computed on request
+        if with_total:
+            total_count = PatientService.count_advanced_search(g.db, query_params)
+            pagination["total_count"] = total_count
+            pagination["total_pages"] = (total_count + page_size - 1) // page_size
         
         return jsonify({
             "patients": patient_list,
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total_count": total_count,
-                "total_pages": total_pages
-            }
+            "pagination": pagination
         }), 200
-    except Exception as e:
-        current_app.logger.error(f"Error in advanced search: {str(e)}")
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        current_app.logger.exception("Error in advanced search")
         return jsonify({"error": "An error occurred during search"}), 500
-    finally:
-        close_db_session()
 
 @patient_bp.route('/<patient_id>', methods=['GET'])
 def get_patient(patient_id):
     """Get a patient by ID."""
-    db_session = get_db_session()
     try:
-        patient = PatientService.get_patient_by_id(db_session, patient_id)
-        
-        if not patient:
+        # The ETag comes from updated_at alone, so unchanged records are answered without loading them
+        version = PatientService.get_patient_version(g.db, patient_id)
+        if version is None:
             return jsonify({"error": "Patient not found"}), 404
         
-        return jsonify({"patient": patient.to_dict()}), 200
-    except Exception as e:
-        current_app.logger.error(f"Error retrieving patient {patient_id}: {str(e)}")
+        if request.if_none_match.contains_weak(version):
+            response = Response(status=304)
+            response.set_etag(version, weak=True)
+            return response
+        
+        cache_key = _patient_cache_key(version)
+        
+        # Serve the serialized body straight from Redis when it is cached
+        body = None
+        try:
+            body = get_redis_client().get(cache_key)
+        except redis.RedisError as e:
+            current_app.logger.warning("Patient cache unavailable: %s", e)
+        
+        if body is None:
+            patient = PatientService.get_patient_by_id(g.db, patient_id)
+            
+            if not patient:
+                return jsonify({"error": "Patient not found"}), 404
+            
+            body = current_app.json.dumps({"patient": patient.to_dict()})
+            try:
+                get_redis_client().set(cache_key, body, ex=current_app.config.get('PATIENT_CACHE_TTL'))
+            except redis.RedisError as e:
+                current_app.logger.warning("Failed to cache patient %s: %s", patient_id, e)
+        
+        response = Response(body, status=200, mimetype='application/json')
+        response.set_etag(version, weak=True)
+        return response
+    except Exception:
+        current_app.logger.exception("Error retrieving patient %s", patient_id)
         return jsonify({"error": "An error occurred while retrieving the patient"}), 500
-    finally:
-        close_db_session()
 
 @patient_bp.route('/<patient_id>', methods=['PUT'])
 def update_patient(patient_id):
@@ -156,13 +295,12 @@ def update_patient(patient_id):
     # Handle date fields
     if 'date_of_birth' in data and isinstance(data['date_of_birth'], str):
         try:
-            data['date_of_birth'] = datetime.fromisoformat(data['date_of_birth'].replace('Z', '+00:00')).date()
+            data['date_of_birth'] = parse_iso_date(data['date_of_birth'])
         except ValueError:
             return jsonify({"error": "Invalid date_of_birth format. Use ISO format (YYYY-MM-DD)."}), 400
     
-    db_session = get_db_session()
     try:
-        patient = PatientService.update_patient(db_session, patient_id, data)
+        patient = PatientService.update_patient(g.db, patient_id, data)
         
         if not patient:
             return jsonify({"error": "Patient not found"}), 404
@@ -171,297 +309,207 @@ def update_patient(patient_id):
             "message": "Patient updated successfully",
             "patient": patient.to_dict()
         }), 200
-    except Exception as e:
-        current_app.logger.error(f"Error updating patient {patient_id}: {str(e)}")
+    except Exception:
+        current_app.logger.exception("Error updating patient %s", patient_id)
         return jsonify({"error": "An error occurred while updating the patient"}), 500
-    finally:
-        close_db_session()
 
 @patient_bp.route('/<patient_id>', methods=['DELETE'])
 def delete_patient(patient_id):
     """Delete (deactivate) a patient."""
-    db_session = get_db_session()
     try:
-        success = PatientService.delete_patient(db_session, patient_id)
+        success = PatientService.delete_patient(g.db, patient_id)
         
         if not success:
             return jsonify({"error": "Patient not found"}), 404
         
         return jsonify({"message": "Patient deactivated successfully"}), 200
-    except Exception as e:
-        current_app.logger.error(f"Error deactivating patient {patient_id}: {str(e)}")
+    except Exception:
+        current_app.logger.exception("Error deactivating patient %s", patient_id)
         return jsonify({"error": "An error occurred while deactivating the patient"}), 500
-    finally:
-        close_db_session()
 
-@patient_bp.route('/<patient_id>/allergies', methods=['POST'])
-def add_allergy(patient_id):
-    """Add an allergy to a patient."""
-    data = request.get_json()
-    
-    # Validate allergy data
-    is_valid, errors = validate_allergy(data)
-    if not is_valid:
-        return jsonify({"errors": errors}), 400
-    
-    db_session = get_db_session()
-    try:
-        allergy = PatientService.add_allergy(db_session, patient_id, data)
-        
-        if not allergy:
-            return jsonify({"error": "Patient not found"}), 404
-        
-        return jsonify({
-            "message": "Allergy added successfully",
-            "allergy": allergy.to_dict()
-        }), 201
-    except Exception as e:
-        current_app.logger.error(f"Error adding allergy to patient {patient_id}: {str(e)}")
-        return jsonify({"error": "An error occurred while adding the allergy"}), 500
-    finally:
-        close_db_session()
+# Child resources created through POST /<patient_id>/<kind>:
+# kind -> (validator, date fields, datetime fields, service method, response key)
+CHILD_RESOURCES = {
+    'allergies': (validate_allergy, (), (), PatientService.add_allergy, 'allergy'),
+    'conditions': (validate_condition, ('onset_date', 'resolution_date'), (), PatientService.add_condition, 'condition'),
+    'medications': (validate_medication, ('start_date', 'end_date'), (), PatientService.add_medication, 'medication'),
+    'lab-results': (validate_lab_result, (), ('test_date',), PatientService.add_lab_result, 'lab_result'),
+    'visits': (validate_visit, (), ('visit_date',), PatientService.add_visit, 'visit')
+}
 
-@patient_bp.route('/<patient_id>/conditions', methods=['POST'])
-def add_condition(patient_id):
-    """Add a medical condition to a patient."""
+@patient_bp.route('/<patient_id>/<any(allergies, conditions, medications, "lab-results", visits):kind>', methods=['POST'])
+def add_child_resource(patient_id, kind):
+    """Add an allergy, condition, medication, lab result or visit to a patient."""
+    validate, date_fields, datetime_fields, add, key = CHILD_RESOURCES[kind]
+    noun = key.replace('_', ' ')
     data = request.get_json()
     
-    # Validate condition data
-    is_valid, errors = validate_condition(data)
+    # Validate the resource data
+    is_valid, errors = validate(data)
     if not is_valid:
         return jsonify({"errors": errors}), 400
     
     # Parse date fields
-    for date_field in ['onset_date', 'resolution_date']:
+    for date_field in date_fields:
         if date_field in data and isinstance(data[date_field], str):
             try:
-                data[date_field] = datetime.fromisoformat(data[date_field].replace('Z', '+00:00')).date()
+                data[date_field] = parse_iso_date(data[date_field])
             except ValueError:
                 return jsonify({"error": f"Invalid {date_field} format. Use ISO format (YYYY-MM-DD)."}), 400
     
-    db_session = get_db_session()
-    try:
-        condition = PatientService.add_condition(db_session, patient_id, data)
-        
-        if not condition:
-            return jsonify({"error": "Patient not found"}), 404
-        
-        return jsonify({
-            "message": "Condition added successfully",
-            "condition": condition.to_dict()
-        }), 201
-    except Exception as e:
-        current_app.logger.error(f"Error adding condition to patient {patient_id}: {str(e)}")
-        return jsonify({"error": "An error occurred while adding the condition"}), 500
-    finally:
-        close_db_session()
-
-@patient_bp.route('/<patient_id>/medications', methods=['POST'])
-def add_medication(patient_id):
-    """Add a medication to a patient."""
-    data = request.get_json()
-    
-    # Validate medication data
-    is_valid, errors = validate_medication(data)
-    if not is_valid:
-        return jsonify({"errors": errors}), 400
-    
-    # Parse date fields
-    for date_field in ['start_date', 'end_date']:
-        if date_field in data and isinstance(data[date_field], str):
+    for datetime_field in datetime_fields:
+        if datetime_field in data and isinstance(data[datetime_field], str):
             try:
-                data[date_field] = datetime.fromisoformat(data[date_field].replace('Z', '+00:00')).date()
+                data[datetime_field] = parse_iso_datetime(data[datetime_field])
             except ValueError:
-                return jsonify({"error": f"Invalid {date_field} format. Use ISO format (YYYY-MM-DD)."}), 400
-    
-    db_session = get_db_session()
-    try:
-        medication = PatientService.add_medication(db_session, patient_id, data)
-        
-        if not medication:
-            return jsonify({"error": "Patient not found"}), 404
-        
-        return jsonify({
-            "message": "Medication added successfully",
-            "medication": medication.to_dict()
-        }), 201
-    except Exception as e:
-        current_app.logger.error(f"Error adding medication to patient {patient_id}: {str(e)}")
-        return jsonify({"error": "An error occurred while adding the medication"}), 500
-    finally:
-        close_db_session()
-
-@patient_bp.route('/<patient_id>/lab-results', methods=['POST'])
-def add_lab_result(patient_id):
-    """Add a lab result to a patient."""
-    data = request.get_json()
-    
-    # Validate lab result data
-    is_valid, errors = validate_lab_result(data)
-    if not is_valid:
-        return jsonify({"errors": errors}), 400
+                return jsonify({"error": f"Invalid {datetime_field} format. Use ISO format (YYYY-MM-DDTHH:MM:SS)."}), 400
     
-    # Parse date fields
-    if 'test_date' in data and isinstance(data['test_date'], str):
-        try:
-            data['test_date'] = datetime.fromisoformat(data['test_date'].replace('Z', '+00:00'))
-        except ValueError:
-            return jsonify({"error": "Invalid test_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)."}), 400
-    
-    db_session = get_db_session()
     try:
-        lab_result = PatientService.add_lab_result(db_session, patient_id, data)
+        resource = add(g.db, patient_id, data)
         
-        if not lab_result:
+        if not resource:
             return jsonify({"error": "Patient not found"}), 404
         
         return jsonify({
-            "message": "Lab result added successfully",
-            "lab_result": lab_result.to_dict()
+            "message": f"{noun.capitalize()} added successfully",
+            key: resource.to_dict()
         }), 201
-    except Exception as e:
-        current_app.logger.error(f"Error adding lab result to patient {patient_id}: {str(e)}")
-        return jsonify({"error": "An error occurred while adding the lab result"}), 500
-    finally:
-        close_db_session()
+    except Exception:
+        current_app.logger.exception("Error adding %s to patient %s", noun, patient_id)
+        return jsonify({"error": f"An error occurred while adding the {noun}"}), 500
 
 @patient_bp.route('/<patient_id>/lab-results', methods=['GET'])
 def get_lab_results(patient_id):
     """Get lab results for a patient."""
-    page = int(request.args.get('page', 1))
-    page_size = min(int(request.args.get('page_size', current_app.config.get('DEFAULT_PAGE_SIZE'))), 
-                   current_app.config.get('MAX_PAGE_SIZE'))
+    page, page_size = _paging(request.args)
     
-    db_session = get_db_session()
     try:
-        lab_results, total_count = PatientService.get_patient_lab_results(db_session, patient_id, page, page_size)
+        # A cursor (empty for the first page) selects keyset pagination; page is the legacy fallback
+        if 'cursor' in request.args:
+            lab_results, next_cursor = PatientService.get_patient_lab_results_after(g.db, patient_id, request.args['cursor'], page_size)
+            return _list_response("lab_results", lab_results, LabResult.row_to_dict, {
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None
+            })
         
-        # Convert to dictionaries
-        lab_results_list = [result.to_dict() for result in lab_results]
+        lab_results, has_next = PatientService.get_patient_lab_results(g.db, patient_id, page, page_size)
         
-        # Calculate pagination metadata
-        total_pages = (total_count + page_size - 1) // page_size
+        pagination = {"page": page, "page_size": page_size, "has_next": has_next}
         
-        return jsonify({
-            "lab_results": lab_results_list,
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total_count": total_count,
-                "total_pages": total_pages
-            }
-        }), 200
-    except Exception as e:
-        current_app.logger.error(f"Error retrieving lab results for patient {patient_id}: {str(e)}")
-        return jsonify({"error": "An error occurred while retrieving lab results"}), 500
-    finally:
-        close_db_session()
-
-@patient_bp.route('/<patient_id>/visits', methods=['POST'])
-def add_visit(patient_id):
-    """Add a visit/encounter to a patient."""
-    data = request.get_json()
-    
-    # Validate visit data
-    is_valid, errors = validate_visit(data)
-    if not is_valid:
-        return jsonify({"errors": errors}), 400
-    
-    # Parse date fields
-    if 'visit_date' in data and isinstance(data['visit_date'], str):
-        try:
-            data['visit_date'] = datetime.fromisoformat(data['visit_date'].replace('Z', '+00:00'))
-        except ValueError:
-            return jsonify({"error": "Invalid visit_date format. Use ISO format (YYYY-MM-DDTHH:MM:SS)."}), 400
-    
-    db_session = get_db_session()
-    try:
-        visit = PatientService.add_visit(db_session, patient_id, data)
+        # Totals cost a COUNT(*), so they are only computed on request
+        if request.args.get('with_total', 'false').lower() == 'true':
+            total_count = PatientService.count_lab_results(g.db, patient_id)
+            pagination["total_count"] = total_count
+            pagination["total_pages"] = (total_count + page_size - 1) // page_size
         
-        if not visit:
-            return jsonify({"error": "Patient not found"}), 404
-        
-        return jsonify({
-            "message": "Visit added successfully",
-            "visit": visit.to_dict()
-        }), 201
-    except Exception as e:
-        current_app.logger.error(f"Error adding visit to patient {patient_id}: {str(e)}")
-        return jsonify({"error": "An error occurred while adding the visit"}), 500
-    finally:
-        close_db_session()
+        return _list_response("lab_results", lab_results, LabResult.row_to_dict, pagination)
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        current_app.logger.exception("Error retrieving lab results for patient %s", patient_id)
+        return jsonify({"error": "An error occurred while retrieving lab results"}), 500
 
 @patient_bp.route('/<patient_id>/visits', methods=['GET'])
 def get_visits(patient_id):
     """Get visits for a patient."""
-    page = int(request.args.get('page', 1))
-    page_size = min(int(request.args.get('page_size', current_app.config.get('DEFAULT_PAGE_SIZE'))), 
-                   current_app.config.get('MAX_PAGE_SIZE'))
+    page, page_size = _paging(request.args)
     
-    db_session = get_db_session()
     try:
-        visits, total_count = PatientService.get_patient_visits(db_session, patient_id, page, page_size)
+        # A cursor (empty for the first page) selects keyset pagination; page is the legacy fallback
+        if 'cursor' in request.args:
+            visits, next_cursor = PatientService.get_patient_visits_after(g.db, patient_id, request.args['cursor'], page_size)
+            return _list_response("visits", visits, Visit.row_to_dict, {
+                "page_size": page_size,
+                "next_cursor": next_cursor,
+                "has_more": next_cursor is not None
+            })
         
-        # Convert to dictionaries
-        visits_list = [visit.to_dict() for visit in visits]
+        visits, has_next = PatientService.get_patient_visits(g.db, patient_id, page, page_size)
         
-        # Calculate pagination metadata
-        total_pages = (total_count + page_size - 1) // page_size
+        pagination = {"page": page, "page_size": page_size, "has_next": has_next}
         
+        # Totals cost a COUNT(*), so they are only computed on request
+        if request.args.get('with_total', 'false').lower() == 'true':
+            total_count = PatientService.count_visits(g.db, patient_id)
+            pagination["total_count"] = total_count
+            pagination["total_pages"] = (total_count + page_size - 1) // page_size
+        
+        return _list_response("visits", visits, Visit.row_to_dict, pagination)
+    except InvalidCursorError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception:
+        current_app.logger.exception("Error retrieving visits for patient %s", patient_id)
+        return jsonify({"error": "An error occurred while retrieving visits"}), 500
+
+# Per-patient table served by GET /recent/<kind>: (service method, serializer, response key)
+RECENT_RESOURCES = {
+    'lab-results': (PatientService.get_recent_lab_results, LabResult.row_to_dict, 'lab_results'),
+    'visits': (PatientService.get_recent_visits, Visit.row_to_dict, 'visits')
+}
+
+@patient_bp.route('/recent/<any("lab-results", visits):kind>', methods=['GET'])
+def get_recent(kind):
+    """Get the newest lab results or visits of several patients (patient_ids=a,b,c) in one query."""
+    get_recent_rows, serialize, key = RECENT_RESOURCES[kind]
+    patient_ids = [patient_id for patient_id in request.args.get('patient_ids', '').split(',') if patient_id]
+    if not patient_ids:
+        return jsonify({"error": "patient_ids is required"}), 400
+    if len(patient_ids) > MAX_PAGE_SIZE:
+        return jsonify({"error": f"At most {MAX_PAGE_SIZE} patient_ids are allowed"}), 400
+    
+    try:
+        per_patient = min(int(request.args.get('per_patient', RECENT_PER_PATIENT)), MAX_RECENT_PER_PATIENT)
+    except ValueError:
+        return jsonify({"error": "per_patient must be an integer"}), 400
+    if per_patient < 1:
+        return jsonify({"error": "per_patient must be positive"}), 400
+    
+    try:
+        recent = get_recent_rows(g.db, patient_ids, per_patient)
         return jsonify({
-            "visits": visits_list,
-            "pagination": {
-                "page": page,
-                "page_size": page_size,
-                "total_count": total_count,
-                "total_pages": total_pages
-            }
+            key: {patient_id: [serialize(row) for row in rows] for patient_id, rows in recent.items()}
         }), 200
-    except Exception as e:
-        current_app.logger.error(f"Error retrieving visits for patient {patient_id}: {str(e)}")
-        return jsonify({"error": "An error occurred while retrieving visits"}), 500
-    finally:
-        close_db_session()
+    except Exception:
+        current_app.logger.exception("Error retrieving recent %s", kind)
+        return jsonify({"error": f"An error occurred while retrieving recent {kind.replace('-', ' ')}"}), 500
 
 @patient_bp.route('/bulk-import', methods=['POST'])
 def bulk_import():
     """Bulk import patients."""
-    data = request.get_json()
+    # Validate and parse the whole array before touching the database, reporting all problems at once
+    try:
+        records = PATIENT_LIST_ADAPTER.validate_json(request.get_data())
+    except ValidationError as e:
+        return jsonify({"error": "Invalid patient data", "errors": format_validation_errors(e)}), 400
     
-    if not isinstance(data, list):
-        return jsonify({"error": "Request body must be an array of patient objects"}), 400
+    batch_size = current_app.config.get('BULK_IMPORT_BATCH_SIZE')
     
-    # Validate each patient record
-    for i, patient_data in enumerate(data):
-        is_valid, errors = validate_patient_data(patient_data)
-        if not is_valid:
-            return jsonify({"error": f"Invalid patient data at index {i}", "errors": errors}), 400
-        
-        # Parse date of birth
-        if 'date_of_birth' in patient_data and isinstance(patient_data['date_of_birth'], str):
+    def generate():
+        """Import one batch at a time, emitting an NDJSON progress line per committed batch."""
+        successful_imports = 0
+        for start in range(0, len(records), batch_size):
+            batch = [record.model_dump(exclude_unset=True) for record in records[start:start + batch_size]]
             try:
-                patient_data['date_of_birth'] = datetime.fromisoformat(patient_data['date_of_birth'].replace('Z', '+00:00')).date()
-            except ValueError:
-                return jsonify({"error": f"Invalid date_of_birth format at index {i}. Use ISO format (YYYY-MM-DD)."}), 400
-    
-    db_session = get_db_session()
-    try:
-        successful_imports, errors = PatientService.bulk_import_patients(db_session, data)
-        
-        response = {
+                imported, errors = PatientService.bulk_import_patients(g.db, batch, start)
+            except Exception:
+                current_app.logger.exception("Error during bulk import")
+                yield current_app.json.dumps({"error": "An error occurred during bulk import", "batch_start": start}) + "\n"
+                return
+            
+            successful_imports += imported
+            yield current_app.json.dumps({
+                "batch_start": start,
+                "batch_size": len(batch),
+                "successful_imports": imported,
+                "errors": errors
+            }) + "\n"
+        
+        yield current_app.json.dumps({
             "message": f"Successfully imported {successful_imports} patients",
             "successful_imports": successful_imports,
-            "total_records": len(data)
-        }
-        
-        if errors:
-            response["errors"] = errors
-            
-        status_code = 200 if successful_imports == len(data) else 207  # Partial success
-        
-        return jsonify(response), status_code
-    except Exception as e:
-        current_app.logger.error(f"Error during bulk import: {str(e)}")
-        return jsonify({"error": "An error occurred during bulk import"}), 500
-    finally:
-        close_db_session()
\ No newline at end of file
+            "total_records": len(records)
+        }) + "\n"
+    
+    # Batches commit independently, so the outcome is reported per batch (Multi-Status)
+    return Response(stream_with_context(generate()), status=207, mimetype='application/x-ndjson')
\ No newline at end of file
@@ -1,31 +1,80 @@
 from datetime import datetime
+import hashlib
+import logging
 from typing import Dict, List, Optional, Tuple, Any, Union
 import uuid
-from sqlalchemy import func, or_, and_, not_, desc, asc, text
-from sqlalchemy.orm import Session, joinedload
+import orjson
+import redis
+from sqlalchemy import func, or_, and_, not_, desc, asc, text, select, update, tuple_, Date
+from sqlalchemy.engine import RowMapping
+from sqlalchemy.orm import Session, selectinload, raiseload
 from sqlalchemy.sql.expression import cast
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import JSONB, insert as pg_insert
 from ..models.patient import patient_conditions, patient_medications, patient_allergies
 
-from ..models.patient import Patient, Allergy, Condition, Medication, LabResult, Visit
+from ..models.patient import Patient, Allergy, Condition, Medication, LabResult, Visit, UTC_NOW
+from ..config import app_config
+from ..utils.pagination import encode_cursor, decode_cursor
+from ..utils.validation import PatientIn
+from ..utils.redis_client import get_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Patient attributes an update may set, keyed by the name clients send ("metadata" for
+# patient_metadata); the id, timestamps and generated columns are never written from a payload
+PATIENT_UPDATABLE_FIELDS = {
+    field.alias or name: name for name, field in PatientIn.model_fields.items()
+}
+
+# Patient.to_dict() serializes these collections; load them with one IN-query per
+# collection instead of lazy-loading them (N+1) or joining them (row fan-out)
+PATIENT_COLLECTION_LOADERS = (
+    selectinload(Patient.allergies),
+    selectinload(Patient.conditions),
+    selectinload(Patient.medications)
+)
+
+# Columns returned by patient listings and searches; the detail endpoint loads the full record
+PATIENT_SUMMARY_COLUMNS = (
+    Patient.id, Patient.mrn, Patient.first_name, Patient.last_name, Patient.date_of_birth,
+    Patient.last_visit_date, Patient.is_active
+)
+
+# Inserts tried with freshly generated MRNs before create_patient gives up on a collision
+MRN_GENERATION_ATTEMPTS = 3
+
+# Patient columns a keyset cursor can sort by; none of them are NULL in practice, so
+# the (sort key, id) row comparison never skips rows
+KEYSET_SORT_FIELDS = frozenset({'last_name', 'first_name', 'mrn', 'date_of_birth', 'created_at', 'updated_at'})
 
 class PatientService:
     """Service for handling patient data operations."""
     
     @staticmethod
-    def create_patient(db_session: Session, patient_data: Dict) -> Patient:
-        """Create a new patient."""
-        # Generate MRN if not provided
-        if not patient_data.get('mrn'):
-            patient_data['mrn'] = PatientService._generate_mrn()
+    def create_patient(db_session: Session, patient_data: Dict) -> Optional[Patient]:
+        """
+        Create a new patient.
+        Returns None if the supplied MRN is already taken; the check and the insert are a single statement.
+        """
+        # A generated MRN that happens to collide is replaced and retried rather than reported
+        generate_mrn = not patient_data.get('mrn')
         
-        # Create patient object
-        patient = Patient(**patient_data)
+        for _ in range(MRN_GENERATION_ATTEMPTS if generate_mrn else 1):
+            if generate_mrn:
+                patient_data['mrn'] = PatientService._generate_mrn()
+            
+            # ON CONFLICT makes concurrent creates with the same MRN lose cleanly instead of raising
+            stmt = (
+                pg_insert(Patient)
+                .values(patient_data)
+                .on_conflict_do_nothing(index_elements=[Patient.mrn])
+                .returning(Patient)
+            )
+            patient = db_session.scalars(stmt).first()
+            if patient is not None:
+                break
         
-        # Add to session and commit
-        db_session.add(patient)
         db_session.commit()
-        db_session.refresh(patient)
         
         return patient
     
@@ -34,14 +83,30 @@ class PatientService:
         """Get a patient by ID with all related data."""
         try:
             patient_uuid = uuid.UUID(patient_id)
-            return db_session.query(Patient).options(
-                joinedload(Patient.allergies),
-                joinedload(Patient.conditions),
-                joinedload(Patient.medications)
-            ).filter(Patient.id == patient_uuid).first()
+            # One IN-query per collection; joining all three would multiply their rows together.
+            # Any other relationship touched while serializing raises instead of lazy-loading
+            return db_session.get(Patient, patient_uuid, options=[*PATIENT_COLLECTION_LOADERS, raiseload('*')])
         except ValueError:
             return None
     
+    @staticmethod
+    def get_patient_version(db_session: Session, patient_id: str) -> Optional[str]:
+        """
+        Get a cheap change marker for a patient (ID plus updated_at), or None if the patient does not exist.
+        Reads a single column, so conditional GETs can be answered without loading the patient.
+        """
+        try:
+            patient_uuid = uuid.UUID(patient_id)
+        except ValueError:
+            return None
+        
+        row = db_session.execute(select(Patient.updated_at).where(Patient.id == patient_uuid)).first()
+        if row is None:
+            return None
+        
+        updated_at = row.updated_at
+        return f"{patient_uuid}-{updated_at.timestamp() if updated_at else 0}"
+    
     @staticmethod
     def get_patient_by_mrn(db_session: Session, mrn: str) -> Optional[Patient]:
         """Get a patient by Medical Record Number."""
@@ -52,18 +117,20 @@ class PatientService:
         """Update an existing patient."""
         try:
             patient_uuid = uuid.UUID(patient_id)
-            patient = db_session.query(Patient).filter(Patient.id == patient_uuid).first()
+            patient = db_session.get(Patient, patient_uuid)
             
             if not patient:
                 return None
             
-            # Update only the fields that are provided
+            # Update only the fields that are provided and writable
             for key, value in patient_data.items():
-                if hasattr(patient, key):
-                    setattr(patient, key, value)
+                attribute = PATIENT_UPDATABLE_FIELDS.get(key)
+                if attribute is not None:
+                    setattr(patient, attribute, value)
             
-            # Update timestamp
-            patient.updated_at = datetime.utcnow()
+            # Stamped by PostgreSQL, like every other updated_at; set explicitly so the ETag changes
+            # even when no column value did
+            patient.updated_at = UTC_NOW
             
             db_session.commit()
             db_session.refresh(patient)
@@ -79,13 +146,13 @@ class PatientService:
             patient_uuid = uuid.UUID(patient_id)
             # In healthcare systems, actual deletion is usually avoided
             # Instead, mark the patient as inactive
-            patient = db_session.query(Patient).filter(Patient.id == patient_uuid).first()
+            patient = db_session.get(Patient, patient_uuid)
             
             if not patient:
                 return False
             
             patient.is_active = False
-            patient.updated_at = datetime.utcnow()
+            patient.updated_at = UTC_NOW
             
             db_session.commit()
             return True
@@ -93,11 +160,119 @@ class PatientService:
             return False
     
     @staticmethod
-    def search_patients(db_session: Session, search_params: Dict, page: int = 1, page_size: int = 20) -> Tuple[List[Patient], int]:
+    def search_patients(db_session: Session, search_params: Dict, page: int = 1, page_size: int = 20) -> Tuple[List[RowMapping], bool]:
         """
         Search for patients based on various parameters with pagination.
-        Returns a tuple of (patients, total_count).
+        Returns a tuple of (patient summary rows, has_next); use count_patients for the total.
         """
+        query = PatientService._summary_query(PatientService._search_query(db_session, search_params))
+        
+        # Apply sorting
+        sort_field = search_params.get('sort_by', 'last_name')
+        sort_dir = search_params.get('sort_dir', 'asc')
+        
+        # Validate sort field exists on Patient model
+        if hasattr(Patient, sort_field):
+            sort_attr = getattr(Patient, sort_field)
+            query = query.order_by(asc(sort_attr) if sort_dir == 'asc' else desc(sort_attr))
+        else:
+            # Default to last_name, asc if invalid sort field
+            query = query.order_by(Patient.last_name)
+        
+        # Apply pagination, fetching one extra row to detect a next page without a COUNT
+        query = query.offset((page - 1) * page_size).limit(page_size + 1)
+        
+        # Execute query
+        patients = [row._mapping for row in query.all()]
+        
+        return patients[:page_size], len(patients) > page_size
+    
+    @staticmethod
+    def list_patients_after(db_session: Session, search_params: Dict, cursor: Optional[str], page_size: int = 20,
+                            include_inactive: bool = False) -> Tuple[List[RowMapping], Optional[str]]:
+        """
+        Keyset-paginated counterpart of search_patients/get_all_patients.
+        Returns a tuple of (patient summary rows, next_cursor); next_cursor is None on the last page.
+        """
+        sort_column, ascending = PatientService._keyset_sort(search_params)
+        
+        query = PatientService._summary_query(
+            PatientService._patients_query(db_session, search_params, include_inactive), sort_column
+        )
+        query = PatientService._apply_keyset(query, sort_column, Patient.id, ascending, cursor, page_size)
+        
+        return PatientService._next_page([row._mapping for row in query.all()], page_size, sort_column.key)
+    
+    @staticmethod
+    def _summary_query(query, sort_column=None):
+        """
+        Narrow a Patient query to PATIENT_SUMMARY_COLUMNS.
+        A keyset sort column outside the summary is selected as well, since the next cursor is built from it.
+        """
+        columns = PATIENT_SUMMARY_COLUMNS
+        if sort_column is not None and sort_column.key not in {column.key for column in columns}:
+            columns += (sort_column,)
+        return query.with_entities(*columns)
+    
+    @staticmethod
+    def count_patients(db_session: Session, search_params: Dict, include_inactive: bool = False) -> int:
+        """Count the patients matched by search_patients/get_all_patients (cached briefly in Redis)."""
+        query = PatientService._patients_query(db_session, search_params, include_inactive)
+        scope_params = search_params if search_params else {'include_inactive': include_inactive}
+        return PatientService._cached_count('patients', scope_params, query)
+    
+    @staticmethod
+    def estimate_patient_count(db_session: Session) -> Optional[int]:
+        """
+        Estimate the size of the whole patients table from the planner statistics in pg_class.
+        O(1) regardless of table size; returns None if the table has not been analyzed yet.
+        """
+        estimate = db_session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = 'patients'::regclass")
+        ).scalar()
+        
+        # reltuples is -1 until the first VACUUM/ANALYZE
+        return estimate if estimate is not None and estimate >= 0 else None
+    
+    @staticmethod
+    def _patients_query(db_session: Session, search_params: Dict, include_inactive: bool = False):
+        """Build the patient listing query: searched when search_params are given, otherwise all (active) patients."""
+        if search_params:
+            return PatientService._search_query(db_session, search_params)
+        
+        query = db_session.query(Patient)
+        if not include_inactive:
+            query = query.filter(Patient.is_active == True)
+        return query
+    
+    @staticmethod
+    def _cached_count(scope: str, params: Dict, query) -> int:
+        """
+        Run COUNT(*) for the query, caching the result in Redis under {scope}:count:{params hash}.
+        Counts directly when Redis is unavailable.
+        """
+        params_hash = hashlib.sha256(orjson.dumps(params, option=orjson.OPT_SORT_KEYS)).hexdigest()[:32]
+        cache_key = f"{scope}:count:{params_hash}"
+        
+        try:
+            cached_count = get_redis_client().get(cache_key)
+            if cached_count is not None:
+                return int(cached_count)
+        except redis.RedisError as e:
+            logger.warning("Count cache unavailable, counting directly: %s", e)
+            return query.count()
+        
+        total_count = query.count()
+        try:
+            get_redis_client().set(cache_key, total_count, ex=app_config.COUNT_CACHE_TTL)
+        except redis.RedisError as e:
+            logger.warning("Failed to cache count for %s: %s", scope, e)
+        
+        return total_count
+    
+    @staticmethod
+    def _search_query(db_session: Session, search_params: Dict):
+        """Build the filtered (unsorted, unpaginated) patient query for search_patients."""
         # Start with a base query
         query = db_session.query(Patient)
         
@@ -107,12 +282,8 @@ class PatientService:
             
             # Basic filters
             if 'name' in search_params:
-                name_term = f"%{search_params['name']}%"
-                filters.append(or_(
-                    Patient.first_name.ilike(name_term),
-                    Patient.last_name.ilike(name_term),
-                    func.concat(Patient.first_name, ' ', Patient.last_name).ilike(name_term)
-                ))
+                # full_name is "first last" in lower case and covered by a trigram index
+                filters.append(Patient.full_name.like(f"%{search_params['name'].lower()}%"))
             
             if 'mrn' in search_params:
                 filters.append(Patient.mrn.ilike(f"%{search_params['mrn']}%"))
@@ -145,9 +316,8 @@ class PatientService:
             
             # Advanced: JSONB filters for metadata
             if 'metadata' in search_params and isinstance(search_params['metadata'], dict):
-                for key, value in search_params['metadata'].items():
-                    # Add a filter for each metadata field
-                    filters.append(Patient.metadata[key].astext == str(value))
+                # A single containment test (@>) that the jsonb_path_ops GIN index can answer
+                filters.append(Patient.patient_metadata.contains(search_params['metadata']))
             
             # Date range filters
             if 'created_after' in search_params:
@@ -166,102 +336,103 @@ class PatientService:
             if filters:
                 query = query.filter(and_(*filters))
         
-        # Get total count before pagination for metadata
-        total_count = query.count()
+        return query
+    
+    @staticmethod
+    def _keyset_sort(params: Dict) -> Tuple[Any, bool]:
+        """Resolve sort_by/sort_dir into (column, ascending) for keyset pagination."""
+        sort_field = params.get('sort_by', 'last_name')
         
-        # Apply sorting
-        sort_field = search_params.get('sort_by', 'last_name')
-        sort_dir = search_params.get('sort_dir', 'asc')
+        # Nullable or non-column sort fields cannot be used as a keyset; fall back to last_name, asc
+        if sort_field not in KEYSET_SORT_FIELDS:
+            return Patient.last_name, True
         
-        # Validate sort field exists on Patient model
-        if hasattr(Patient, sort_field):
-            sort_attr = getattr(Patient, sort_field)
-            query = query.order_by(asc(sort_attr) if sort_dir == 'asc' else desc(sort_attr))
-        else:
-            # Default to last_name, asc if invalid sort field
-            query = query.order_by(Patient.last_name)
-        
-        # Apply pagination
-        query = query.offset((page - 1) * page_size).limit(page_size)
+        return getattr(Patient, sort_field), params.get('sort_dir', 'asc') == 'asc'
+    
+    @staticmethod
+    def _apply_keyset(query, sort_column, id_column, ascending: bool, cursor: Optional[str], page_size: int):
+        """
+        Order by (sort_column, id_column) and resume after the row encoded in the cursor.
+        Fetches one extra row so _next_page can tell whether another page exists without a COUNT.
+        """
+        if cursor:
+            position = tuple_(sort_column, id_column)
+            last_seen = decode_cursor(cursor, sort_column)
+            query = query.filter(position > last_seen if ascending else position < last_seen)
         
-        # Execute query
-        patients = query.all()
+        if ascending:
+            query = query.order_by(asc(sort_column), asc(id_column))
+        else:
+            query = query.order_by(desc(sort_column), desc(id_column))
         
-        return patients, total_count
+        return query.limit(page_size + 1)
     
     @staticmethod
-    def get_all_patients(db_session: Session, page: int = 1, page_size: int = 20, include_inactive: bool = False) -> Tuple[List[Patient], int]:
-        """Get all patients with pagination."""
-        query = db_session.query(Patient)
-        
-        if not include_inactive:
-            query = query.filter(Patient.is_active == True)
+    def _next_page(rows: List, page_size: int, sort_key: str) -> Tuple[List, Optional[str]]:
+        """Drop the extra row fetched by _apply_keyset and return (rows, next_cursor)."""
+        if len(rows) <= page_size:
+            return rows, None
         
-        total_count = query.count()
+        rows = rows[:page_size]
+        last = rows[-1]
+        if isinstance(last, RowMapping):
+            return rows, encode_cursor(last[sort_key], last['id'])
+        return rows, encode_cursor(getattr(last, sort_key), last.id)
+    
+    @staticmethod
+    def get_all_patients(db_session: Session, page: int = 1, page_size: int = 20, include_inactive: bool = False) -> Tuple[List[RowMapping], bool]:
+        """
+        Get all patients with pagination.
+        Returns a tuple of (patient summary rows, has_next); use count_patients for the total.
+        """
+        query = PatientService._summary_query(PatientService._patients_query(db_session, {}, include_inactive))
         
-        patients = query.order_by(Patient.last_name).offset((page - 1) * page_size).limit(page_size).all()
+        # One extra row tells whether a next page exists without a COUNT
+        rows = query.order_by(Patient.last_name).offset((page - 1) * page_size).limit(page_size + 1).all()
+        patients = [row._mapping for row in rows]
         
-        return patients, total_count
+        return patients[:page_size], len(patients) > page_size
     
     @staticmethod
     def add_allergy(db_session: Session, patient_id: str, allergy_data: Dict) -> Optional[Allergy]:
         """Add an allergy to a patient."""
-        try:
-            patient_uuid = uuid.UUID(patient_id)
-            patient = db_session.query(Patient).filter(Patient.id == patient_uuid).first()
-            
-            if not patient:
-                return None
-            
-            allergy = Allergy(**allergy_data)
-            db_session.add(allergy)
-            
-            patient.allergies.append(allergy)
-            db_session.commit()
-            
-            return allergy
-        except ValueError:
-            return None
+        return PatientService._add_linked(db_session, patient_id, Allergy(**allergy_data), patient_allergies, 'allergy_id')
     
     @staticmethod
     def add_condition(db_session: Session, patient_id: str, condition_data: Dict) -> Optional[Condition]:
         """Add a medical condition to a patient."""
-        try:
-            patient_uuid = uuid.UUID(patient_id)
-            patient = db_session.query(Patient).filter(Patient.id == patient_uuid).first()
-            
-            if not patient:
-                return None
-            
-            condition = Condition(**condition_data)
-            db_session.add(condition)
-            
-            patient.conditions.append(condition)
-            db_session.commit()
-            
-            return condition
-        except ValueError:
-            return None
+        return PatientService._add_linked(db_session, patient_id, Condition(**condition_data), patient_conditions, 'condition_id')
     
     @staticmethod
     def add_medication(db_session: Session, patient_id: str, medication_data: Dict) -> Optional[Medication]:
         """Add a medication to a patient."""
+        return PatientService._add_linked(db_session, patient_id, Medication(**medication_data), patient_medications, 'medication_id')
+    
+    @staticmethod
+    def _add_linked(db_session: Session, patient_id: str, child, association, child_id_key: str):
+        """
+        Insert a many-to-many child row and link it to the patient through the association table.
+        Returns None if the patient does not exist; the patient's existing collection is never loaded.
+        """
         try:
             patient_uuid = uuid.UUID(patient_id)
-            patient = db_session.query(Patient).filter(Patient.id == patient_uuid).first()
-            
-            if not patient:
-                return None
-            
-            medication = Medication(**medication_data)
-            db_session.add(medication)
-            
-            patient.medications.append(medication)
-            db_session.commit()
-            
-            return medication
         except ValueError:
             return None
+        
+        # Checks the patient exists and bumps updated_at (so its ETag changes) in one statement
+        touched = db_session.execute(
+            update(Patient).where(Patient.id == patient_uuid).values(updated_at=UTC_NOW).returning(Patient.id)
+        ).first()
+        if touched is None:
+            return None
+        
+        # Flush so the child row exists before the association row references it
+        db_session.add(child)
+        db_session.flush()
+        db_session.execute(association.insert().values({'patient_id': patient_uuid, child_id_key: child.id}))
+        db_session.commit()
+        
+        return child
     
     @staticmethod
     def add_lab_result(db_session: Session, patient_id: str, lab_result_data: Dict) -> Optional[LabResult]:
@@ -269,7 +440,7 @@ class PatientService:
         try:
             patient_uuid = uuid.UUID(patient_id)
             # Ensure the patient exists
-            patient = db_session.query(Patient).filter(Patient.id == patient_uuid).first()
+            patient = db_session.get(Patient, patient_uuid)
             
             if not patient:
                 return None
@@ -290,62 +461,245 @@ class PatientService:
         """Add a visit/encounter to a patient."""
         try:
             patient_uuid = uuid.UUID(patient_id)
-            # Ensure the patient exists
-            patient = db_session.query(Patient).filter(Patient.id == patient_uuid).first()
-            
-            if not patient:
-                return None
-            
-            # Add patient_id to the visit data
-            visit_data['patient_id'] = patient_uuid
-            
-            visit = Visit(**visit_data)
-            db_session.add(visit)
-            db_session.commit()
-            
-            # Update the patient's last visit date
-            patient.last_visit_date = visit.visit_date
-            db_session.commit()
-            
-            return visit
         except ValueError:
             return None
+        
+        # Checks the patient exists and updates its last visit date in one statement. GREATEST skips
+        # NULLs and keeps the later date, so back-dated or concurrent visits never move it backwards
+        touched = db_session.execute(
+            update(Patient)
+            .where(Patient.id == patient_uuid)
+            .values(last_visit_date=func.greatest(Patient.last_visit_date, visit_data['visit_date']), updated_at=UTC_NOW)
+            .returning(Patient.id)
+        ).first()
+        if touched is None:
+            return None
+        
+        # Add patient_id to the visit data
+        visit_data['patient_id'] = patient_uuid
+        
+        visit = Visit(**visit_data)
+        db_session.add(visit)
+        db_session.commit()
+        
+        return visit
     
     @staticmethod
-    def get_patient_lab_results(db_session: Session, patient_id: str, page: int = 1, page_size: int = 20) -> Tuple[List[LabResult], int]:
-        """Get lab results for a patient with pagination."""
+    def get_patient_lab_results(db_session: Session, patient_id: str, page: int = 1, page_size: int = 20) -> Tuple[List[RowMapping], bool]:
+        """
+        Get lab results for a patient with pagination, newest first, as a tuple of (lab results, has_next).
+        Rows are returned as Core row mappings (see LabResult.row_to_dict) rather than ORM objects.
+        """
         try:
             patient_uuid = uuid.UUID(patient_id)
             
-            query = db_session.query(LabResult).filter(LabResult.patient_id == patient_uuid)
-            total_count = query.count()
-            
-            lab_results = query.order_by(desc(LabResult.test_date)).offset((page - 1) * page_size).limit(page_size).all()
+            lab_results_table = LabResult.__table__
+            lab_results = db_session.execute(
+                select(lab_results_table)
+                .where(lab_results_table.c.patient_id == patient_uuid)
+                .order_by(desc(lab_results_table.c.test_date), desc(lab_results_table.c.id))
+                .offset((page - 1) * page_size)
+                .limit(page_size + 1)
+            ).mappings().all()
             
-            return lab_results, total_count
+            return lab_results[:page_size], len(lab_results) > page_size
         except ValueError:
-            return [], 0
+            return [], False
     
     @staticmethod
-    def get_patient_visits(db_session: Session, patient_id: str, page: int = 1, page_size: int = 20) -> Tuple[List[Visit], int]:
-        """Get visits for a patient with pagination."""
+    def count_lab_results(db_session: Session, patient_id: str) -> int:
+        """Count a patient's lab results (cached briefly in Redis)."""
+        try:
+            patient_uuid = uuid.UUID(patient_id)
+        except ValueError:
+            return 0
+        
+        query = db_session.query(LabResult).filter(LabResult.patient_id == patient_uuid)
+        return PatientService._cached_count('lab_results', {'patient_id': str(patient_uuid)}, query)
+    
+    @staticmethod
+    def get_patient_visits(db_session: Session, patient_id: str, page: int = 1, page_size: int = 20) -> Tuple[List[RowMapping], bool]:
+        """
+        Get visits for a patient with pagination, newest first, as a tuple of (visits, has_next).
+        Rows are returned as Core row mappings (see Visit.row_to_dict) rather than ORM objects.
+        """
         try:
             patient_uuid = uuid.UUID(patient_id)
             
-            query = db_session.query(Visit).filter(Visit.patient_id == patient_uuid)
-            total_count = query.count()
-            
-            visits = query.order_by(desc(Visit.visit_date)).offset((page - 1) * page_size).limit(page_size).all()
+            visits_table = Visit.__table__
+            visits = db_session.execute(
+                select(visits_table)
+                .where(visits_table.c.patient_id == patient_uuid)
+                .order_by(desc(visits_table.c.visit_date), desc(visits_table.c.id))
+                .offset((page - 1) * page_size)
+                .limit(page_size + 1)
+            ).mappings().all()
             
-            return visits, total_count
+            return visits[:page_size], len(visits) > page_size
+        except ValueError:
+            return [], False
+    
+    @staticmethod
+    def count_visits(db_session: Session, patient_id: str) -> int:
+        """Count a patient's visits (cached briefly in Redis)."""
+        try:
+            patient_uuid = uuid.UUID(patient_id)
+        except ValueError:
+            return 0
+        
+        query = db_session.query(Visit).filter(Visit.patient_id == patient_uuid)
+        return PatientService._cached_count('visits', {'patient_id': str(patient_uuid)}, query)
+    
+    @staticmethod
+    def get_patient_lab_results_after(db_session: Session, patient_id: str, cursor: Optional[str],
+                                      page_size: int = 20) -> Tuple[List[RowMapping], Optional[str]]:
+        """
+        Keyset-paginated counterpart of get_patient_lab_results, newest first.
+        Returns a tuple of (lab results, next_cursor).
+        """
+        try:
+            patient_uuid = uuid.UUID(patient_id)
         except ValueError:
-            return [], 0
+            return [], None
+        
+        lab_results_table = LabResult.__table__
+        stmt = PatientService._apply_keyset(
+            select(lab_results_table).where(lab_results_table.c.patient_id == patient_uuid),
+            lab_results_table.c.test_date, lab_results_table.c.id, False, cursor, page_size
+        )
+        
+        return PatientService._next_page(db_session.execute(stmt).mappings().all(), page_size, 'test_date')
+    
+    @staticmethod
+    def get_patient_visits_after(db_session: Session, patient_id: str, cursor: Optional[str],
+                                 page_size: int = 20) -> Tuple[List[RowMapping], Optional[str]]:
+        """
+        Keyset-paginated counterpart of get_patient_visits, newest first.
+        Returns a tuple of (visits, next_cursor).
+        """
+        try:
+            patient_uuid = uuid.UUID(patient_id)
+        except ValueError:
+            return [], None
+        
+        visits_table = Visit.__table__
+        stmt = PatientService._apply_keyset(
+            select(visits_table).where(visits_table.c.patient_id == patient_uuid),
+            visits_table.c.visit_date, visits_table.c.id, False, cursor, page_size
+        )
+        
+        return PatientService._next_page(db_session.execute(stmt).mappings().all(), page_size, 'visit_date')
+    
+    @staticmethod
+    def get_recent_lab_results(db_session: Session, patient_ids: List[str], per_patient: int) -> Dict[str, List[RowMapping]]:
+        """Get the newest lab results of several patients at once, as {patient_id: [lab results]}."""
+        return PatientService._recent_rows(db_session, LabResult.__table__, 'test_date', patient_ids, per_patient)
+    
+    @staticmethod
+    def get_recent_visits(db_session: Session, patient_ids: List[str], per_patient: int) -> Dict[str, List[RowMapping]]:
+        """Get the newest visits of several patients at once, as {patient_id: [visits]}."""
+        return PatientService._recent_rows(db_session, Visit.__table__, 'visit_date', patient_ids, per_patient)
     
     @staticmethod
-    def advanced_search(db_session: Session, query_params: Dict, page: int = 1, page_size: int = 20) -> Tuple[List[Patient], int]:
+    def _recent_rows(db_session: Session, table, date_key: str, patient_ids: List[str], per_patient: int) -> Dict[str, List[RowMapping]]:
+        """
+        Fetch up to per_patient newest rows of a per-patient table for each patient with one windowed query.
+        Every valid requested ID is a key of the result; IDs that are not UUIDs are ignored.
+        """
+        patient_uuids = []
+        for patient_id in patient_ids:
+            try:
+                patient_uuids.append(uuid.UUID(patient_id))
+            except ValueError:
+                continue
+        
+        recent = {str(patient_uuid): [] for patient_uuid in patient_uuids}
+        if not patient_uuids:
+            return recent
+        
+        # Number each patient's rows newest first (same order as the per-patient listing) and keep the top ones
+        rank = func.row_number().over(
+            partition_by=table.c.patient_id,
+            order_by=(desc(table.c[date_key]), desc(table.c.id))
+        ).label('rank')
+        ranked = select(table, rank).where(table.c.patient_id.in_(patient_uuids)).subquery()
+        rows = db_session.execute(
+            select(*(ranked.c[column.key] for column in table.columns))
+            .where(ranked.c.rank <= per_patient)
+            .order_by(ranked.c.patient_id, ranked.c.rank)
+        ).mappings().all()
+        
+        for row in rows:
+            recent[str(row['patient_id'])].append(row)
+        
+        return recent
+    
+    @staticmethod
+    def advanced_search(db_session: Session, query_params: Dict, page: int = 1, page_size: int = 20) -> Tuple[List[RowMapping], bool]:
         """
         Advanced search with complex conditions and full-text search capabilities.
         Uses PostgreSQL-specific features for optimized searching.
+        Returns a tuple of (patient summary rows, has_next); use count_advanced_search for the total.
+        """
+        query = PatientService._summary_query(PatientService._advanced_search_query(db_session, query_params))
+        
+        # Apply sorting
+        sort_field = query_params.get('sort_by', 'last_name')
+        sort_dir = query_params.get('sort_dir', 'asc')
+        
+        if hasattr(Patient, sort_field):
+            sort_attr = getattr(Patient, sort_field)
+            query = query.order_by(asc(sort_attr) if sort_dir == 'asc' else desc(sort_attr))
+        else:
+            query = query.order_by(Patient.last_name)
+        
+        # Apply pagination, fetching one extra row to detect a next page without a COUNT
+        query = query.offset((page - 1) * page_size).limit(page_size + 1)
+        
+        # Execute query
+        patients = [row._mapping for row in query.all()]
+        
+        return patients[:page_size], len(patients) > page_size
+    
+    @staticmethod
+    def advanced_search_after(db_session: Session, query_params: Dict, cursor: Optional[str],
+                              page_size: int = 20) -> Tuple[List[RowMapping], Optional[str]]:
+        """
+        Keyset-paginated counterpart of advanced_search.
+        Returns a tuple of (patient summary rows, next_cursor).
+        """
+        sort_column, ascending = PatientService._keyset_sort(query_params)
+        query = PatientService._summary_query(PatientService._advanced_search_query(db_session, query_params), sort_column)
+        query = PatientService._apply_keyset(query, sort_column, Patient.id, ascending, cursor, page_size)
+        
+        return PatientService._next_page([row._mapping for row in query.all()], page_size, sort_column.key)
+    
+    @staticmethod
+    def count_advanced_search(db_session: Session, query_params: Dict) -> int:
+        """Count the patients matched by advanced_search (cached briefly in Redis)."""
+        query = PatientService._advanced_search_query(db_session, query_params)
+        return PatientService._cached_count('patients:advanced', query_params, query)
+    
+    @staticmethod
+    def _has_named(association, related_id_column, related_model, names: List[str]):
+        """
+        EXISTS semi-join: the patient is linked through the association table to a related row with one of the names.
+        Each patient is matched at most once however many related rows match, so the filter never fans out.
+        """
+        return (
+            select(association.c.patient_id)
+            .join(related_model, related_model.id == related_id_column)
+            .where(association.c.patient_id == Patient.id, related_model.name.in_(names))
+            .exists()
+        )
+    
+    @staticmethod
+    def _advanced_search_query(db_session: Session, query_params: Dict):
+        """
+        Build the filtered (unsorted, unpaginated) patient query for advanced_search.
+        Parameters must have passed validate_advanced_search: every filter is on an indexed column and each
+        name list holds at most MAX_SEARCH_LIST_VALUES entries, so a page costs one patient scan plus a bounded
+        index probe per filter, whatever the size of the related tables.
         """
         # Start with a base query
         query = db_session.query(Patient)
@@ -353,67 +707,38 @@ class PatientService:
         # Full-text search if search_text is provided
         if 'search_text' in query_params and query_params['search_text']:
             search_term = query_params['search_text']
-            # Use PostgreSQL's to_tsquery for full-text search
-            text_search = func.to_tsvector('english', 
-                func.coalesce(Patient.first_name, '') + ' ' + 
-                func.coalesce(Patient.last_name, '') + ' ' + 
-                func.coalesce(Patient.mrn, '') + ' ' + 
-                func.coalesce(Patient.address_line1, '') + ' ' + 
-                func.coalesce(Patient.city, '') + ' ' + 
-                func.coalesce(Patient.state, '')
-            ).op('@@')(func.plainto_tsquery('english', search_term))
+            # search_vector is precomputed and GIN-indexed, so no per-row to_tsvector() at query time
+            text_search = Patient.search_vector.op('@@')(func.plainto_tsquery('english', search_term))
             
             query = query.filter(text_search)
         
         # Age range search
-        if 'min_age' in query_params and 'max_age' in query_params:
-            min_age = int(query_params['min_age'])
-            max_age = int(query_params['max_age'])
-            
-            # Calculate date ranges for the ages
-            min_date = datetime.now().date().replace(year=datetime.now().year - max_age - 1)
-            max_date = datetime.now().date().replace(year=datetime.now().year - min_age)
-            
-            query = query.filter(Patient.date_of_birth.between(min_date, max_date))
+        # Birthday cut-offs are computed by PostgreSQL (interval arithmetic handles Feb 29) as plain
+        # dates, so the date_of_birth index serves the range
+        if 'min_age' in query_params:
+            # At least min_age: born on or before today minus min_age years
+            latest_birth_date = cast(func.current_date() - func.make_interval(int(query_params['min_age'])), Date)
+            query = query.filter(Patient.date_of_birth <= latest_birth_date)
+        
+        if 'max_age' in query_params:
+            # At most max_age: born after today minus max_age + 1 years
+            earliest_birth_date = cast(func.current_date() - func.make_interval(int(query_params['max_age']) + 1), Date)
+            query = query.filter(Patient.date_of_birth > earliest_birth_date)
         
         # Filter by conditions (if the patient has any of the specified conditions)
         if 'conditions' in query_params and query_params['conditions']:
             condition_list = query_params['conditions'].split(',')
-            condition_subquery = db_session.query(Patient.id).join(
-                patient_conditions, Patient.id == patient_conditions.c.patient_id
-            ).join(
-                Condition, Condition.id == patient_conditions.c.condition_id
-            ).filter(
-                Condition.name.in_(condition_list)
-            ).subquery()
-            
-            query = query.filter(Patient.id.in_(condition_subquery))
+            query = query.filter(PatientService._has_named(patient_conditions, patient_conditions.c.condition_id, Condition, condition_list))
         
         # Filter by medications
         if 'medications' in query_params and query_params['medications']:
             medication_list = query_params['medications'].split(',')
-            medication_subquery = db_session.query(Patient.id).join(
-                patient_medications, Patient.id == patient_medications.c.patient_id
-            ).join(
-                Medication, Medication.id == patient_medications.c.medication_id
-            ).filter(
-                Medication.name.in_(medication_list)
-            ).subquery()
-            
-            query = query.filter(Patient.id.in_(medication_subquery))
+            query = query.filter(PatientService._has_named(patient_medications, patient_medications.c.medication_id, Medication, medication_list))
         
         # Filter by allergies
         if 'allergies' in query_params and query_params['allergies']:
             allergy_list = query_params['allergies'].split(',')
-            allergy_subquery = db_session.query(Patient.id).join(
-                patient_allergies, Patient.id == patient_allergies.c.patient_id
-            ).join(
-                Allergy, Allergy.id == patient_allergies.c.allergy_id
-            ).filter(
-                Allergy.name.in_(allergy_list)
-            ).subquery()
-            
-            query = query.filter(Patient.id.in_(allergy_subquery))
+            query = query.filter(PatientService._has_named(patient_allergies, patient_allergies.c.allergy_id, Allergy, allergy_list))
         
         # Filter by last visit date range
         if 'last_visit_after' in query_params:
@@ -424,26 +749,7 @@ class PatientService:
         
         # Add more complex filters as needed
         
-        # Get total count for pagination metadata
-        total_count = query.count()
-        
-        # Apply sorting
-        sort_field = query_params.get('sort_by', 'last_name')
-        sort_dir = query_params.get('sort_dir', 'asc')
-        
-        if hasattr(Patient, sort_field):
-            sort_attr = getattr(Patient, sort_field)
-            query = query.order_by(asc(sort_attr) if sort_dir == 'asc' else desc(sort_attr))
-        else:
-            query = query.order_by(Patient.last_name)
-        
-        # Apply pagination
-        query = query.offset((page - 1) * page_size).limit(page_size)
-        
-        # Execute query
-        patients = query.all()
-        
-        return patients, total_count
+        return query
     
     @staticmethod
     def _generate_mrn() -> str:
@@ -451,36 +757,54 @@ class PatientService:
         # This is a simplified example - in production, follow your organization's MRN format
         # and ensure uniqueness
         timestamp = datetime.utcnow().strftime('%Y%m%d')
-        random_suffix = str(uuid.uuid4())[:4]
+        # 7 hex digits (~268M values a day) fill the 20-character mrn column
+        random_suffix = uuid.uuid4().hex[:7]
         return f"MRN-{timestamp}-{random_suffix}"
     
     @staticmethod
-    def bulk_import_patients(db_session: Session, patients_data: List[Dict]) -> Tuple[int, List[str]]:
+    def bulk_import_patients(db_session: Session, patients_data: List[Dict], start_index: int = 0) -> Tuple[int, List[str]]:
         """
-        Bulk import patients from a list of patient data dictionaries.
+        Bulk import validated patient data dictionaries with a single multi-row INSERT, committed on its own.
+        Records whose MRN already exists (or repeats within the batch) are skipped and reported; start_index offsets the reported indexes
+        when patients_data is one batch of a larger import.
         Returns a tuple of (number of successful imports, list of errors).
         """
-        successful_imports = 0
         errors = []
         
+        # MRNs already in the database are skipped by the INSERT itself; this only catches repeats within the batch
+        taken_mrns = set()
+        
+        rows = []
+        row_indexes = []
         for i, patient_data in enumerate(patients_data):
-            try:
+            mrn = patient_data.get('mrn')
+            if not mrn:
                 # Generate MRN if not provided
-                if not patient_data.get('mrn'):
-                    patient_data['mrn'] = PatientService._generate_mrn()
-                
-                patient = Patient(**patient_data)
-                db_session.add(patient)
-                successful_imports += 1
-            except Exception as e:
-                errors.append(f"Error importing patient at index {i}: {str(e)}")
-        
-        # Commit all successful imports
+                patient_data['mrn'] = PatientService._generate_mrn()
+            elif mrn in taken_mrns:
+                errors.append(f"Error importing patient at index {start_index + i}: MRN {mrn} appears more than once")
+                continue
+            else:
+                taken_mrns.add(mrn)
+            rows.append(patient_data)
+            row_indexes.append(i)
+        
+        if not rows:
+            return 0, errors
+        
+        # ORM bulk INSERT: applies column defaults and batches rows into multi-row VALUES statements;
+        # ON CONFLICT skips rows whose MRN is already taken and RETURNING reports the ones inserted
+        stmt = pg_insert(Patient).on_conflict_do_nothing(index_elements=[Patient.mrn]).returning(Patient.mrn)
         try:
+            inserted_mrns = set(db_session.scalars(stmt, rows))
             db_session.commit()
         except Exception as e:
             db_session.rollback()
             errors.append(f"Transaction failed: {str(e)}")
             return 0, errors
         
-        return successful_imports, errors
\ No newline at end of file
+        for i, patient_data in zip(row_indexes, rows):
+            if patient_data['mrn'] not in inserted_mrns:
+                errors.append(f"Error importing patient at index {start_index + i}: MRN {patient_data['mrn']} already exists")
+        
+        return len(inserted_mrns), errors
@@ -1,11 +1,23 @@
-from sqlalchemy import create_engine, event, inspect, text
+from contextlib import contextmanager
+import re
+from sqlalchemy import bindparam, create_engine, event, inspect, text
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.pool import QueuePool
+from sqlalchemy.schema import CreateIndex
 import time
 import logging
 
 from ..config import app_config
-from ..models.patient import Base
+from ..models.patient import (
+    Base, FULL_NAME_EXPRESSION, SEARCH_VECTOR_EXPRESSION,
+    patient_allergies, patient_conditions, patient_medications
+)
+
+# Advisory lock key serializing startup DDL across workers (see schema_lock)
+SCHEMA_LOCK_KEY = 727106
+
+# patients columns stored through IntCodedEnum; older databases have them as PostgreSQL ENUMs
+ENUM_CODED_COLUMNS = ('gender', 'blood_type')
 
 # Create the database engine with connection pooling
 engine = create_engine(
@@ -15,6 +27,18 @@ engine = create_engine(
     max_overflow=app_config.DB_MAX_OVERFLOW,
     pool_timeout=app_config.DB_POOL_TIMEOUT,
     pool_recycle=app_config.DB_POOL_RECYCLE,
+    pool_pre_ping=app_config.DB_POOL_PRE_PING,
+    # The filter combinations of the search endpoints produce many distinct statements;
+    # keep them all compiled instead of evicting from the default 500-entry cache
+    query_cache_size=app_config.DB_QUERY_CACHE_SIZE,
+    # Session settings sent in the connection startup packet, so they cost no extra round trip
+    connect_args={
+        "options": (
+            f"-c jit={'on' if app_config.DB_JIT else 'off'} "
+            f"-c statement_timeout={app_config.DB_STATEMENT_TIMEOUT_MS} "
+            f"-c work_mem={app_config.DB_WORK_MEM}"
+        )
+    },
     echo=app_config.SQLALCHEMY_ECHO
 )
 
@@ -39,64 +63,131 @@ session_factory = sessionmaker(bind=engine)
 # This returns the same Session object for the same thread
 Session = scoped_session(session_factory)
 
-def handle_enum_types():
-    """Handle PostgreSQL enum types that may already exist."""
-    from ..models.patient import Gender, BloodType
-    import psycopg2
-    from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
-    
-    # Connect directly to the database to check and handle enum types
-    try:
-        conn = psycopg2.connect(
-            host=app_config.DB_HOST,
-            database=app_config.DB_NAME,
-            user=app_config.DB_USER,
-            password=app_config.DB_PASSWORD,
-            port=app_config.DB_PORT
-        )
-        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-        cursor = conn.cursor()
-        
-        # Check if the gender enum exists
-        cursor.execute("SELECT EXISTS(SELECT 1 FROM pg_type WHERE typname = 'gender')")
-        gender_exists = cursor.fetchone()[0]
-        
-        if gender_exists:
-            # Get the current enum values
-            cursor.execute("SELECT enum_range(NULL::gender)")
-            current_values = cursor.fetchone()[0]
-            logging.info(f"Existing gender enum values: {current_values}")
-            
-            # If we need to update the enum type values to match our model, we would do that here
-            # For now, we'll just modify our model to match the database
-            # This is done in the model definition
-        
-        # Check if bloodtype enum exists
-        cursor.execute("SELECT EXISTS(SELECT 1 FROM pg_type WHERE typname = 'bloodtype')")
-        bloodtype_exists = cursor.fetchone()[0]
-        
-        if bloodtype_exists:
-            # Get the current enum values
-            cursor.execute("SELECT enum_range(NULL::bloodtype)")
-            current_values = cursor.fetchone()[0]
-            logging.info(f"Existing bloodtype enum values: {current_values}")
-        
-        cursor.close()
-        conn.close()
-        
-    except Exception as e:
-        logging.error(f"Error handling enum types: {str(e)}")
-
 def init_db():
     """Initialize the database schema."""
     inspector = inspect(engine)
     existing_tables = inspector.get_table_names()
     
-    # First, handle any PostgreSQL enum types
-    handle_enum_types()
+    with engine.begin() as connection:
+        # Trigram operator classes back the patient name search index
+        connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
     
     # Create all tables that don't exist with checkfirst=True
     Base.metadata.create_all(engine, checkfirst=True)
+    
+    # create_all does not alter existing tables; add the generated search columns if missing
+    if 'patients' in existing_tables:
+        with engine.begin() as connection:
+            # Adding a stored generated column rewrites the table, which can outlast DB_STATEMENT_TIMEOUT_MS
+            connection.execute(text("SET LOCAL statement_timeout = 0"))
+            connection.execute(text(
+                "ALTER TABLE patients ADD COLUMN IF NOT EXISTS full_name VARCHAR(201) "
+                f"GENERATED ALWAYS AS ({FULL_NAME_EXPRESSION}) STORED"
+            ))
+            connection.execute(text(
+                "ALTER TABLE patients ADD COLUMN IF NOT EXISTS search_vector TSVECTOR "
+                f"GENERATED ALWAYS AS ({SEARCH_VECTOR_EXPRESSION}) STORED"
+            ))
+            # Gender/blood type moved from PostgreSQL ENUM columns to SMALLINT codes
+            _convert_enum_columns(connection)
+    
+    # The association tables gained a composite primary key and cascading foreign keys
+    with engine.begin() as connection:
+        connection.execute(text("SET LOCAL statement_timeout = 0"))
+        for table in (patient_allergies, patient_conditions, patient_medications):
+            if table.name in existing_tables:
+                _migrate_association_table(connection, table)
+    
+    # Timestamps used to be filled in by Python; make sure existing tables carry the server defaults
+    with engine.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if table.name not in existing_tables:
+                continue
+            for column in ('created_at', 'updated_at'):
+                if column in table.c:
+                    connection.execute(text(
+                        f"ALTER TABLE {table.name} ALTER COLUMN {column} SET DEFAULT timezone('utc', now())"
+                    ))
+    
+    # IntCodedEnum cannot read enum labels; refuse to start rather than fail on every patient query
+    with engine.connect() as connection:
+        enum_columns = connection.execute(
+            text(
+                "SELECT column_name, udt_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = 'patients' "
+                "AND column_name IN :columns AND data_type = 'USER-DEFINED'"
+            ).bindparams(bindparam("columns", expanding=True)),
+            {"columns": list(ENUM_CODED_COLUMNS)}
+        ).all()
+        if enum_columns:
+            raise RuntimeError(
+                "patients columns still use PostgreSQL enum types: "
+                + ", ".join(f"{name} ({udt})" for name, udt in enum_columns)
+            )
+
+def _convert_enum_columns(connection):
+    """
+    Convert patients columns still typed as the PostgreSQL ENUMs that Enum(Gender)/Enum(BloodType)
+    used to create into the SMALLINT codes IntCodedEnum reads, then drop the unused enum types.
+    """
+    patients = Base.metadata.tables['patients']
+    for column in ENUM_CODED_COLUMNS:
+        udt_name = connection.execute(
+            text(
+                "SELECT udt_name FROM information_schema.columns "
+                "WHERE table_schema = current_schema() AND table_name = 'patients' "
+                "AND column_name = :column AND data_type = 'USER-DEFINED'"
+            ),
+            {"column": column}
+        ).scalar()
+        if udt_name is None:
+            continue
+        
+        # Enum(...) stored member names; accept values too. Codes follow definition order,
+        # as in IntCodedEnum. An unknown label maps to NULL and fails the NOT NULL on gender.
+        cases = " ".join(
+            f"WHEN '{label}' THEN {code}"
+            for code, member in enumerate(patients.c[column].type.enum_class)
+            for label in dict.fromkeys((member.name, member.value))
+        )
+        logging.info("Converting patients.%s from enum type %s to smallint codes", column, udt_name)
+        connection.execute(text(f"ALTER TABLE patients ALTER COLUMN {column} DROP DEFAULT"))
+        connection.execute(text(
+            f"ALTER TABLE patients ALTER COLUMN {column} TYPE SMALLINT "
+            f"USING CASE {column}::text {cases} END"
+        ))
+        connection.execute(text(f'DROP TYPE IF EXISTS "{udt_name}"'))
+
+def _migrate_association_table(connection, table):
+    """
+    Bring an association table created before the composite primary key up to the model:
+    drop duplicate links, add the primary key and make its foreign keys cascade on delete.
+    """
+    db_inspector = inspect(connection)
+    key_columns = [c.name for c in table.primary_key.columns]
+    
+    if not db_inspector.get_pk_constraint(table.name).get('constrained_columns'):
+        # Rows that would violate the primary key: NULL halves and repeated pairs
+        connection.execute(text(
+            f"DELETE FROM {table.name} WHERE " + " OR ".join(f"{c} IS NULL" for c in key_columns)
+        ))
+        connection.execute(text(
+            f"DELETE FROM {table.name} a USING {table.name} b WHERE a.ctid < b.ctid AND "
+            + " AND ".join(f"a.{c} = b.{c}" for c in key_columns)
+        ))
+        connection.execute(text(
+            f"ALTER TABLE {table.name} ADD PRIMARY KEY ({', '.join(key_columns)})"
+        ))
+    
+    for fk in db_inspector.get_foreign_keys(table.name):
+        if (fk.get('options') or {}).get('ondelete', '').upper() == 'CASCADE':
+            continue
+        column = fk['constrained_columns'][0]
+        referenced = next(iter(table.c[column].foreign_keys)).column
+        connection.execute(text(
+            f'ALTER TABLE {table.name} DROP CONSTRAINT "{fk["name"]}", '
+            f"ADD FOREIGN KEY ({column}) REFERENCES {referenced.table.name} ({referenced.name}) ON DELETE CASCADE"
+        ))
 
 def get_db_session():
     """Get a database session."""
@@ -116,33 +207,63 @@ def ensure_indexes():
     Ensure that the necessary database indexes exist.
     This should be run during application startup.
     """
-    # This function would programmatically create indexes that aren't
-    # defined in the models, but are needed for performance.
-    # For PostgreSQL, you can use the following pattern:
-    connection = engine.connect()
-    try:
-        # Example: Index for patient search by name
-        connection.execute(
-            text("CREATE INDEX IF NOT EXISTS idx_patient_name ON patients ((lower(first_name) || ' ' || lower(last_name)));")
-        )
-        
-        # Example: Index for text search
-        connection.execute(
-            text("""
-            CREATE INDEX IF NOT EXISTS idx_patient_text_search 
-            ON patients USING gin(to_tsvector('english', 
-                coalesce(first_name,'') || ' ' || 
-                coalesce(last_name,'') || ' ' || 
-                coalesce(mrn,'')));
-            """)
-        )
-        
-        # Example: Partial index for active patients (if you frequently query only active patients)
-        connection.execute(
-            text("CREATE INDEX IF NOT EXISTS idx_active_patients ON patients (id) WHERE is_active = TRUE;")
-        )
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block, and building an index
+    # on a populated table can outlast DB_STATEMENT_TIMEOUT_MS
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("SET statement_timeout = 0"))
+        try:
+            # Indexes declared on the models are only created by create_all() for new tables,
+            # so create any that are missing on existing tables as well
+            for table in Base.metadata.sorted_tables:
+                for index in table.indexes:
+                    try:
+                        _create_index_concurrently(connection, index)
+                    except Exception as e:
+                        print(f"Error creating index {index.name}: {e}")
+            
+            # Superseded by the (patient_id, date, id) indexes, which also cover the id tie-breaker
+            connection.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_labresults_patient_date;"))
+            connection.execute(text("DROP INDEX CONCURRENTLY IF EXISTS ix_visits_patient_date;"))
+            # Superseded by ix_patients_search_vector on the generated search_vector column
+            connection.execute(text("DROP INDEX CONCURRENTLY IF EXISTS idx_patient_text_search;"))
+            
+            # Example: Index for patient search by name
+            connection.execute(
+                text("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_patient_name ON patients ((lower(first_name) || ' ' || lower(last_name)));")
+            )
+            
+            # Example: Partial index for active patients (if you frequently query only active patients)
+            connection.execute(
+                text("CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_active_patients ON patients (id) WHERE is_active = TRUE;")
+            )
+        except Exception as e:
+            print(f"Error creating indexes: {e}")
+        finally:
+            connection.execute(text("RESET statement_timeout"))
+
+def _create_index_concurrently(connection, index):
+    """Build a model-declared index without blocking writes to its table, replacing a failed earlier attempt."""
+    # An interrupted concurrent build leaves an INVALID index that IF NOT EXISTS would keep skipping
+    invalid = connection.execute(
+        text("SELECT 1 FROM pg_index WHERE indexrelid = to_regclass(:name) AND NOT indisvalid"),
+        {"name": index.name}
+    ).first()
+    if invalid:
+        connection.execute(text(f'DROP INDEX CONCURRENTLY IF EXISTS "{index.name}"'))
+    
+    ddl = str(CreateIndex(index, if_not_exists=True).compile(dialect=connection.dialect))
+    connection.exec_driver_sql(re.sub(r'^CREATE (UNIQUE )?INDEX', r'CREATE \1INDEX CONCURRENTLY', ddl))
 
-    except Exception as e:
-        print(f"Error creating indexes: {e}")
-    finally:
-        connection.close()
\ No newline at end of file
+@contextmanager
+def schema_lock():
+    """
+    Hold a PostgreSQL advisory lock for the duration of startup schema changes,
+    so workers booting together do not run the same DDL concurrently.
+    """
+    with engine.connect() as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:key)"), {"key": SCHEMA_LOCK_KEY})
+        try:
+            yield
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:key)"), {"key": SCHEMA_LOCK_KEY})
+            connection.commit()
@@ -0,0 +1,33 @@
+import base64
+import binascii
+import uuid
+from datetime import date, datetime
+
+import orjson
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+def encode_cursor(sort_value, row_id):
+    """Encode the last row's sort key and ID as an opaque, URL-safe cursor."""
+    payload = orjson.dumps([sort_value, row_id])
+    return base64.urlsafe_b64encode(payload).rstrip(b'=').decode()
+
+def decode_cursor(cursor, sort_column):
+    """
+    Decode a cursor from encode_cursor() into (sort_value, row_id).
+    The sort value is converted back to the Python type of sort_column; raises InvalidCursorError if the cursor is malformed.
+    """
+    try:
+        payload = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, row_id = orjson.loads(payload)
+        row_id = uuid.UUID(row_id)
+        
+        # orjson writes dates and datetimes as ISO strings
+        python_type = sort_column.type.python_type
+        if sort_value is not None and python_type in (date, datetime):
+            sort_value = python_type.fromisoformat(sort_value)
+    except (binascii.Error, orjson.JSONDecodeError, TypeError, ValueError, AttributeError):
+        raise InvalidCursorError("Invalid cursor")
+    
+    return sort_value, row_id
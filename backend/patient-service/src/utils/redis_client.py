@@ -0,0 +1,19 @@
+import redis
+
+from ..config import app_config
+
+# Connect to Redis lazily so the service can start (and run without Redis-backed
+# features) when Redis is not reachable
+redis_client = None
+
+def get_redis_client():
+    """Get or create the shared Redis client."""
+    global redis_client
+    if redis_client is None:
+        pool = redis.BlockingConnectionPool.from_url(
+            app_config.REDIS_URL,
+            max_connections=app_config.REDIS_MAX_CONNECTIONS,
+            timeout=app_config.REDIS_POOL_TIMEOUT
+        )
+        redis_client = redis.Redis(connection_pool=pool)
+    return redis_client
@@ -0,0 +1,29 @@
+from flask.json.provider import JSONProvider
+import orjson
+
+class ORJSONProvider(JSONProvider):
+    """
+    JSON provider backed by orjson.
+    Serializes dates, datetimes and UUIDs natively, so to_dict() methods can return them as-is.
+    """
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+    
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+
+def stream_json_list(key, items, serialize, extra=None):
+    """
+    Yield the JSON encoding of {key: [serialize(item), ...], **extra} one item at a time,
+    so a large page is never held in memory as a list of dicts plus one encoded string.
+    """
+    yield b'{' + orjson.dumps(key) + b':['
+    for i, item in enumerate(items):
+        encoded = orjson.dumps(serialize(item), option=orjson.OPT_NON_STR_KEYS)
+        yield b',' + encoded if i else encoded
+    yield b']'
+    for name, value in (extra or {}).items():
+        yield b',' + orjson.dumps(name) + b':' + orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS)
+    yield b'}'
@@ -1,7 +1,129 @@
-from typing import Dict, List, Tuple, Any, Union
+from typing import Dict, List, Tuple, Any, Union, Literal, Optional
 import re
 from datetime import datetime, date
 
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter, ValidationError, field_validator
+
+# advanced_search filters and the largest name list each multi-valued filter accepts
+ADVANCED_SEARCH_FIELDS = frozenset((
+    'search_text', 'min_age', 'max_age', 'conditions', 'medications', 'allergies',
+    'last_visit_after', 'last_visit_before', 'sort_by', 'sort_dir'
+))
+MAX_SEARCH_LIST_VALUES = 100
+
+# Format checks, compiled once and shared by the validators and the pydantic models
+EMAIL_PATTERN = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}')
+PHONE_PATTERN = re.compile(r'^\+?[0-9]{8,15}')
+ICD10_PATTERN = re.compile(r'^[A-Z][0-9][0-9AB](\.[0-9]{1,3})?')
+NDC_PATTERN = re.compile(r'^[0-9]{5}-[0-9]{4}-[0-9]{2}$|^[0-9]{5}-[0-9]{3}-[0-9]{2}$|^[0-9]{11}')
+
+def _choices(field: str, *values: str) -> Tuple[frozenset, str]:
+    """Build the allowed-value set for a field and its error message, once at import time."""
+    return frozenset(values), f"{field} must be one of: {', '.join(values)}"
+
+# Allowed values of the enumerated fields
+VALID_GENDERS, GENDER_ERROR = _choices('gender', 'MALE', 'FEMALE', 'OTHER', 'UNKNOWN')
+VALID_BLOOD_TYPES, BLOOD_TYPE_ERROR = _choices('blood_type', 'A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-', 'Unknown')
+VALID_SEVERITIES, SEVERITY_ERROR = _choices('severity', 'Mild', 'Moderate', 'Severe')
+VALID_CONDITION_STATUSES, CONDITION_STATUS_ERROR = _choices('status', 'Active', 'Resolved', 'Inactive', 'Recurrent', 'Chronic')
+VALID_MEDICATION_FORMS, MEDICATION_FORM_ERROR = _choices('form', 'Tablet', 'Capsule', 'Liquid', 'Injection', 'Cream', 'Ointment', 'Gel', 'Patch', 'Inhalation', 'Other')
+
+# Vital sign -> (lowest, highest, error) accepted by validate_visit
+VITAL_SIGN_RANGES = {
+    'temperature': (30, 45, "temperature must be between 30 and 45 degrees Celsius"),
+    'heart_rate': (20, 300, "heart_rate must be between 20 and 300 beats per minute"),
+    'blood_pressure_systolic': (50, 250, "blood_pressure_systolic must be between 50 and 250 mmHg"),
+    'blood_pressure_diastolic': (20, 150, "blood_pressure_diastolic must be between 20 and 150 mmHg"),
+    'respiratory_rate': (4, 60, "respiratory_rate must be between 4 and 60 breaths per minute"),
+    'oxygen_saturation': (50, 100, "oxygen_saturation must be between 50 and 100 percent"),
+}
+
+# Fields each validator requires on creation
+PATIENT_REQUIRED_FIELDS = ('first_name', 'last_name', 'date_of_birth', 'gender')
+LAB_RESULT_REQUIRED_FIELDS = ('test_name', 'test_date', 'result_value')
+VISIT_REQUIRED_FIELDS = ('visit_date', 'provider_name', 'visit_type')
+NAMED_ENTRY_REQUIRED_FIELDS = ('name',)
+
+# (field, max_length, required) of the plain string fields each validator bounds.
+# Required fields are checked whenever present, optional ones only when non-empty.
+PATIENT_STRING_FIELDS = (('first_name', 100, True), ('last_name', 100, True), ('mrn', 20, False))
+LAB_RESULT_STRING_FIELDS = (
+    ('test_name', 200, True), ('result_value', 100, True), ('unit', 50, False), ('reference_range', 100, False),
+    ('status', 50, False), ('performing_lab', 200, False), ('ordering_provider', 200, False), ('loinc_code', 20, False)
+)
+VISIT_STRING_FIELDS = (('provider_name', 200, True), ('visit_type', 100, True))
+NAMED_ENTRY_STRING_FIELDS = (('name', 200, True),)
+MEDICATION_STRING_FIELDS = (('name', 200, True), ('dosage', 100, False), ('frequency', 100, False), ('prescribing_doctor', 200, False))
+
+# Free-text fields each validator accepts; any non-empty value must be a string
+VISIT_TEXT_FIELDS = ('chief_complaint', 'diagnosis', 'treatment_plan', 'follow_up_instructions')
+ALLERGY_TEXT_FIELDS = ('description', 'reaction')
+CONDITION_TEXT_FIELDS = ('description',)
+MEDICATION_TEXT_FIELDS = ('instructions',)
+
+def _check_required(data: Dict, fields: Tuple[str, ...], errors: List[str]) -> None:
+    """Append an error for each field in fields that is missing, None or empty."""
+    for field in fields:
+        value = data.get(field)
+        if value is None or value == '':
+            errors.append(f"{field} is required")
+
+def _check_string_fields(data: Dict, fields: Tuple[Tuple[str, int, bool], ...], errors: List[str]) -> None:
+    """Append an error for each field in fields that is not a string within its maximum length."""
+    for field, max_length, required in fields:
+        value = data.get(field)
+        if (required and field in data or value) and (not isinstance(value, str) or len(value) > max_length):
+            errors.append(f"{field} must be a string with maximum length of {max_length} characters")
+
+def _check_text_fields(data: Dict, fields: Tuple[str, ...], errors: List[str]) -> None:
+    """Append an error for each field in fields that is set to something other than a string."""
+    for field in fields:
+        value = data.get(field)
+        if value and not isinstance(value, str):
+            errors.append(f"{field} must be a string")
+
+def _add_years(value: Union[date, datetime], years: int) -> Union[date, datetime]:
+    """Shift a date or datetime by whole years, mapping Feb 29 to Feb 28 in non-leap years."""
+    try:
+        return value.replace(year=value.year + years)
+    except ValueError:
+        return value.replace(year=value.year + years, day=28)
+
+def parse_iso_date(value: str) -> date:
+    """Parse an ISO date, or the date part of an ISO timestamp. Raises ValueError if invalid."""
+    # Plain YYYY-MM-DD strings go straight to the C date parser
+    if len(value) == 10:
+        return date.fromisoformat(value)
+    return parse_iso_datetime(value).date()
+
+def parse_iso_datetime(value: str) -> datetime:
+    """Parse an ISO timestamp, accepting a trailing 'Z' for UTC. Raises ValueError if invalid."""
+    # Python 3.10's fromisoformat rejects 'Z'; only the suffix is rewritten, never the whole string
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    return datetime.fromisoformat(value)
+
+def _coerce_date(data: Dict, field: str, errors: List[str]) -> Optional[date]:
+    """
+    Parse an optional date field given as an ISO string or a date object.
+    Returns None if the field is empty or invalid; invalid values append an error.
+    """
+    value = data.get(field)
+    if not value:
+        return None
+    if isinstance(value, str):
+        try:
+            return parse_iso_date(value)
+        except ValueError:
+            errors.append(f"{field} must be in ISO format (YYYY-MM-DD)")
+            return None
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    errors.append(f"{field} must be a string in ISO format or a date object")
+    return None
+
 def validate_patient_data(data: Dict, is_update: bool = False) -> Tuple[bool, List[str]]:
     """
     Validate patient data.
@@ -12,99 +134,97 @@ def validate_patient_data(data: Dict, is_update: bool = False) -> Tuple[bool, Li
     # For updates, we don't need to validate all fields
     if not is_update:
         # Required fields
-        required_fields = ['first_name', 'last_name', 'date_of_birth', 'gender']
-        for field in required_fields:
-            if field not in data or data[field] is None or data[field] == '':
-                errors.append(f"{field} is required")
-    
-    # Validate first_name if provided
-    if 'first_name' in data and (not isinstance(data['first_name'], str) or len(data['first_name']) > 100):
-        errors.append("first_name must be a string with maximum length of 100 characters")
+        _check_required(data, PATIENT_REQUIRED_FIELDS, errors)
     
-    # Validate last_name if provided
-    if 'last_name' in data and (not isinstance(data['last_name'], str) or len(data['last_name']) > 100):
-        errors.append("last_name must be a string with maximum length of 100 characters")
+    # Validate string fields if provided
+    _check_string_fields(data, PATIENT_STRING_FIELDS, errors)
     
     # Validate date_of_birth if provided
     if 'date_of_birth' in data:
-        if isinstance(data['date_of_birth'], str):
+        date_of_birth = data['date_of_birth']
+        # Older than ~150 years is considered unreasonable
+        today = date.today()
+        min_date = _add_years(today, -150)
+        
+        if isinstance(date_of_birth, str):
             try:
                 # Attempt to parse the date
-                parsed_date = datetime.fromisoformat(data['date_of_birth'].replace('Z', '+00:00')).date()
+                parsed_date = parse_iso_date(date_of_birth)
                 
                 # Check if date is in the future
-                if parsed_date > datetime.now().date():
+                if parsed_date > today:
                     errors.append("date_of_birth cannot be in the future")
                     
-                # Check if date is unreasonably old (older than ~150 years)
-                min_date = datetime.now().date().replace(year=datetime.now().year - 150)
+                # Check if date is unreasonably old
                 if parsed_date < min_date:
                     errors.append("date_of_birth is unreasonably old")
             except ValueError:
                 errors.append("date_of_birth must be in ISO format (YYYY-MM-DD)")
-        elif isinstance(data['date_of_birth'], date):
+        elif isinstance(date_of_birth, date):
             # If it's already a date object, just check the range
-            if data['date_of_birth'] > datetime.now().date():
+            if date_of_birth > today:
                 errors.append("date_of_birth cannot be in the future")
                 
-            min_date = datetime.now().date().replace(year=datetime.now().year - 150)
-            if data['date_of_birth'] < min_date:
+            if date_of_birth < min_date:
                 errors.append("date_of_birth is unreasonably old")
         else:
             errors.append("date_of_birth must be a string in ISO format or a date object")
     
     # Validate gender if provided
     if 'gender' in data:
-        valid_genders = ['MALE', 'FEMALE', 'OTHER', 'UNKNOWN']
-        if data['gender'] not in valid_genders:
-            errors.append(f"gender must be one of: {', '.join(valid_genders)}")
-    
-    # Validate mrn if provided
-    if 'mrn' in data and data['mrn']:
-        if not isinstance(data['mrn'], str) or len(data['mrn']) > 20:
-            errors.append("mrn must be a string with maximum length of 20 characters")
+        gender = data['gender']
+        # Non-strings (e.g. lists) are unhashable and could not be looked up in the set
+        if not isinstance(gender, str) or gender not in VALID_GENDERS:
+            errors.append(GENDER_ERROR)
     
     # Validate blood_type if provided
-    if 'blood_type' in data and data['blood_type']:
-        valid_blood_types = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-', 'Unknown']
-        if data['blood_type'] not in valid_blood_types:
-            errors.append(f"blood_type must be one of: {', '.join(valid_blood_types)}")
-    
-    # Validate email if provided
-    if 'email' in data and data['email']:
-        email_pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}'
-        if not re.match(email_pattern, data['email']):
+    blood_type = data.get('blood_type')
+    if blood_type:
+        # Non-strings (e.g. lists) are unhashable and could not be looked up in the set
+        if not isinstance(blood_type, str) or blood_type not in VALID_BLOOD_TYPES:
+            errors.append(BLOOD_TYPE_ERROR)
+    
+    # Validate email if provided; the length check bounds the regex's backtracking
+    email = data.get('email')
+    if email:
+        if not isinstance(email, str) or len(email) > 255:
+            errors.append("email must be a string with maximum length of 255 characters")
+        elif not EMAIL_PATTERN.match(email):
             errors.append("email is not in a valid format")
     
     # Validate phone_number if provided
-    if 'phone_number' in data and data['phone_number']:
+    phone_number = data.get('phone_number')
+    if phone_number:
         # Simple validation for phone number (can be enhanced based on requirements)
-        phone_pattern = r'^\+?[0-9]{8,15}'
-        if not re.match(phone_pattern, data['phone_number'].replace(' ', '').replace('-', '')):
+        if not isinstance(phone_number, str) or len(phone_number) > 20:
+            errors.append("phone_number must be a string with maximum length of 20 characters")
+        elif not PHONE_PATTERN.match(phone_number.replace(' ', '').replace('-', '')):
             errors.append("phone_number is not in a valid format")
     
     # Validate height_cm if provided
-    if 'height_cm' in data and data['height_cm'] is not None:
+    height_cm = data.get('height_cm')
+    if height_cm is not None:
         try:
-            height = float(data['height_cm'])
+            height = float(height_cm)
             if height <= 0 or height > 300:  # Reasonable range for human height in cm
                 errors.append("height_cm must be a positive number less than 300")
         except (ValueError, TypeError):
             errors.append("height_cm must be a number")
     
     # Validate weight_kg if provided
-    if 'weight_kg' in data and data['weight_kg'] is not None:
+    weight_kg = data.get('weight_kg')
+    if weight_kg is not None:
         try:
-            weight = float(data['weight_kg'])
+            weight = float(weight_kg)
             if weight <= 0 or weight > 700:  # Reasonable range for human weight in kg
                 errors.append("weight_kg must be a positive number less than 700")
         except (ValueError, TypeError):
             errors.append("weight_kg must be a number")
     
     # Validate metadata if provided
-    if 'metadata' in data and data['metadata'] is not None:
-        if not isinstance(data['metadata'], dict):
-            errors.append("metadata must be a JSON object")
+    metadata = data.get('metadata')
+    if metadata is not None and not isinstance(metadata, dict):
+        errors.append("metadata must be a JSON object")
     
     # Return validation result
     return len(errors) == 0, errors
@@ -117,70 +237,41 @@ def validate_lab_result(data: Dict) -> Tuple[bool, List[str]]:
     errors = []
     
     # Required fields
-    required_fields = ['test_name', 'test_date', 'result_value']
-    for field in required_fields:
-        if field not in data or data[field] is None or data[field] == '':
-            errors.append(f"{field} is required")
+    _check_required(data, LAB_RESULT_REQUIRED_FIELDS, errors)
     
-    # Validate test_name if provided
-    if 'test_name' in data and (not isinstance(data['test_name'], str) or len(data['test_name']) > 200):
-        errors.append("test_name must be a string with maximum length of 200 characters")
+    # Validate string fields if provided
+    _check_string_fields(data, LAB_RESULT_STRING_FIELDS, errors)
     
     # Validate test_date if provided
     if 'test_date' in data:
-        if isinstance(data['test_date'], str):
+        test_date = data['test_date']
+        now = datetime.now()
+        
+        if isinstance(test_date, str):
             try:
                 # Attempt to parse the datetime
-                parsed_date = datetime.fromisoformat(data['test_date'].replace('Z', '+00:00'))
+                parsed_date = parse_iso_datetime(test_date)
                 
                 # Check if date is in the future
-                if parsed_date > datetime.now():
+                if parsed_date > now:
                     errors.append("test_date cannot be in the future")
             except ValueError:
                 errors.append("test_date must be in ISO format (YYYY-MM-DDTHH:MM:SS)")
-        elif isinstance(data['test_date'], datetime):
+        elif isinstance(test_date, datetime):
             # If it's already a datetime object, just check if it's in the future
-            if data['test_date'] > datetime.now():
+            if test_date > now:
                 errors.append("test_date cannot be in the future")
         else:
             errors.append("test_date must be a string in ISO format or a datetime object")
     
-    # Validate result_value if provided
-    if 'result_value' in data and (not isinstance(data['result_value'], str) or len(data['result_value']) > 100):
-        errors.append("result_value must be a string with maximum length of 100 characters")
-    
-    # Validate unit if provided
-    if 'unit' in data and data['unit'] and (not isinstance(data['unit'], str) or len(data['unit']) > 50):
-        errors.append("unit must be a string with maximum length of 50 characters")
-    
-    # Validate reference_range if provided
-    if 'reference_range' in data and data['reference_range'] and (not isinstance(data['reference_range'], str) or len(data['reference_range']) > 100):
-        errors.append("reference_range must be a string with maximum length of 100 characters")
-    
     # Validate abnormal_flag if provided
     if 'abnormal_flag' in data and not isinstance(data['abnormal_flag'], bool):
         errors.append("abnormal_flag must be a boolean")
     
-    # Validate status if provided
-    if 'status' in data and data['status'] and (not isinstance(data['status'], str) or len(data['status']) > 50):
-        errors.append("status must be a string with maximum length of 50 characters")
-    
-    # Validate performing_lab if provided
-    if 'performing_lab' in data and data['performing_lab'] and (not isinstance(data['performing_lab'], str) or len(data['performing_lab']) > 200):
-        errors.append("performing_lab must be a string with maximum length of 200 characters")
-    
-    # Validate ordering_provider if provided
-    if 'ordering_provider' in data and data['ordering_provider'] and (not isinstance(data['ordering_provider'], str) or len(data['ordering_provider']) > 200):
-        errors.append("ordering_provider must be a string with maximum length of 200 characters")
-    
-    # Validate loinc_code if provided
-    if 'loinc_code' in data and data['loinc_code'] and (not isinstance(data['loinc_code'], str) or len(data['loinc_code']) > 20):
-        errors.append("loinc_code must be a string with maximum length of 20 characters")
-    
     # Validate metadata if provided
-    if 'metadata' in data and data['metadata'] is not None:
-        if not isinstance(data['metadata'], dict):
-            errors.append("metadata must be a JSON object")
+    metadata = data.get('metadata')
+    if metadata is not None and not isinstance(metadata, dict):
+        errors.append("metadata must be a JSON object")
     
     # Return validation result
     return len(errors) == 0, errors
@@ -193,83 +284,52 @@ def validate_visit(data: Dict) -> Tuple[bool, List[str]]:
     errors = []
     
     # Required fields
-    required_fields = ['visit_date', 'provider_name', 'visit_type']
-    for field in required_fields:
-        if field not in data or data[field] is None or data[field] == '':
-            errors.append(f"{field} is required")
+    _check_required(data, VISIT_REQUIRED_FIELDS, errors)
+    
+    # Validate string fields if provided
+    _check_string_fields(data, VISIT_STRING_FIELDS, errors)
+    _check_text_fields(data, VISIT_TEXT_FIELDS, errors)
     
     # Validate visit_date if provided
     if 'visit_date' in data:
-        if isinstance(data['visit_date'], str):
+        visit_date = data['visit_date']
+        # Visits may be scheduled, but not more than a year ahead
+        max_future_date = _add_years(datetime.now(), 1)
+        
+        if isinstance(visit_date, str):
             try:
                 # Attempt to parse the datetime
-                parsed_date = datetime.fromisoformat(data['visit_date'].replace('Z', '+00:00'))
+                parsed_date = parse_iso_datetime(visit_date)
                 
-                # Check if date is too far in the future (e.g., more than 1 year)
-                max_future_date = datetime.now().replace(year=datetime.now().year + 1)
+                # Check if date is too far in the future
                 if parsed_date > max_future_date:
                     errors.append("visit_date is too far in the future (more than 1 year ahead)")
             except ValueError:
                 errors.append("visit_date must be in ISO format (YYYY-MM-DDTHH:MM:SS)")
-        elif isinstance(data['visit_date'], datetime):
+        elif isinstance(visit_date, datetime):
             # If it's already a datetime object, just check if it's too far in the future
-            max_future_date = datetime.now().replace(year=datetime.now().year + 1)
-            if data['visit_date'] > max_future_date:
+            if visit_date > max_future_date:
                 errors.append("visit_date is too far in the future (more than 1 year ahead)")
         else:
             errors.append("visit_date must be a string in ISO format or a datetime object")
     
-    # Validate provider_name if provided
-    if 'provider_name' in data and (not isinstance(data['provider_name'], str) or len(data['provider_name']) > 200):
-        errors.append("provider_name must be a string with maximum length of 200 characters")
-    
-    # Validate visit_type if provided
-    if 'visit_type' in data and (not isinstance(data['visit_type'], str) or len(data['visit_type']) > 100):
-        errors.append("visit_type must be a string with maximum length of 100 characters")
-    
-    # Validate chief_complaint if provided
-    if 'chief_complaint' in data and data['chief_complaint'] and not isinstance(data['chief_complaint'], str):
-        errors.append("chief_complaint must be a string")
-    
-    # Validate diagnosis if provided
-    if 'diagnosis' in data and data['diagnosis'] and not isinstance(data['diagnosis'], str):
-        errors.append("diagnosis must be a string")
-    
-    # Validate treatment_plan if provided
-    if 'treatment_plan' in data and data['treatment_plan'] and not isinstance(data['treatment_plan'], str):
-        errors.append("treatment_plan must be a string")
-    
-    # Validate follow_up_instructions if provided
-    if 'follow_up_instructions' in data and data['follow_up_instructions'] and not isinstance(data['follow_up_instructions'], str):
-        errors.append("follow_up_instructions must be a string")
-    
     # Validate vital signs if provided
-    vital_sign_fields = ['temperature', 'heart_rate', 'blood_pressure_systolic', 'blood_pressure_diastolic', 'respiratory_rate', 'oxygen_saturation']
-    for field in vital_sign_fields:
-        if field in data and data[field] is not None:
+    for field, (low, high, range_error) in VITAL_SIGN_RANGES.items():
+        value = data.get(field)
+        if value is not None:
             try:
-                value = float(data[field])
-                
-                # Validate ranges for each vital sign
-                if field == 'temperature' and (value < 30 or value > 45):  # Celsius
-                    errors.append("temperature must be between 30 and 45 degrees Celsius")
-                elif field == 'heart_rate' and (value < 20 or value > 300):
-                    errors.append("heart_rate must be between 20 and 300 beats per minute")
-                elif field == 'blood_pressure_systolic' and (value < 50 or value > 250):
-                    errors.append("blood_pressure_systolic must be between 50 and 250 mmHg")
-                elif field == 'blood_pressure_diastolic' and (value < 20 or value > 150):
-                    errors.append("blood_pressure_diastolic must be between 20 and 150 mmHg")
-                elif field == 'respiratory_rate' and (value < 4 or value > 60):
-                    errors.append("respiratory_rate must be between 4 and 60 breaths per minute")
-                elif field == 'oxygen_saturation' and (value < 50 or value > 100):
-                    errors.append("oxygen_saturation must be between 50 and 100 percent")
+                reading = float(value)
             except (ValueError, TypeError):
                 errors.append(f"{field} must be a number")
+                continue
+            
+            if reading < low or reading > high:
+                errors.append(range_error)
     
     # Validate metadata if provided
-    if 'metadata' in data and data['metadata'] is not None:
-        if not isinstance(data['metadata'], dict):
-            errors.append("metadata must be a JSON object")
+    metadata = data.get('metadata')
+    if metadata is not None and not isinstance(metadata, dict):
+        errors.append("metadata must be a JSON object")
     
     # Return validation result
     return len(errors) == 0, errors
@@ -282,31 +342,19 @@ def validate_allergy(data: Dict) -> Tuple[bool, List[str]]:
     errors = []
     
     # Required fields
-    required_fields = ['name']
-    for field in required_fields:
-        if field not in data or data[field] is None or data[field] == '':
-            errors.append(f"{field} is required")
+    _check_required(data, NAMED_ENTRY_REQUIRED_FIELDS, errors)
     
-    # Validate name if provided
-    if 'name' in data and (not isinstance(data['name'], str) or len(data['name']) > 200):
-        errors.append("name must be a string with maximum length of 200 characters")
-    
-    # Validate description if provided
-    if 'description' in data and data['description'] and not isinstance(data['description'], str):
-        errors.append("description must be a string")
+    # Validate string fields if provided
+    _check_string_fields(data, NAMED_ENTRY_STRING_FIELDS, errors)
+    _check_text_fields(data, ALLERGY_TEXT_FIELDS, errors)
     
     # Validate severity if provided
-    if 'severity' in data and data['severity']:
-        if not isinstance(data['severity'], str) or len(data['severity']) > 50:
+    severity = data.get('severity')
+    if severity:
+        if not isinstance(severity, str) or len(severity) > 50:
             errors.append("severity must be a string with maximum length of 50 characters")
-        
-        valid_severities = ['Mild', 'Moderate', 'Severe']
-        if data['severity'] not in valid_severities:
-            errors.append(f"severity must be one of: {', '.join(valid_severities)}")
-    
-    # Validate reaction if provided
-    if 'reaction' in data and data['reaction'] and not isinstance(data['reaction'], str):
-        errors.append("reaction must be a string")
+        elif severity not in VALID_SEVERITIES:
+            errors.append(SEVERITY_ERROR)
     
     # Return validation result
     return len(errors) == 0, errors
@@ -319,59 +367,34 @@ def validate_condition(data: Dict) -> Tuple[bool, List[str]]:
     errors = []
     
     # Required fields
-    required_fields = ['name']
-    for field in required_fields:
-        if field not in data or data[field] is None or data[field] == '':
-            errors.append(f"{field} is required")
-    
-    # Validate name if provided
-    if 'name' in data and (not isinstance(data['name'], str) or len(data['name']) > 200):
-        errors.append("name must be a string with maximum length of 200 characters")
+    _check_required(data, NAMED_ENTRY_REQUIRED_FIELDS, errors)
     
-    # Validate description if provided
-    if 'description' in data and data['description'] and not isinstance(data['description'], str):
-        errors.append("description must be a string")
+    # Validate string fields if provided
+    _check_string_fields(data, NAMED_ENTRY_STRING_FIELDS, errors)
+    _check_text_fields(data, CONDITION_TEXT_FIELDS, errors)
     
     # Validate status if provided
-    if 'status' in data and data['status']:
-        if not isinstance(data['status'], str) or len(data['status']) > 50:
+    status = data.get('status')
+    if status:
+        if not isinstance(status, str) or len(status) > 50:
             errors.append("status must be a string with maximum length of 50 characters")
-        
-        valid_statuses = ['Active', 'Resolved', 'Inactive', 'Recurrent', 'Chronic']
-        if data['status'] not in valid_statuses:
-            errors.append(f"status must be one of: {', '.join(valid_statuses)}")
-    
-    # Validate dates if provided
-    date_fields = ['onset_date', 'resolution_date']
-    for field in date_fields:
-        if field in data and data[field]:
-            if isinstance(data[field], str):
-                try:
-                    # Attempt to parse the date
-                    parsed_date = datetime.fromisoformat(data[field].replace('Z', '+00:00')).date()
-                    
-                    # Check if date is too far in the future (e.g., more than 1 year)
-                    max_future_date = datetime.now().date().replace(year=datetime.now().year + 1)
-                    if parsed_date > max_future_date:
-                        errors.append(f"{field} is too far in the future (more than 1 year ahead)")
-                except ValueError:
-                    errors.append(f"{field} must be in ISO format (YYYY-MM-DD)")
-            elif isinstance(data[field], date):
-                # If it's already a date object, just check if it's too far in the future
-                max_future_date = datetime.now().date().replace(year=datetime.now().year + 1)
-                if data[field] > max_future_date:
-                    errors.append(f"{field} is too far in the future (more than 1 year ahead)")
-            else:
-                errors.append(f"{field} must be a string in ISO format or a date object")
+        elif status not in VALID_CONDITION_STATUSES:
+            errors.append(CONDITION_STATUS_ERROR)
+    
+    # Validate dates if provided; none may be more than a year ahead
+    max_future_date = _add_years(date.today(), 1)
+    for field in ['onset_date', 'resolution_date']:
+        parsed_date = _coerce_date(data, field, errors)
+        if parsed_date and parsed_date > max_future_date:
+            errors.append(f"{field} is too far in the future (more than 1 year ahead)")
     
     # Validate ICD code if provided
-    if 'icd_code' in data and data['icd_code']:
-        if not isinstance(data['icd_code'], str) or len(data['icd_code']) > 20:
+    icd_code = data.get('icd_code')
+    if icd_code:
+        if not isinstance(icd_code, str) or len(icd_code) > 20:
             errors.append("icd_code must be a string with maximum length of 20 characters")
-        
         # Simple pattern validation for ICD-10 codes
-        icd10_pattern = r'^[A-Z][0-9][0-9AB](\.[0-9]{1,3})?'
-        if not re.match(icd10_pattern, data['icd_code']):
+        elif not ICD10_PATTERN.match(icd_code):
             errors.append("icd_code should follow the ICD-10 format (e.g., A01.1)")
     
     # Return validation result
@@ -385,80 +408,161 @@ def validate_medication(data: Dict) -> Tuple[bool, List[str]]:
     errors = []
     
     # Required fields
-    required_fields = ['name']
-    for field in required_fields:
-        if field not in data or data[field] is None or data[field] == '':
-            errors.append(f"{field} is required")
+    _check_required(data, NAMED_ENTRY_REQUIRED_FIELDS, errors)
     
-    # Validate name if provided
-    if 'name' in data and (not isinstance(data['name'], str) or len(data['name']) > 200):
-        errors.append("name must be a string with maximum length of 200 characters")
-    
-    # Validate dosage if provided
-    if 'dosage' in data and data['dosage'] and (not isinstance(data['dosage'], str) or len(data['dosage']) > 100):
-        errors.append("dosage must be a string with maximum length of 100 characters")
-    
-    # Validate frequency if provided
-    if 'frequency' in data and data['frequency'] and (not isinstance(data['frequency'], str) or len(data['frequency']) > 100):
-        errors.append("frequency must be a string with maximum length of 100 characters")
-    
-    # Validate instructions if provided
-    if 'instructions' in data and data['instructions'] and not isinstance(data['instructions'], str):
-        errors.append("instructions must be a string")
-    
-    # Validate dates if provided
-    date_fields = ['start_date', 'end_date']
-    for field in date_fields:
-        if field in data and data[field]:
-            if isinstance(data[field], str):
-                try:
-                    # Attempt to parse the date
-                    parsed_date = datetime.fromisoformat(data[field].replace('Z', '+00:00')).date()
-                    
-                    # If it's end_date, make sure it's not before start_date
-                    if field == 'end_date' and 'start_date' in data and data['start_date']:
-                        if isinstance(data['start_date'], str):
-                            start_date = datetime.fromisoformat(data['start_date'].replace('Z', '+00:00')).date()
-                        elif isinstance(data['start_date'], date):
-                            start_date = data['start_date']
-                        else:
-                            # Skip this check if start_date is invalid format
-                            continue
-                        
-                        if parsed_date < start_date:
-                            errors.append("end_date cannot be before start_date")
-                except ValueError:
-                    errors.append(f"{field} must be in ISO format (YYYY-MM-DD)")
-            elif isinstance(data[field], date):
-                # If it's already a date object
-                if field == 'end_date' and 'start_date' in data and isinstance(data['start_date'], date):
-                    if data[field] < data['start_date']:
-                        errors.append("end_date cannot be before start_date")
-            else:
-                errors.append(f"{field} must be a string in ISO format or a date object")
-    
-    # Validate prescribing_doctor if provided
-    if 'prescribing_doctor' in data and data['prescribing_doctor'] and (not isinstance(data['prescribing_doctor'], str) or len(data['prescribing_doctor']) > 200):
-        errors.append("prescribing_doctor must be a string with maximum length of 200 characters")
+    # Validate string fields if provided
+    _check_string_fields(data, MEDICATION_STRING_FIELDS, errors)
+    _check_text_fields(data, MEDICATION_TEXT_FIELDS, errors)
+    
+    # Validate dates if provided, parsing each once
+    start_date = _coerce_date(data, 'start_date', errors)
+    end_date = _coerce_date(data, 'end_date', errors)
+    if start_date and end_date and end_date < start_date:
+        errors.append("end_date cannot be before start_date")
     
     # Validate NDC code if provided
-    if 'ndc_code' in data and data['ndc_code']:
-        if not isinstance(data['ndc_code'], str) or len(data['ndc_code']) > 20:
+    ndc_code = data.get('ndc_code')
+    if ndc_code:
+        if not isinstance(ndc_code, str) or len(ndc_code) > 20:
             errors.append("ndc_code must be a string with maximum length of 20 characters")
-        
         # Simple pattern validation for NDC codes
-        ndc_pattern = r'^[0-9]{5}-[0-9]{4}-[0-9]{2}$|^[0-9]{5}-[0-9]{3}-[0-9]{2}$|^[0-9]{11}'
-        if not re.match(ndc_pattern, data['ndc_code'].replace('-', '')):
+        elif not NDC_PATTERN.match(ndc_code.replace('-', '')):
             errors.append("ndc_code should follow a valid NDC format")
     
     # Validate form if provided
-    if 'form' in data and data['form']:
-        if not isinstance(data['form'], str) or len(data['form']) > 50:
+    form = data.get('form')
+    if form:
+        if not isinstance(form, str) or len(form) > 50:
             errors.append("form must be a string with maximum length of 50 characters")
-        
-        valid_forms = ['Tablet', 'Capsule', 'Liquid', 'Injection', 'Cream', 'Ointment', 'Gel', 'Patch', 'Inhalation', 'Other']
-        if data['form'] not in valid_forms:
-            errors.append(f"form must be one of: {', '.join(valid_forms)}")
+        elif form not in VALID_MEDICATION_FORMS:
+            errors.append(MEDICATION_FORM_ERROR)
     
     # Return validation result
-    return len(errors) == 0, errors
\ No newline at end of file
+    return len(errors) == 0, errors
+
+def validate_advanced_search(data: Dict) -> Tuple[bool, List[str]]:
+    """
+    Validate advanced search filters.
+    Returns a tuple of (is_valid, errors).
+    """
+    errors = []
+    
+    # Only known filters are accepted
+    unknown_fields = data.keys() - ADVANCED_SEARCH_FIELDS
+    if unknown_fields:
+        errors.append(f"Unsupported search fields: {', '.join(sorted(unknown_fields))}")
+    
+    # Validate search_text if provided
+    search_text = data.get('search_text')
+    if search_text and not isinstance(search_text, str):
+        errors.append("search_text must be a string")
+    
+    # Validate age range if provided
+    for field in ['min_age', 'max_age']:
+        if field in data:
+            try:
+                age = int(data[field])
+                if age < 0 or age > 150:
+                    errors.append(f"{field} must be between 0 and 150")
+            except (ValueError, TypeError):
+                errors.append(f"{field} must be an integer")
+    
+    # Validate name lists, bounding the size of each IN (...) list
+    for field in ['conditions', 'medications', 'allergies']:
+        value = data.get(field)
+        if value:
+            if not isinstance(value, str):
+                errors.append(f"{field} must be a comma-separated string")
+            elif value.count(',') >= MAX_SEARCH_LIST_VALUES:
+                errors.append(f"{field} accepts at most {MAX_SEARCH_LIST_VALUES} values")
+    
+    # Validate last visit dates if provided
+    for field in ['last_visit_after', 'last_visit_before']:
+        if field in data and not isinstance(data[field], str):
+            errors.append(f"{field} must be a string in ISO format")
+    
+    # Validate sorting if provided
+    if 'sort_by' in data and not isinstance(data['sort_by'], str):
+        errors.append("sort_by must be a string")
+    
+    if 'sort_dir' in data and data['sort_dir'] not in ['asc', 'desc']:
+        errors.append("sort_dir must be one of: asc, desc")
+    
+    # Return validation result
+    return len(errors) == 0, errors
+
+class PatientIn(BaseModel):
+    """
+    Patient payload for creation and bulk import.
+    pydantic-core decodes the JSON, validates it and parses dates in a single pass.
+    """
+    model_config = ConfigDict(extra='forbid', populate_by_name=True)
+    
+    mrn: Optional[str] = Field(None, max_length=20)
+    first_name: str = Field(min_length=1, max_length=100)
+    middle_name: Optional[str] = Field(None, max_length=100)
+    last_name: str = Field(min_length=1, max_length=100)
+    date_of_birth: date
+    gender: Literal['MALE', 'FEMALE', 'OTHER', 'UNKNOWN']
+    blood_type: Optional[Literal['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-', 'Unknown']] = None
+    
+    # Contact information
+    email: Optional[str] = Field(None, max_length=255)
+    phone_number: Optional[str] = Field(None, max_length=20)
+    address_line1: Optional[str] = Field(None, max_length=255)
+    address_line2: Optional[str] = Field(None, max_length=255)
+    city: Optional[str] = Field(None, max_length=100)
+    state: Optional[str] = Field(None, max_length=100)
+    postal_code: Optional[str] = Field(None, max_length=20)
+    country: Optional[str] = Field(None, max_length=100)
+    
+    # Emergency contact and insurance
+    emergency_contact_name: Optional[str] = Field(None, max_length=200)
+    emergency_contact_relationship: Optional[str] = Field(None, max_length=100)
+    emergency_contact_phone: Optional[str] = Field(None, max_length=20)
+    insurance_provider: Optional[str] = Field(None, max_length=200)
+    insurance_policy_number: Optional[str] = Field(None, max_length=100)
+    insurance_group_number: Optional[str] = Field(None, max_length=100)
+    
+    # Clinical information
+    height_cm: Optional[float] = Field(None, gt=0, le=300)  # Reasonable range for human height in cm
+    weight_kg: Optional[float] = Field(None, gt=0, le=700)  # Reasonable range for human weight in kg
+    primary_care_physician: Optional[str] = Field(None, max_length=200)
+    notes: Optional[str] = None
+    is_active: Optional[bool] = None
+    
+    # Sent as "metadata", stored as Patient.patient_metadata
+    patient_metadata: Optional[Dict[str, Any]] = Field(None, alias='metadata')
+    
+    @field_validator('date_of_birth')
+    @classmethod
+    def check_date_of_birth(cls, value: date) -> date:
+        today = date.today()
+        if value > today:
+            raise ValueError("date_of_birth cannot be in the future")
+        
+        # Older than ~150 years
+        if value < _add_years(today, -150):
+            raise ValueError("date_of_birth is unreasonably old")
+        return value
+    
+    @field_validator('email')
+    @classmethod
+    def check_email(cls, value: Optional[str]) -> Optional[str]:
+        if value and not EMAIL_PATTERN.match(value):
+            raise ValueError("email is not in a valid format")
+        return value
+    
+    @field_validator('phone_number')
+    @classmethod
+    def check_phone_number(cls, value: Optional[str]) -> Optional[str]:
+        if value and not PHONE_PATTERN.match(value.replace(' ', '').replace('-', '')):
+            raise ValueError("phone_number is not in a valid format")
+        return value
+
+# Validates a whole bulk-import array in one call
+PATIENT_LIST_ADAPTER = TypeAdapter(List[PatientIn])
+
+def format_validation_errors(error: ValidationError) -> List[str]:
+    """Flatten a pydantic ValidationError into "field: message" strings."""
+    return [f"{'.'.join(str(part) for part in e['loc'])}: {e['msg']}" for e in error.errors()]
\ No newline at end of file
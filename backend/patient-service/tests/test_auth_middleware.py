@@ -0,0 +1,139 @@
+import time
+import unittest
+import uuid
+from unittest.mock import patch
+
+import jwt
+from flask import Flask, g, jsonify
+
+from src.middleware import auth_middleware
+
+SECRET = "patient-service-test-signing-key-" * 2
+
+def make_token(secret=SECRET, **overrides):
+    """Build a token shaped like the auth service's access tokens, with claims overridden or removed (None)."""
+    now = int(time.time())
+    payload = {
+        'sub': str(uuid.uuid4()),
+        'username': 'dr.house',
+        'roles': ['physician'],
+        'permissions': ['read_patient'],
+        'exp': now + 300,
+        'iat': now,
+        'jti': str(uuid.uuid4()),
+        'type': 'access'
+    }
+    payload.update(overrides)
+    payload = {key: value for key, value in payload.items() if value is not None}
+    return jwt.encode(payload, secret, algorithm='HS256'), payload
+
+class TestDecodeTokenLocally(unittest.TestCase):
+    def setUp(self):
+        config = auth_middleware.app_config
+        patcher = patch.multiple(config, JWT_SECRET_KEY=SECRET, JWT_ALGORITHM='HS256')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_valid_access_token(self):
+        token, payload = make_token()
+        user_data = auth_middleware._decode_token_locally(token)
+        self.assertEqual(user_data, {
+            'jti': payload['jti'],
+            'id': payload['sub'],
+            'username': 'dr.house',
+            'roles': ['physician'],
+            'permissions': ['read_patient']
+        })
+
+    def test_refresh_token_is_rejected(self):
+        # Refresh tokens are signed with the same key and carry sub/exp/iat
+        token, _ = make_token(type='refresh', username=None, roles=None, permissions=None)
+        self.assertIsNone(auth_middleware._decode_token_locally(token))
+
+    def test_token_without_type_is_rejected(self):
+        token, _ = make_token(type=None)
+        self.assertIsNone(auth_middleware._decode_token_locally(token))
+
+    def test_token_without_username_is_rejected(self):
+        token, _ = make_token(username=None)
+        self.assertIsNone(auth_middleware._decode_token_locally(token))
+
+    def test_expired_token_is_rejected(self):
+        token, _ = make_token(exp=int(time.time()) - 10)
+        self.assertIsNone(auth_middleware._decode_token_locally(token))
+
+    def test_wrong_signing_key_is_rejected(self):
+        token, _ = make_token(secret="another-signing-key-for-tests-" * 3)
+        self.assertIsNone(auth_middleware._decode_token_locally(token))
+
+    def test_unexpected_algorithm_is_rejected(self):
+        payload = make_token()[1]
+        token = jwt.encode(payload, SECRET, algorithm='HS512')
+        self.assertIsNone(auth_middleware._decode_token_locally(token))
+
+    def test_garbage_is_rejected(self):
+        self.assertIsNone(auth_middleware._decode_token_locally("not.a.jwt"))
+
+def drop_attributes(f):
+    """A decorator that does not use functools.wraps, hiding the view's auth requirements."""
+    def wrapper(*args, **kwargs):
+        return f(*args, **kwargs)
+    return wrapper
+
+def grant_roles(*roles):
+    """Stand-in for _authenticate that accepts the request with the given roles."""
+    def authenticate():
+        g.roles = frozenset(roles)
+        g.permissions = frozenset()
+    return authenticate
+
+class TestAuthRequirements(unittest.TestCase):
+    def setUp(self):
+        app = Flask(__name__)
+        auth_middleware.setup_auth(app)
+
+        @app.route('/wrapped')
+        @drop_attributes
+        @auth_middleware.require_roles(['admin'])
+        def wrapped():
+            return 'ok'
+
+        @app.route('/marked')
+        @auth_middleware.require_roles(['admin'])
+        @auth_middleware.require_auth
+        def marked():
+            return 'ok'
+
+        @app.route('/public')
+        def public():
+            return 'ok'
+
+        self.client = app.test_client()
+
+    def test_unauthenticated_requests_are_rejected(self):
+        rejected = lambda: (jsonify({"error": "Invalid or expired token"}), 401)
+        with patch.object(auth_middleware, '_authenticate', side_effect=rejected) as authenticate:
+            self.assertEqual(self.client.get('/marked').status_code, 401)
+            self.assertEqual(self.client.get('/wrapped').status_code, 401)
+            self.assertEqual(self.client.get('/public').status_code, 200)
+        self.assertEqual(authenticate.call_count, 2)
+
+    def test_requirements_are_checked_once_per_request(self):
+        with patch.object(auth_middleware, '_authenticate', side_effect=grant_roles('admin')) as authenticate:
+            self.assertEqual(self.client.get('/marked').status_code, 200)
+            self.assertEqual(self.client.get('/wrapped').status_code, 200)
+        self.assertEqual(authenticate.call_count, 2)
+
+    def test_preflight_requests_are_not_authenticated(self):
+        with patch.object(auth_middleware, '_authenticate') as authenticate:
+            self.assertEqual(self.client.options('/marked').status_code, 200)
+            self.assertEqual(self.client.options('/wrapped').status_code, 200)
+        authenticate.assert_not_called()
+
+    def test_missing_role_is_forbidden_behind_an_outer_wrapper(self):
+        with patch.object(auth_middleware, '_authenticate', side_effect=grant_roles('nurse')):
+            self.assertEqual(self.client.get('/wrapped').status_code, 403)
+            self.assertEqual(self.client.get('/marked').status_code, 403)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from src.models.patient import BloodType, Gender, IntCodedEnum, Patient
+
+class TestIntCodedEnum(unittest.TestCase):
+    def setUp(self):
+        self.blood_type = IntCodedEnum(BloodType)
+        self.dialect = postgresql.dialect()
+
+    def test_codes_follow_definition_order(self):
+        for code, member in enumerate(BloodType):
+            self.assertEqual(self.blood_type.process_bind_param(member, self.dialect), code)
+
+    def test_bind_accepts_member_value_and_name(self):
+        code = self.blood_type.process_bind_param(BloodType.A_NEGATIVE, self.dialect)
+        self.assertEqual(self.blood_type.process_bind_param("A-", self.dialect), code)
+        self.assertEqual(self.blood_type.process_bind_param("A_NEGATIVE", self.dialect), code)
+
+    def test_round_trip(self):
+        for member in BloodType:
+            code = self.blood_type.process_bind_param(member, self.dialect)
+            self.assertIs(self.blood_type.process_result_value(code, self.dialect), member)
+
+    def test_none_passes_through(self):
+        self.assertIsNone(self.blood_type.process_bind_param(None, self.dialect))
+        self.assertIsNone(self.blood_type.process_result_value(None, self.dialect))
+
+    def test_invalid_value_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.blood_type.process_bind_param("C+", self.dialect)
+
+    def test_unknown_code_is_rejected(self):
+        with self.assertRaises(KeyError):
+            self.blood_type.process_result_value(len(BloodType), self.dialect)
+
+    def test_columns_are_smallint(self):
+        for column in ('gender', 'blood_type'):
+            ddl_type = Patient.__table__.c[column].type.compile(dialect=self.dialect)
+            self.assertEqual(ddl_type, "SMALLINT")
+
+    def test_query_filters_bind_the_code(self):
+        compiled = select(Patient.id).where(Patient.gender == "FEMALE").compile(
+            dialect=self.dialect, compile_kwargs={"literal_binds": True}
+        )
+        self.assertIn(f"patients.gender = {list(Gender).index(Gender.FEMALE)}", str(compiled))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+import unittest
+import uuid
+from datetime import date, datetime
+
+from src.models.patient import Patient, Visit
+from src.utils.pagination import InvalidCursorError, decode_cursor, encode_cursor
+
+class TestKeysetCursor(unittest.TestCase):
+    def setUp(self):
+        self.row_id = uuid.uuid4()
+
+    def test_round_trip_string_sort_value(self):
+        cursor = encode_cursor("Smith", self.row_id)
+        self.assertEqual(decode_cursor(cursor, Patient.last_name), ("Smith", self.row_id))
+
+    def test_round_trip_restores_date_types(self):
+        cursor = encode_cursor(date(1980, 2, 29), self.row_id)
+        self.assertEqual(decode_cursor(cursor, Patient.date_of_birth), (date(1980, 2, 29), self.row_id))
+
+        visited = datetime(2024, 5, 1, 13, 45, 10)
+        cursor = encode_cursor(visited, self.row_id)
+        self.assertEqual(decode_cursor(cursor, Visit.visit_date), (visited, self.row_id))
+
+    def test_cursor_is_url_safe_without_padding(self):
+        cursor = encode_cursor("O'Brien & Sons?", self.row_id)
+        self.assertNotIn("=", cursor)
+        self.assertTrue(set(cursor) <= set("ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_"))
+
+    def test_malformed_cursors_are_rejected(self):
+        bad_cursors = (
+            "not base64!",
+            encode_cursor("Smith", "not-a-uuid"),
+            "W10",  # an empty JSON array
+            encode_cursor("yesterday", self.row_id),  # not an ISO date
+        )
+        columns = (Patient.last_name, Patient.last_name, Patient.last_name, Patient.date_of_birth)
+        for cursor, column in zip(bad_cursors, columns):
+            with self.subTest(cursor=cursor):
+                with self.assertRaises(InvalidCursorError):
+                    decode_cursor(cursor, column)
+
+if __name__ == '__main__':
+    unittest.main()
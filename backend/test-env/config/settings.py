@@ -1,7 +1,22 @@
 import os
 
-ALLOWED_EXTENSIONS = {'.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif'}
-TEMP_UPLOAD_FOLDER = os.path.join(os.path.dirname(__file__), 'uploads')
+ALLOWED_EXTENSIONS = frozenset({'.pdf', '.png', '.jpg', '.jpeg', '.tiff', '.bmp', '.gif'})
 
-if not os.path.exists(TEMP_UPLOAD_FOLDER):
-    os.makedirs(TEMP_UPLOAD_FOLDER)
\ No newline at end of file
+# On-disk cache of LLM responses keyed by a hash of the full request (model, messages, parameters).
+# Entries hold analyses of patient records, so they expire after LLM_CACHE_TTL seconds.
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(os.path.expanduser("~"), ".cache", "emr_llm.sqlite"))
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", "86400"))
+
+# How the LLM cache is used: "enabled", "readonly", "replay" (never call the API) or "disabled".
+# Off unless opted into, e.g. LLM_CACHE_POLICY=enabled for local development.
+LLM_CACHE_POLICY = os.getenv("LLM_CACHE_POLICY", "disabled")
+
+# Threads that run background analyses started with /analyze?async=1.
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "2"))
+
+# State and results of /analyze?async=1 jobs, shared by every worker process on the host so a
+# poll can land on any of them. Finished results are deleted once collected or after
+# ANALYSIS_JOB_TTL seconds; jobs still pending after ANALYSIS_JOB_TIMEOUT seconds are dropped.
+ANALYSIS_JOBS_PATH = os.getenv("ANALYSIS_JOBS_PATH", os.path.join(os.path.expanduser("~"), ".cache", "emr_analysis_jobs.sqlite"))
+ANALYSIS_JOB_TTL = int(os.getenv("ANALYSIS_JOB_TTL", "600"))
+ANALYSIS_JOB_TIMEOUT = int(os.getenv("ANALYSIS_JOB_TIMEOUT", "1800"))
@@ -1,42 +1,158 @@
+import contextlib
+import hashlib
+import io
 import os
 import logging
+import re
 import argparse
+import sqlite3
+import threading
+import time
 import uuid
-from flask import Flask, request, render_template, jsonify
-from werkzeug.utils import secure_filename
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import BinaryIO
+from flask import Flask, Response, request, render_template, jsonify
+from flask.json.provider import JSONProvider
 from flask_cors import CORS
+import orjson
 
-from .extractor.pdf_extractor import extract_text_from_pdf
-from .extractor.image_extractor import extract_text_from_image
-from .llm.llm_client import analyze_emr_sections
-from config.settings import ALLOWED_EXTENSIONS, TEMP_UPLOAD_FOLDER
+from .extractor.document import extract_text
+from .llm.llm_client import analyze_emr_sections, stream_emr_sections
+from config.settings import (
+    ALLOWED_EXTENSIONS, ANALYSIS_WORKERS, ANALYSIS_JOBS_PATH, ANALYSIS_JOB_TTL, ANALYSIS_JOB_TIMEOUT
+)
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+class ORJSONProvider(JSONProvider):
+    """
+    JSON provider backed by orjson, which encodes the multi-KB analysis payloads far faster
+    than the stdlib encoder.
+    """
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
 app = Flask(__name__)
+app.json = ORJSONProvider(app)  # Use orjson for all jsonify() responses
 CORS(app)  # Enable CORS for all routes
-app.config['UPLOAD_FOLDER'] = TEMP_UPLOAD_FOLDER
 
-def allowed_file(filename):
-    file_ext = os.path.splitext(filename)[1].lower()
-    return file_ext in ALLOWED_EXTENSIONS
+# Content types accepted as a raw /analyze body, mapped to the extension used for extraction
+RAW_UPLOAD_TYPES = {
+    'application/pdf': '.pdf',
+    'image/png': '.png',
+    'image/jpeg': '.jpg',
+    'image/tiff': '.tiff',
+    'image/bmp': '.bmp',
+    'image/gif': '.gif',
+}
 
-def extract_text(file_path: str, ext: str) -> str:
+# Analyses started with /analyze?async=1 run here; their state is kept in ANALYSIS_JOBS_PATH
+analysis_executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS)
+
+# Analyses in progress, keyed by a digest of the document, so concurrent uploads of the same
+# file share a single OCR and LLM run
+inflight_analyses = {}
+inflight_lock = threading.Lock()
+
+# Code fences the model sometimes wraps its JSON in despite the instructions
+_CODE_FENCE = re.compile(r"^```(?:json)?\s*\n|\n```$")
+
+def parse_analysis(analyzed_text: str):
     """
-    Determines file type based on extension and routes extraction to the appropriate function.
-    Supported file types:
-      - PDF: Uses combined native text extraction and OCR.
-      - Image files (.png, .jpg, .jpeg, etc.): Uses OCR.
+    Decodes the model's JSON section list so the client receives it as JSON rather than a
+    string to parse again. Falls back to the raw text if the model did not return valid JSON.
     """
-    if ext == ".pdf":
-        return extract_text_from_pdf(file_path)
-    elif ext in ALLOWED_EXTENSIONS:
-        return extract_text_from_image(file_path)
-    else:
-        error_msg = f"Unsupported file format: {ext}"
-        logger.error(error_msg)
-        raise ValueError(error_msg)
+    try:
+        return orjson.loads(_CODE_FENCE.sub("", analyzed_text.strip()))
+    except orjson.JSONDecodeError:
+        logger.warning("LLM section analysis was not valid JSON; returning it as text")
+        return analyzed_text
+
+def run_analysis(file: BinaryIO, ext: str):
+    """
+    Extracts the text of an uploaded document and analyzes it into sections.
+    If the same document is already being analyzed, waits for and returns that result instead.
+    """
+    document = file.read()
+    key = hashlib.blake2b(document, digest_size=16).hexdigest() + ext
+    with inflight_lock:
+        future = inflight_analyses.get(key)
+        is_owner = future is None
+        if is_owner:
+            future = inflight_analyses[key] = Future()
+    if not is_owner:
+        logger.info(f"Joining in-progress analysis of {key}")
+        return future.result()
+
+    try:
+        extracted_text = extract_text(io.BytesIO(document), ext)
+        result = parse_analysis(analyze_emr_sections(extracted_text))
+        future.set_result(result)
+        return result
+    except Exception as e:
+        future.set_exception(e)
+        raise
+    finally:
+        with inflight_lock:
+            del inflight_analyses[key]
+
+@contextlib.contextmanager
+def _open_jobs():
+    """
+    Opens the async job store, creating it if needed, and deletes expired jobs first.
+    """
+    os.makedirs(os.path.dirname(ANALYSIS_JOBS_PATH), exist_ok=True)
+    conn = sqlite3.connect(ANALYSIS_JOBS_PATH, timeout=10)
+    try:
+        with conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (file_id TEXT PRIMARY KEY, state TEXT NOT NULL, "
+                "result BLOB, expires_at REAL NOT NULL)"
+            )
+            conn.execute("DELETE FROM jobs WHERE expires_at < ?", (time.time(),))
+            yield conn
+    finally:
+        conn.close()
+
+def run_analysis_job(file_id: str, file: BinaryIO, ext: str) -> None:
+    """
+    Runs an analysis started with /analyze?async=1 and records its outcome for polling.
+    """
+    try:
+        state, result = 'SUCCESS', orjson.dumps(run_analysis(file, ext))
+    except Exception as e:
+        logger.error(f"Error processing file: {e}")
+        state, result = 'FAILURE', orjson.dumps({'error': str(e)})
+    with _open_jobs() as conn:
+        # A job that outlived ANALYSIS_JOB_TIMEOUT was already dropped; do not resurrect it
+        conn.execute(
+            "UPDATE jobs SET state = ?, result = ?, expires_at = ? WHERE file_id = ?",
+            (state, result, time.time() + ANALYSIS_JOB_TTL, file_id)
+        )
+
+def stream_sections(file_id: str, extracted_text: str):
+    """
+    Yields the section analysis as Server-Sent Events: a "delta" event (a JSON string) for each
+    chunk of raw model output as it is generated, then a "done" event with the same body as the
+    non-streamed response ({ "fileId", "data" }, data parsed by parse_analysis), or an "error"
+    event if the LLM call fails.
+    """
+    deltas = []
+    try:
+        for delta in stream_emr_sections(extracted_text):
+            deltas.append(delta)
+            yield b"event: delta\ndata: " + orjson.dumps(delta) + b"\n\n"
+    except Exception as e:
+        logger.error(f"Error streaming section analysis: {e}")
+        yield b"event: error\ndata: " + orjson.dumps({'error': str(e)}) + b"\n\n"
+        return
+    done = {'fileId': file_id, 'data': parse_analysis("".join(deltas))}
+    yield b"event: done\ndata: " + orjson.dumps(done) + b"\n\n"
 
 @app.route('/analyze', methods=['POST'])
 def analyze():
@@ -49,6 +165,16 @@ def analyze():
     - Body: {
         file: File (PDF or image)
     }
+    or, to skip multipart parsing for large scans:
+    - Content-Type: application/pdf, image/png, image/jpeg, image/tiff, image/bmp or image/gif
+    - Body: the raw document
+
+    Query parameters:
+    - async: when "1", returns 202 with { "fileId": string } immediately and runs the
+      analysis in the background; poll GET /analyze/<fileId> for the result.
+    - stream: when "1", extracts the text and then streams the model's raw output as it is
+      generated (text/event-stream; see stream_sections). The final "done" event carries the
+      same { "fileId", "data" } body as the response below.
 
     Response:
     - Success (200):
@@ -81,42 +207,94 @@ def analyze():
         }
     """
 
-    # Ensuring ImmutableMultiDict([...]) request contains elements
-    if len(request.files) == 0:
-        return jsonify({'error': 'No file part in the request'}), 400
+    if request.mimetype in RAW_UPLOAD_TYPES:
+        # A raw document body is read straight from the request stream, skipping multipart parsing
+        upload = request.stream
+        ext = RAW_UPLOAD_TYPES[request.mimetype]
+    else:
+        # Ensuring ImmutableMultiDict([...]) request contains elements
+        if len(request.files) == 0:
+            return jsonify({'error': 'No file part in the request'}), 400
 
-    file = request.files['file']
-    if file.filename == '':
-        return jsonify({'error': 'No file selected'}), 400
+        file = request.files['file']
+        if file.filename == '':
+            return jsonify({'error': 'No file selected'}), 400
 
-    if file and allowed_file(file.filename):
-        fileId = str(uuid.uuid4())
+        # Werkzeug already spools large uploads to a temporary file, so the extractors
+        # read the upload stream directly instead of a second copy saved to disk
+        upload = file.stream
         ext = os.path.splitext(file.filename)[1].lower()
+        if ext not in ALLOWED_EXTENSIONS:
+            return jsonify({'error': 'Unsupported file format'}), 400
+
+    fileId = str(uuid.uuid4())
+    logger.info(f"Processing upload {fileId}{ext}")
 
-        filename = secure_filename(fileId + ext)
-        file_path = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-        file.save(file_path)
-        logger.info(f"File saved to {file_path}")
+    if request.args.get('async') == '1':
+        # The upload stream is closed once this request ends, so the background job gets a copy
+        document = io.BytesIO(upload.read())
+        with _open_jobs() as conn:
+            conn.execute(
+                "INSERT INTO jobs (file_id, state, expires_at) VALUES (?, 'PENDING', ?)",
+                (fileId, time.time() + ANALYSIS_JOB_TIMEOUT)
+            )
+        analysis_executor.submit(run_analysis_job, fileId, document, ext)
+        return jsonify({'fileId': fileId}), 202
 
+    if request.args.get('stream') == '1':
         try:
-            extracted_text = extract_text(file_path, ext)
-            analyzed_text = analyze_emr_sections(extracted_text)
-
-            response = {
-                'fileId': fileId,
-                'data': analyzed_text
-            }
-            return jsonify(response), 200
+            extracted_text = extract_text(upload, ext)
         except Exception as e:
             logger.error(f"Error processing file: {e}")
             return jsonify({'error': str(e)}), 500
-    else:
-        return jsonify({'error': 'Unsupported file format'}), 400
+        return Response(stream_sections(fileId, extracted_text), mimetype='text/event-stream')
+
+    try:
+        analyzed_text = run_analysis(upload, ext)
+
+        response = {
+            'fileId': fileId,
+            'data': analyzed_text
+        }
+        return jsonify(response), 200
+    except Exception as e:
+        logger.error(f"Error processing file: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/analyze/<file_id>', methods=['GET'])
+def analysis_result(file_id):
+    """
+    Returns the state of an analysis started with POST /analyze?async=1.
+
+    Response:
+    - Pending (202): { "fileId": string, "state": "PENDING" }
+    - Success (200): { "fileId": string, "state": "SUCCESS", "data": [...] }, same data as /analyze
+    - Error (404/500): { "error": string (error message) }
+
+    Jobs are stored in ANALYSIS_JOBS_PATH, so any worker process on the host can answer the
+    poll. Results are returned once; uncollected results expire after ANALYSIS_JOB_TTL seconds.
+    """
+    with _open_jobs() as conn:
+        job = conn.execute("SELECT state, result FROM jobs WHERE file_id = ?", (file_id,)).fetchone()
+        if job is not None and job[0] != 'PENDING':
+            # Finished jobs are handed out once and then dropped
+            conn.execute("DELETE FROM jobs WHERE file_id = ?", (file_id,))
+    if job is None:
+        return jsonify({'error': 'Unknown fileId'}), 404
+
+    state, result = job
+    if state == 'PENDING':
+        return jsonify({'fileId': file_id, 'state': 'PENDING'}), 202
+    if state == 'FAILURE':
+        return jsonify(orjson.loads(result)), 500
+    return jsonify({'fileId': file_id, 'state': 'SUCCESS', 'data': orjson.loads(result)}), 200
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Run the EMR Analyzer Flask App")
     parser.add_argument('--host', default='127.0.0.1', help='Host address')
     parser.add_argument('--port', default=5003, type=int, help='Port number')
+    parser.add_argument('--debug', action='store_true', help='Enable the reloader and interactive debugger')
     args = parser.parse_args()
     
-    app.run(host=args.host, port=args.port, debug=True)
\ No newline at end of file
+    # The development server is for local work only; serve production traffic with gunicorn
+    app.run(host=args.host, port=args.port, debug=args.debug)
\ No newline at end of file
@@ -0,0 +1,25 @@
+import logging
+from typing import BinaryIO, Union
+from config.settings import ALLOWED_EXTENSIONS
+from .image_extractor import extract_text_from_image
+from .pdf_extractor import extract_text_from_pdf
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def extract_text(file: Union[str, BinaryIO], ext: str) -> str:
+    """
+    Determines file type based on extension and routes extraction to the appropriate function.
+    The document may be a path or an open binary file. Supported file types:
+      - PDF: Uses combined native text extraction and OCR.
+      - Image files (.png, .jpg, .jpeg, etc.): Uses OCR.
+    """
+    if ext == ".pdf":
+        return extract_text_from_pdf(file)
+    elif ext in ALLOWED_EXTENSIONS:
+        return extract_text_from_image(file)
+    else:
+        error_msg = f"Unsupported file format: {ext}"
+        logger.error(error_msg)
+        raise ValueError(error_msg)
@@ -1,20 +1,53 @@
-import pytesseract
-from PIL import Image
+from typing import BinaryIO, Union
+from PIL import Image, ImageOps
 import logging
+from .ocr import ocr_image
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def extract_text_from_image(image_path: str) -> str:
+# Pixel value above which a grayscale pixel is treated as paper rather than ink.
+BINARIZE_THRESHOLD = 180
+# Images smaller than this (in pixels) are only converted to grayscale; thresholding
+# small text regions tends to erase thin strokes.
+MIN_BINARIZE_AREA = 300 * 300
+# Longest side an image is downscaled to before OCR (~300 DPI for a letter page).
+MAX_OCR_DIMENSION = 3300
+
+def preprocess_for_ocr(image: Image.Image) -> Image.Image:
+    """
+    Prepares an image for Tesseract: downscales oversized images, converts to
+    grayscale and binarizes to 1-bpp so Tesseract can skip its own thresholding pass.
+    """
+    if max(image.size) > MAX_OCR_DIMENSION:
+        image = image.copy()
+        image.thumbnail((MAX_OCR_DIMENSION, MAX_OCR_DIMENSION))
+
+    if image.mode != "L":
+        image = image.convert("L")
+
+    if image.width * image.height < MIN_BINARIZE_AREA:
+        return image
+
+    image = ImageOps.autocontrast(image)
+    return image.point(lambda x: 0 if x < BINARIZE_THRESHOLD else 255, "1")
+
+def extract_text_from_image(image_file: Union[str, BinaryIO]) -> str:
     """
-    Extracts text from an image file using OCR.
+    Extracts text from an image, given as a path or an open binary file, using OCR.
     """
     try:
-        logger.info(f"Processing image file: {image_path}")
-        image = Image.open(image_path)
-        text = pytesseract.image_to_string(image)
+        logger.info(f"Processing image file: {image_file}")
+        image = Image.open(image_file)
+        # Let the JPEG decoder produce grayscale at reduced scale (never below the OCR size)
+        # instead of decoding a full-resolution color photo only to shrink it afterwards.
+        # The box keeps the image's aspect ratio, so the long side decides the reduction.
+        scale = min(1.0, MAX_OCR_DIMENSION / max(image.size))
+        image.draft("L", (max(1, round(image.width * scale)), max(1, round(image.height * scale))))
+        image = preprocess_for_ocr(image)
+        text = ocr_image(image)
         return text.strip()
     except Exception as e:
-        logger.error(f"Error extracting text from image {image_path}: {e}")
-        raise
\ No newline at end of file
+        logger.error(f"Error extracting text from image {image_file}: {e}")
+        raise
@@ -0,0 +1,40 @@
+import logging
+import threading
+from PIL import Image
+
+try:
+    import tesserocr
+except ImportError:  # libtesseract bindings unavailable; fall back to the tesseract CLI
+    tesserocr = None
+    import pytesseract
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# LSTM engine only, and no inverted-text pass: preprocess_for_ocr always produces dark text
+# on a light background, so Tesseract's second, inverted recognition attempt never helps.
+TESSERACT_CONFIG = "--oem 1 -c tessedit_do_invert=0"
+
+# PyTessBaseAPI is not thread-safe, so each thread (and therefore each worker process)
+# keeps its own instance with the language model loaded once.
+_local = threading.local()
+
+def _get_api():
+    api = getattr(_local, "api", None)
+    if api is None:
+        api = tesserocr.PyTessBaseAPI(lang="eng", psm=tesserocr.PSM.AUTO, oem=tesserocr.OEM.LSTM_ONLY)
+        api.SetVariable("tessedit_do_invert", "0")
+        _local.api = api
+    return api
+
+def ocr_image(image: Image.Image) -> str:
+    """
+    Runs OCR on a PIL image. Uses an in-process tesserocr API when available so the
+    model is not reloaded for every page; otherwise shells out via pytesseract.
+    """
+    if tesserocr is None:
+        return pytesseract.image_to_string(image, config=TESSERACT_CONFIG)
+    api = _get_api()
+    api.SetImage(image)
+    return api.GetUTF8Text()
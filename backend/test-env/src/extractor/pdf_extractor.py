@@ -1,41 +1,86 @@
-import io
+import functools
 import logging
-import PyPDF2
-import pytesseract
+import os
+import re
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import BinaryIO, Union
 import fitz  # PyMuPDF
 from PIL import Image
 from ..processor.deduplication import deduplicate_overlap
+from .image_extractor import preprocess_for_ocr
+from .ocr import ocr_image
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_path: str) -> str:
+# Damaged xrefs, unknown XObjects and CMap issues are common in scanned EMRs; keep PyMuPDF
+# from writing a warning to stderr for every page.
+fitz.TOOLS.mupdf_display_errors(False)
+
+# Pages are rendered at 2x zoom in grayscale for OCR; the matrix is constant so build it once.
+OCR_ZOOM = 2
+OCR_MATRIX = fitz.Matrix(OCR_ZOOM, OCR_ZOOM)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Threads that OCR pages; Tesseract releases the GIL, so pages are recognized in parallel.
+OCR_WORKERS = os.cpu_count() or 1
+
+# Rendered pages waiting for or in OCR, per OCR thread. Each one holds a full-page bitmap,
+# so rendering pauses once this many are queued instead of rasterizing the whole document.
+PAGES_IN_FLIGHT_PER_WORKER = 2
+
+@functools.lru_cache(maxsize=1)
+def _ocr_executor() -> ThreadPoolExecutor:
     """
-    Extracts text from a PDF document. For each page, it first attempts to use native text extraction.
-    Then, it renders the page as an image and performs OCR. The two outputs are deduplicated before concatenation.
+    Creates the OCR pool on first use and keeps it, so its threads (and their per-thread
+    Tesseract APIs) outlive a single document and importing this module starts no threads.
     """
-    final_text = ""
+    return ThreadPoolExecutor(max_workers=OCR_WORKERS)
+
+def _ocr_page(image: Image.Image) -> str:
+    return ocr_image(preprocess_for_ocr(image))
+
+def _combine_page(native_text: str, ocr_future) -> str:
+    combined = deduplicate_overlap(native_text, ocr_future.result())
+    # Normalize whitespace per page so the full document is never re-split
+    return _WHITESPACE.sub(" ", combined).strip()
+
+def extract_text_from_pdf(pdf_file: Union[str, BinaryIO]) -> str:
+    """
+    Extracts text from a PDF document, given as a path or an open binary file. For each page, it first
+    attempts to use native text extraction. Then, it renders the page as an image and performs OCR.
+    The two outputs are deduplicated before concatenation.
+    """
+    page_texts = []
     try:
-        with open(pdf_path, 'rb') as file:
-            reader = PyPDF2.PdfReader(file)
-            doc = fitz.open(pdf_path)
-            total_pages = len(reader.pages)
+        if isinstance(pdf_file, str):
+            doc = fitz.open(pdf_file)
+        else:
+            doc = fitz.open(stream=pdf_file.read(), filetype="pdf")
+        with doc:
+            total_pages = doc.page_count
             logger.info(f"Processing PDF with {total_pages} pages.")
             
+            # PyMuPDF is not thread-safe, so each page is loaded once here, in order, for both its
+            # native text and its render, while the rendered pages are OCR'd on the pool
+            max_in_flight = PAGES_IN_FLIGHT_PER_WORKER * OCR_WORKERS
+            pending = deque()
             for page_num in range(total_pages):
-                native_text = reader.pages[page_num].extract_text() or ""
+                if len(pending) >= max_in_flight:
+                    page_texts.append(_combine_page(*pending.popleft()))
                 page_fitz = doc.load_page(page_num)
-                zoom = 2
-                mat = fitz.Matrix(zoom, zoom)
-                pix = page_fitz.get_pixmap(matrix=mat)
-                img_bytes = pix.tobytes("png")
-                image = Image.open(io.BytesIO(img_bytes))
-                ocr_text = pytesseract.image_to_string(image)
-                combined = deduplicate_overlap(native_text, ocr_text)
-                final_text += combined + "\n\n"
-            doc.close()
+                native_text = page_fitz.get_text("text")
+                pix = page_fitz.get_pixmap(matrix=OCR_MATRIX, colorspace=fitz.csGRAY)
+                # Wrap the raw grayscale samples directly rather than round-tripping through PNG
+                image = Image.frombytes("L", (pix.width, pix.height), pix.samples)
+                pending.append((native_text, _ocr_executor().submit(_ocr_page, image)))
+            
+            while pending:
+                page_texts.append(_combine_page(*pending.popleft()))
     except Exception as e:
         logger.error(f"Error extracting text from PDF: {e}")
         raise
-    return ' '.join(final_text.split()).strip()
\ No newline at end of file
+    return ' '.join(text for text in page_texts if text)
\ No newline at end of file
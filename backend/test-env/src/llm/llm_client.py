@@ -1,15 +1,159 @@
+import contextlib
+import functools
+import hashlib
+import json
 import logging
+import math
 import os
+import sqlite3
+import time
+from collections import Counter
+from typing import Iterator
 from dotenv import load_dotenv
 from openai import OpenAI
+from config.settings import LLM_CACHE_PATH, LLM_CACHE_POLICY, LLM_CACHE_TTL
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI()
-client.api_key = api_key
+LLM_MODEL = "gpt-4o"
+
+# Extractions shorter than this, or with less character entropy (bits per character), are
+# blank pages or OCR noise; analyzing them would only return an empty section list.
+MIN_ANALYSIS_CHARS = 32
+MIN_ANALYSIS_ENTROPY = 2.0
+EMPTY_ANALYSIS = "[]"
+
+def _has_analyzable_text(extracted_text: str) -> bool:
+    text = extracted_text.strip()
+    if len(text) < MIN_ANALYSIS_CHARS:
+        return False
+    entropy = -sum(n / len(text) * math.log2(n / len(text)) for n in Counter(text).values())
+    return entropy >= MIN_ANALYSIS_ENTROPY
+
+@functools.lru_cache(maxsize=1)
+def _client() -> OpenAI:
+    """
+    Creates the OpenAI client on first use so that importing this module (e.g. for the
+    extraction-only code paths) does not parse .env or build an HTTP client.
+    """
+    load_dotenv()
+    return OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+@functools.lru_cache(maxsize=1)
+def _init_cache(path: str) -> None:
+    """
+    Creates the cache schema once per process, so lookups never need SQLite's write lock.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            # "responses" was keyed on the extracted text alone; its entries can never be hit again
+            conn.execute("DROP TABLE IF EXISTS responses")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS completions "
+                "(key TEXT PRIMARY KEY, response TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+    finally:
+        conn.close()
+
+@contextlib.contextmanager
+def _open_cache():
+    _init_cache(LLM_CACHE_PATH)
+    conn = sqlite3.connect(LLM_CACHE_PATH)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+def _create_completion(messages: list, **params) -> str:
+    """
+    Returns the content of a chat completion. Responses are cached on disk keyed by a hash of
+    the whole request (model, messages and parameters), so retries and duplicate documents skip
+    the API call while a changed prompt or parameter is never answered from the cache.
+    LLM_CACHE_POLICY selects "enabled" (read and write), "readonly", "replay" (misses raise
+    instead of calling the API) or "disabled".
+    """
+    request = {"model": LLM_MODEL, "messages": messages, **params}
+    if LLM_CACHE_POLICY == "disabled":
+        return _client().chat.completions.create(**request).choices[0].message.content
+
+    key = hashlib.blake2b(json.dumps(request, sort_keys=True).encode(), digest_size=16).hexdigest()
+    try:
+        with _open_cache() as conn:
+            row = conn.execute(
+                "SELECT response FROM completions WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        if row is not None:
+            logger.info("LLM cache hit")
+            return row[0]
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"LLM cache unavailable: {e}")
+
+    if LLM_CACHE_POLICY == "replay":
+        raise LookupError("No cached LLM response for this request (LLM_CACHE_POLICY=replay)")
+
+    response = _client().chat.completions.create(**request).choices[0].message.content
+    if LLM_CACHE_POLICY == "readonly":
+        return response
+
+    try:
+        with _open_cache() as conn, conn:
+            now = time.time()
+            conn.execute("DELETE FROM completions WHERE expires_at < ?", (now,))
+            conn.execute(
+                "INSERT OR REPLACE INTO completions (key, response, expires_at) VALUES (?, ?, ?)",
+                (key, response, now + LLM_CACHE_TTL)
+            )
+    except (sqlite3.Error, OSError) as e:
+        logger.warning(f"Failed to store LLM response in cache: {e}")
+    return response
+
+# Instruction prompts are module-level constants so every request shares a byte-identical
+# system-message prefix, which lets OpenAI's automatic prompt caching apply.
+EMR_EDIT_INSTRUCTIONS = """You are an expert medical editor.
+I have extracted text from an electronic medical record (EMR) that contains both typed text and handwritten notes. Please improve the grammar, clarity, and overall presentation while preserving the clinical meaning and medical terminology. Provide only the corrected version without any commentary."""
+
+CLEANUP_INSTRUCTIONS = """You are a helpful assistant.
+I have extracted text from a document that contains both typed text and handwritten content.
+The extraction includes native PDF text (which is generally accurate for typed parts) as well as OCR results from image-rendered pages.
+The OCR output, however, may include errors like misrecognized characters, broken words, and formatting issues.
+Your task is to deduce the intended meaning of the document and produce a corrected, clean version that accurately reflects the original content.
+Do not include any commentary or additional explanation—only provide the corrected text."""
+
+SECTION_ANALYSIS_INSTRUCTIONS = """You are a precise medical document analyzer. Your task is to parse the electronic medical record (EMR) text provided by the user, separate it into its respective sections, and generate improvements within each section. For each section, identify the section title (e.g., "Patient Information", "Chief Complaint", "Medical History", "Assessment and Plan", BUT NOT LIMITED TO THESE ONLY, USE YOUR OWN JUDGEMENT TO ASSIGN ACCURATE TITLES) and extract its content.
+
+Within each section's content, if there are parts that require improvement, create an object with three keys:
+- "original": the original text snippet,
+- "suggested": the improved version,
+- "reason": a brief explanation of why the change is recommended.
+
+If a portion of the text does not need improvement, output it as a plain string in the array.
+
+Output a JSON array of objects, where each object represents a section with the following keys:
+- "title": the section title,
+- "content": an array that may include both strings and objects (as described above).
+
+Output the result as a JSON array of objects, DO NOT wrap it in triple backticks or include any additional text, in the following format exactly:
+
+[
+    {
+        "title": "Section Title",
+        "content": [
+        "Plain text content",
+        {
+            "original": "Original snippet",
+            "suggested": "Improved snippet",
+            "reason": "Explanation of the improvement"
+        },
+        "More text content"
+        ]
+    },
+    ... (other sections)
+]
+
+IMPORTANT: Output ONLY the JSON array. DO NOT wrap it in triple backticks or include any additional text."""
 
 def call_llm_emr(extracted_text: str) -> str:
     """
@@ -17,18 +161,11 @@ def call_llm_emr(extracted_text: str) -> str:
     with special instructions for clinical reports. The LLM should fix
     grammatical errors, improve clarity, and ensure medical terminology remains accurate.
     """
-    response = client.chat.completions.create(
-        model="gpt-4o",
+    response = _client().chat.completions.create(
+        model=LLM_MODEL,
         messages=[
-            {"role": "developer", "content": "You are an expert medical editor."},
-            {"role": "user", "content": f"""
-            I have extracted the following text from an electronic medical record (EMR) that contains both typed text and handwritten notes. Please improve the grammar, clarity, and overall presentation while preserving the clinical meaning and medical terminology. Provide only the corrected version without any commentary.
-
-            Extracted Text:
-            {extracted_text}
-
-            Corrected Version:
-            """}
+            {"role": "system", "content": EMR_EDIT_INSTRUCTIONS},
+            {"role": "user", "content": extracted_text}
         ]
     )
     return response.choices[0].message.content
@@ -39,25 +176,10 @@ def call_llm_combined(extracted_text: str) -> str:
     The LLM fixes misrecognized characters, broken words, formatting issues, and outputs only the corrected version.
     """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "developer", "content": "You are a helpful assistant."},
-                {"role": "user", "content": f"""
-                I have extracted the following text from a document that contains both typed text and handwritten content.
-                The extraction includes native PDF text (which is generally accurate for typed parts) as well as OCR results from image-rendered pages.
-                The OCR output, however, may include errors like misrecognized characters, broken words, and formatting issues.
-                Your task is to deduce the intended meaning of the document and produce a corrected, clean version that accurately reflects the original content.
-                Do not include any commentary or additional explanation—only provide the corrected text.
-
-                Extracted Text:
-                {extracted_text}
-
-                Corrected Version:
-                """}
-            ]
-        )
-        return response.choices[0].message.content
+        return _create_completion([
+            {"role": "system", "content": CLEANUP_INSTRUCTIONS},
+            {"role": "user", "content": extracted_text}
+        ])
     except Exception as e:
         logger.error(f"Error calling LLM: {e}")
         raise
@@ -85,54 +207,37 @@ def analyze_emr_sections(extracted_text: str) -> str:
       ... (other sections)
     ]
     """
-    prompt = f"""
-            You are a precise medical document analyzer. Your task is to parse the following electronic medical record (EMR) text, separate it into its respective sections, and generate improvements within each section. For each section, identify the section title (e.g., "Patient Information", "Chief Complaint", "Medical History", "Assessment and Plan", BUT NOT LIMITED TO THESE ONLY, USE YOUR OWN JUDGEMENT TO ASSIGN ACCURATE TITLES) and extract its content.
-
-            Within each section's content, if there are parts that require improvement, create an object with three keys:
-            - "original": the original text snippet,
-            - "suggested": the improved version,
-            - "reason": a brief explanation of why the change is recommended.
-
-            If a portion of the text does not need improvement, output it as a plain string in the array.
+    if not _has_analyzable_text(extracted_text):
+        logger.info("Skipping section analysis of empty or noise-only text")
+        return EMPTY_ANALYSIS
 
-            Output a JSON array of objects, where each object represents a section with the following keys:
-            - "title": the section title,
-            - "content": an array that may include both strings and objects (as described above).
-
-            Output the result as a JSON array of objects, DO NOT wrap it in triple backticks or include any additional text, in the following format exactly:
-    
-            [
-                {{
-                    "title": "Section Title",
-                    "content": [
-                    "Plain text content",
-                    {{
-                        "original": "Original snippet",
-                        "suggested": "Improved snippet",
-                        "reason": "Explanation of the improvement"
-                    }},
-                    "More text content"
-                    ]
-                }},
-                ... (other sections)
-            ]
-            
-            IMPORTANT: Output ONLY the JSON array. DO NOT wrap it in triple backticks or include any additional text.
-
-            Here is the extracted text:
-            {extracted_text}
-
-            Output:
-            """
     try:
-        response = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[
-                {"role": "developer", "content": "You are a precise medical document analyzer."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-        return response.choices[0].message.content
+        return _create_completion([
+            {"role": "system", "content": SECTION_ANALYSIS_INSTRUCTIONS},
+            {"role": "user", "content": extracted_text}
+        ])
     except Exception as e:
         logger.error(f"Error calling LLM for section analysis: {e}")
-        raise
\ No newline at end of file
+        raise
+
+def stream_emr_sections(extracted_text: str) -> Iterator[str]:
+    """
+    Same analysis as analyze_emr_sections, but yields the model's output in chunks as it is
+    generated so callers can forward it before the full response is complete. Streamed
+    responses bypass the on-disk cache.
+    """
+    if not _has_analyzable_text(extracted_text):
+        yield EMPTY_ANALYSIS
+        return
+
+    response = _client().chat.completions.create(
+        model=LLM_MODEL,
+        messages=[
+            {"role": "system", "content": SECTION_ANALYSIS_INSTRUCTIONS},
+            {"role": "user", "content": extracted_text}
+        ],
+        stream=True
+    )
+    for chunk in response:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
@@ -1,9 +1,12 @@
 import os
 import logging
 import argparse
-from .extractor.image_extractor import extract_text_from_image
-from .extractor.pdf_extractor import extract_text_from_pdf
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import Pool, cpu_count
+from .extractor import pdf_extractor
+from .extractor.document import extract_text as extract_document_text
 from .llm.llm_client import call_llm_combined, analyze_emr_sections
+from config.settings import ALLOWED_EXTENSIONS, ANALYSIS_WORKERS
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -11,20 +14,82 @@ logger = logging.getLogger(__name__)
 
 def extract_text(file_path: str) -> str:
     """
-    Determines file type based on extension and routes extraction to the appropriate function.
-    Supported file types:
-      - PDF: Uses combined native text extraction and OCR.
-      - Image files (.png, .jpg, .jpeg, etc.): Uses OCR.
-    """
-    ext = os.path.splitext(file_path)[1].lower()
-    if ext == ".pdf":
-        return extract_text_from_pdf(file_path)
-    elif ext in [".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".gif"]:
-        return extract_text_from_image(file_path)
-    else:
-        error_msg = f"Unsupported file format: {ext}"
-        logger.error(error_msg)
-        raise ValueError(error_msg)
+    Extracts the text of the document at file_path, choosing the extractor by its extension.
+    """
+    return extract_document_text(file_path, os.path.splitext(file_path)[1].lower())
+
+def collect_files(dir_path: str) -> list:
+    """
+    Returns the supported documents directly inside dir_path, sorted by name.
+    """
+    return sorted(
+        os.path.join(dir_path, name)
+        for name in os.listdir(dir_path)
+        if os.path.splitext(name)[1].lower() in ALLOWED_EXTENSIONS
+    )
+
+def _init_extraction_worker() -> None:
+    """
+    Pool initializer: the processes already run one document each in parallel, so each one OCRs
+    its pages on a single thread instead of starting a cpu_count-sized OCR pool of its own.
+    """
+    pdf_extractor.OCR_WORKERS = 1
+
+def _extract_file(file_path: str) -> tuple:
+    """
+    Returns (text, None), or (None, error message) if the document could not be extracted,
+    so one bad file does not abort the batch.
+    """
+    try:
+        return extract_text(file_path), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def _analyze_text(text: str) -> tuple:
+    """
+    Returns (analysis, None), or (None, error message) if the LLM call failed.
+    """
+    try:
+        return analyze_emr_sections(text), None
+    except Exception as e:
+        return None, f"{type(e).__name__}: {e}"
+
+def process_directory(dir_path: str) -> None:
+    """
+    Processes every supported document in a directory. Extraction is CPU-bound (OCR) and runs
+    in a process pool; the LLM calls are network-bound and run concurrently on up to
+    ANALYSIS_WORKERS threads. Files that fail are reported and skipped.
+    """
+    files = collect_files(dir_path)
+    logger.info(f"Processing {len(files)} files from {dir_path}")
+    if not files:
+        return
+
+    with Pool(min(cpu_count(), len(files)), initializer=_init_extraction_worker) as pool:
+        extractions = pool.map(_extract_file, files)
+
+    failed = []
+    extracted = []
+    for file_path, (text, error) in zip(files, extractions):
+        if error is None:
+            extracted.append((file_path, text))
+        else:
+            failed.append((file_path, error))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(ANALYSIS_WORKERS, len(extracted)))) as executor:
+        analyses = list(executor.map(_analyze_text, [text for _, text in extracted]))
+
+    for (file_path, _), (cleaned_text, error) in zip(extracted, analyses):
+        if error is not None:
+            failed.append((file_path, error))
+            continue
+        logger.info(f"Cleaned Corrected Version: {file_path}")
+        print(cleaned_text)
+
+    for file_path, error in failed:
+        logger.error(f"Failed to process {file_path}: {error}")
+    if failed:
+        logger.error(f"{len(failed)} of {len(files)} files failed")
 
 if __name__ == "__main__":
     # Configure command-line argument parsing for file_path.
@@ -34,21 +99,32 @@ if __name__ == "__main__":
     parser.add_argument(
         "file_path",
         type=str,
+        nargs="?",
         help="Path to the input file (PDF or image)."
     )
+    parser.add_argument(
+        "--dir",
+        type=str,
+        help="Process every PDF and image in this directory."
+    )
     args = parser.parse_args()
+    if bool(args.file_path) == bool(args.dir):
+        parser.error("provide either file_path or --dir")
     file_path = args.file_path
     
     try:
-        # Extract text based on file type.
-        extracted_text = extract_text(file_path)
-        logger.info("Extracted Combined Text:")
-        print(extracted_text)
-        
-        # Use the LLM to deduce and clean the intended content.
-        #cleaned_text = call_llm_combined(extracted_text)
-        cleaned_text = analyze_emr_sections(extracted_text)
-        logger.info("Cleaned Corrected Version:")
-        print(cleaned_text)
+        if args.dir:
+            process_directory(args.dir)
+        else:
+            # Extract text based on file type.
+            extracted_text = extract_text(file_path)
+            logger.info("Extracted Combined Text:")
+            print(extracted_text)
+            
+            # Use the LLM to deduce and clean the intended content.
+            #cleaned_text = call_llm_combined(extracted_text)
+            cleaned_text = analyze_emr_sections(extracted_text)
+            logger.info("Cleaned Corrected Version:")
+            print(cleaned_text)
     except Exception as e:
         logger.error(f"An error occurred during processing: {e}")
\ No newline at end of file
@@ -1,5 +1,8 @@
 from difflib import SequenceMatcher
 
+# Shared text longer than this is treated as an overlap and removed from the OCR output.
+MIN_OVERLAP = 20
+
 def deduplicate_overlap(native_text: str, ocr_text: str) -> str:
     """
     Deduplicate overlapping text between native extraction and OCR output.
@@ -16,30 +19,25 @@ def deduplicate_overlap(native_text: str, ocr_text: str) -> str:
     if native_text == ocr_text:
         return native_text
 
-    ratio = SequenceMatcher(None, native_text, ocr_text).ratio()
-    if ratio > 0.7:
+    # A single matcher serves both the similarity ratio and the longest common substring;
+    # autojunk is disabled so frequent characters in long pages are not silently ignored.
+    # The cheap upper bounds reject most dissimilar pages before the O(n*m) ratio().
+    matcher = SequenceMatcher(None, native_text, ocr_text, autojunk=False)
+    if matcher.real_quick_ratio() > 0.7 and matcher.quick_ratio() > 0.7 and matcher.ratio() > 0.7:
         return native_text if len(native_text) > len(ocr_text) else ocr_text
 
-    def longest_common_substring(s1, s2):
-        m = [[0] * (1 + len(s2)) for _ in range(1 + len(s1))]
-        longest, x_longest = 0, 0
-        for x in range(1, 1 + len(s1)):
-            for y in range(1, 1 + len(s2)):
-                if s1[x - 1] == s2[y - 1]:
-                    m[x][y] = m[x - 1][y - 1] + 1
-                    if m[x][y] > longest:
-                        longest = m[x][y]
-                        x_longest = x
-                else:
-                    m[x][y] = 0
-        return s1[x_longest - longest: x_longest]
-
-    lcs = longest_common_substring(native_text, ocr_text)
-    if len(lcs) > 20:
-        if ocr_text.startswith(lcs):
-            ocr_text = ocr_text[len(lcs):].strip()
-        elif ocr_text.endswith(lcs):
-            ocr_text = ocr_text[:-len(lcs)].strip()
+    # An overlap is only removed from the start or end of the OCR text, so unless one of its
+    # ends occurs in the native text (a C-level substring search) the longest match is moot.
+    head = ocr_text[:MIN_OVERLAP + 1]
+    tail = ocr_text[-(MIN_OVERLAP + 1):]
+    if head in native_text or tail in native_text:
+        match = matcher.find_longest_match(0, len(native_text), 0, len(ocr_text))
+        lcs = native_text[match.a: match.a + match.size]
+        if len(lcs) > MIN_OVERLAP:
+            if ocr_text.startswith(lcs):
+                ocr_text = ocr_text[len(lcs):].strip()
+            elif ocr_text.endswith(lcs):
+                ocr_text = ocr_text[:-len(lcs)].strip()
     
     combined = native_text
     if ocr_text:
@@ -0,0 +1,206 @@
+import io
+import os
+import tempfile
+import threading
+import unittest
+
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+from src import app as analyzer
+
+class TestParseAnalysis(unittest.TestCase):
+    SECTIONS = [{"title": "Chief Complaint", "content": ["Chest pain", {"original": "pian", "suggested": "pain", "reason": "Typo"}]}]
+    RAW = '[{"title": "Chief Complaint", "content": ["Chest pain", {"original": "pian", "suggested": "pain", "reason": "Typo"}]}]'
+
+    def test_plain_json(self):
+        self.assertEqual(analyzer.parse_analysis(self.RAW), self.SECTIONS)
+
+    def test_code_fences_are_stripped(self):
+        for fenced in ("```json\n" + self.RAW + "\n```", "```\n" + self.RAW + "\n```", "\n ```json\n" + self.RAW + "\n```\n"):
+            with self.subTest(fenced=fenced):
+                self.assertEqual(analyzer.parse_analysis(fenced), self.SECTIONS)
+
+    def test_empty_analysis(self):
+        self.assertEqual(analyzer.parse_analysis("[]"), [])
+
+    def test_invalid_json_falls_back_to_text(self):
+        text = "Sorry, I could not find any sections in this document."
+        self.assertEqual(analyzer.parse_analysis(text), text)
+
+class TestRunAnalysis(unittest.TestCase):
+    """Concurrent uploads of the same document share a single extraction and LLM call."""
+    def setUp(self):
+        self.extraction_started = threading.Event()
+        self.release_extraction = threading.Event()
+        self.joined = threading.Event()
+        self.extract_calls = []
+
+        def extract_text(file, ext):
+            self.extract_calls.append(file.read())
+            self.extraction_started.set()
+            self.release_extraction.wait(5)
+            if self.fail_extraction:
+                raise RuntimeError("OCR failed")
+            return "extracted text"
+
+        def log_info(message):
+            if message.startswith("Joining"):
+                self.joined.set()
+
+        self.fail_extraction = False
+        for target, value in (
+            ('extract_text', extract_text),
+            ('analyze_emr_sections', MagicMock(return_value='[{"title": "Plan", "content": []}]')),
+            ('logger', MagicMock(info=log_info)),
+        ):
+            patcher = patch.object(analyzer, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def run_concurrently(self, first, second):
+        """Starts analyzing first, then second once first is extracting, and waits for second to join."""
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            owner = executor.submit(analyzer.run_analysis, io.BytesIO(first), ".pdf")
+            self.assertTrue(self.extraction_started.wait(5))
+            joiner = executor.submit(analyzer.run_analysis, io.BytesIO(second), ".pdf")
+            if first == second:
+                self.assertTrue(self.joined.wait(5))
+            self.release_extraction.set()
+            return owner, joiner
+
+    def test_identical_uploads_share_one_analysis(self):
+        owner, joiner = self.run_concurrently(b"%PDF same", b"%PDF same")
+        expected = [{"title": "Plan", "content": []}]
+        self.assertEqual(owner.result(), expected)
+        self.assertEqual(joiner.result(), expected)
+        self.assertEqual(self.extract_calls, [b"%PDF same"])
+        analyzer.analyze_emr_sections.assert_called_once_with("extracted text")
+        self.assertEqual(analyzer.inflight_analyses, {})
+
+    def test_different_uploads_are_analyzed_separately(self):
+        owner, other = self.run_concurrently(b"%PDF one", b"%PDF two")
+        owner.result()
+        other.result()
+        self.assertCountEqual(self.extract_calls, [b"%PDF one", b"%PDF two"])
+
+    def test_failure_reaches_every_caller(self):
+        self.fail_extraction = True
+        owner, joiner = self.run_concurrently(b"%PDF broken", b"%PDF broken")
+        for future in (owner, joiner):
+            with self.assertRaisesRegex(RuntimeError, "OCR failed"):
+                future.result()
+        self.assertEqual(analyzer.inflight_analyses, {})
+
+class TestAsyncAnalysis(unittest.TestCase):
+    """POST /analyze?async=1 followed by polling GET /analyze/<fileId>."""
+    def setUp(self):
+        self.release = threading.Event()
+        self.fail = False
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(self.executor.shutdown)
+        jobs_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(jobs_dir.cleanup)
+
+        def run_analysis(file, ext):
+            self.release.wait(5)
+            if self.fail:
+                raise RuntimeError("LLM unavailable")
+            return [{"title": "Plan", "content": [file.read().decode()]}]
+
+        for target, value in (
+            ('run_analysis', run_analysis),
+            ('analysis_executor', self.executor),
+            ('ANALYSIS_JOBS_PATH', os.path.join(jobs_dir.name, "jobs.sqlite")),
+        ):
+            patcher = patch.object(analyzer, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = analyzer.app.test_client()
+
+    def start_job(self):
+        response = self.client.post('/analyze?async=1', data=b"follow up", content_type='application/pdf')
+        self.assertEqual(response.status_code, 202)
+        return response.get_json()['fileId']
+
+    def finish_jobs(self):
+        self.release.set()
+        self.executor.shutdown(wait=True)
+
+    def test_poll_until_done(self):
+        file_id = self.start_job()
+        pending = self.client.get(f'/analyze/{file_id}')
+        self.assertEqual(pending.status_code, 202)
+        self.assertEqual(pending.get_json(), {'fileId': file_id, 'state': 'PENDING'})
+
+        self.finish_jobs()
+        done = self.client.get(f'/analyze/{file_id}')
+        self.assertEqual(done.status_code, 200)
+        self.assertEqual(done.get_json(), {
+            'fileId': file_id,
+            'state': 'SUCCESS',
+            'data': [{"title": "Plan", "content": ["follow up"]}]
+        })
+
+        # Results are handed out once
+        self.assertEqual(self.client.get(f'/analyze/{file_id}').status_code, 404)
+
+    def test_failed_job_reports_the_error(self):
+        self.fail = True
+        file_id = self.start_job()
+        self.finish_jobs()
+        failed = self.client.get(f'/analyze/{file_id}')
+        self.assertEqual(failed.status_code, 500)
+        self.assertEqual(failed.get_json(), {'error': 'LLM unavailable'})
+        self.assertEqual(self.client.get(f'/analyze/{file_id}').status_code, 404)
+
+    def test_uncollected_results_expire(self):
+        with patch.object(analyzer, 'ANALYSIS_JOB_TTL', -1):
+            file_id = self.start_job()
+            self.finish_jobs()
+            self.assertEqual(self.client.get(f'/analyze/{file_id}').status_code, 404)
+
+    def test_stuck_jobs_time_out(self):
+        with patch.object(analyzer, 'ANALYSIS_JOB_TIMEOUT', -1):
+            file_id = self.start_job()
+            self.assertEqual(self.client.get(f'/analyze/{file_id}').status_code, 404)
+            # A job finishing after its timeout is not resurrected
+            self.finish_jobs()
+            self.assertEqual(self.client.get(f'/analyze/{file_id}').status_code, 404)
+
+    def test_unknown_file_id(self):
+        self.assertEqual(self.client.get('/analyze/does-not-exist').status_code, 404)
+
+class TestStreamSections(unittest.TestCase):
+    @staticmethod
+    def events(stream):
+        """Parses the Server-Sent Events yielded by stream_sections into (event, data) pairs."""
+        parsed = []
+        for message in stream:
+            event, data = message.decode().rstrip("\n").split("\n")
+            parsed.append((event[len("event: "):], orjson.loads(data[len("data: "):])))
+        return parsed
+
+    def test_done_event_matches_the_non_streamed_response(self):
+        deltas = ['```json\n[{"title": "Pl', 'an", "content": ["Rest"]}]', '\n```']
+        with patch.object(analyzer, 'stream_emr_sections', return_value=iter(deltas)):
+            events = self.events(analyzer.stream_sections("file-1", "extracted text"))
+        self.assertEqual(events[:-1], [('delta', delta) for delta in deltas])
+        self.assertEqual(events[-1], ('done', {
+            'fileId': 'file-1',
+            'data': analyzer.parse_analysis("".join(deltas))
+        }))
+        self.assertEqual(events[-1][1]['data'], [{"title": "Plan", "content": ["Rest"]}])
+
+    def test_llm_failure_ends_with_an_error_event(self):
+        def failing_stream(text):
+            yield '[{"title"'
+            raise RuntimeError("connection reset")
+
+        with patch.object(analyzer, 'stream_emr_sections', side_effect=failing_stream):
+            events = self.events(analyzer.stream_sections("file-1", "extracted text"))
+        self.assertEqual(events, [('delta', '[{"title"'), ('error', {'error': 'connection reset'})])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+
+from src.processor.deduplication import MIN_OVERLAP, deduplicate_overlap
+
+NATIVE = "Patient: Jane Doe. DOB 1970-01-01. Chief complaint: intermittent chest pain on exertion."
+
+class TestDeduplicateOverlap(unittest.TestCase):
+    def test_empty_side_returns_the_other(self):
+        self.assertEqual(deduplicate_overlap("", "  ocr only  "), "ocr only")
+        self.assertEqual(deduplicate_overlap("  native only ", ""), "native only")
+
+    def test_identical_texts_are_kept_once(self):
+        self.assertEqual(deduplicate_overlap(NATIVE, " " + NATIVE + "\n"), NATIVE)
+
+    def test_near_identical_texts_keep_the_longer(self):
+        ocr = NATIVE.replace("exertion.", "exert1on. Handwritten: follow up in 2 weeks.")
+        self.assertEqual(deduplicate_overlap(NATIVE, ocr), ocr)
+
+    def test_overlapping_ocr_prefix_is_removed(self):
+        handwritten = "Rx nitroglycerin 0.4 mg SL prn, stress test ordered, return if pain worsens or persists"
+        ocr = NATIVE + " " + handwritten
+        self.assertEqual(deduplicate_overlap(NATIVE, ocr), NATIVE + "\n" + handwritten)
+
+    def test_overlapping_ocr_suffix_is_removed(self):
+        handwritten = "Handwritten addendum: patient reports pain resolved with rest, no radiation to the arm"
+        ocr = handwritten + " " + NATIVE
+        self.assertEqual(deduplicate_overlap(NATIVE, ocr), NATIVE + "\n" + handwritten)
+
+    def test_short_overlap_is_kept(self):
+        shared = NATIVE[:MIN_OVERLAP]
+        ocr = shared + " Handwritten notes that the native text layer does not contain at all, quite long"
+        self.assertEqual(deduplicate_overlap(NATIVE, ocr), NATIVE + "\n" + ocr)
+
+    def test_unrelated_texts_are_concatenated(self):
+        ocr = "Vitals: BP 128/82, HR 76, RR 14, SpO2 98% on room air, afebrile, weight stable since last visit"
+        self.assertEqual(deduplicate_overlap(NATIVE, ocr), NATIVE + "\n" + ocr)
+
+if __name__ == '__main__':
+    unittest.main()
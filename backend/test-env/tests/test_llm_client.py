@@ -0,0 +1,80 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.llm import llm_client
+
+def completion(content):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    return response
+
+class TestCreateCompletion(unittest.TestCase):
+    MESSAGES = [{"role": "system", "content": "Split into sections."}, {"role": "user", "content": "BP 120/80"}]
+
+    def setUp(self):
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        self.create = MagicMock(side_effect=lambda **request: completion(f"response {self.create.call_count}"))
+        client = MagicMock()
+        client.chat.completions.create = self.create
+        for target, value in (
+            ('_client', lambda: client),
+            ('LLM_CACHE_PATH', os.path.join(cache_dir.name, "llm.sqlite")),
+            ('LLM_CACHE_POLICY', "enabled"),
+        ):
+            patcher = patch.object(llm_client, target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_repeated_request_is_served_from_cache(self):
+        first = llm_client._create_completion(self.MESSAGES)
+        self.assertEqual(llm_client._create_completion(self.MESSAGES), first)
+        self.assertEqual(self.create.call_count, 1)
+
+    def test_lookup_does_not_need_the_write_lock(self):
+        first = llm_client._create_completion(self.MESSAGES)
+        writer = sqlite3.connect(llm_client.LLM_CACHE_PATH)
+        self.addCleanup(writer.close)
+        writer.execute("BEGIN IMMEDIATE")
+        self.assertEqual(llm_client._create_completion(self.MESSAGES), first)
+        self.assertEqual(self.create.call_count, 1)
+
+    def test_prompt_and_parameters_are_part_of_the_key(self):
+        llm_client._create_completion(self.MESSAGES)
+        edited_prompt = [{"role": "system", "content": "Split into titled sections."}, self.MESSAGES[1]]
+        llm_client._create_completion(edited_prompt)
+        llm_client._create_completion(self.MESSAGES, temperature=0)
+        with patch.object(llm_client, 'LLM_MODEL', "another-model"):
+            llm_client._create_completion(self.MESSAGES)
+        self.assertEqual(self.create.call_count, 4)
+
+    def test_entries_expire(self):
+        with patch.object(llm_client, 'LLM_CACHE_TTL', -1):
+            llm_client._create_completion(self.MESSAGES)
+        llm_client._create_completion(self.MESSAGES)
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_disabled_policy_never_touches_the_cache(self):
+        with patch.object(llm_client, 'LLM_CACHE_POLICY', "disabled"):
+            llm_client._create_completion(self.MESSAGES)
+            llm_client._create_completion(self.MESSAGES)
+        self.assertEqual(self.create.call_count, 2)
+        self.assertFalse(os.path.exists(llm_client.LLM_CACHE_PATH))
+
+    def test_readonly_policy_does_not_write(self):
+        with patch.object(llm_client, 'LLM_CACHE_POLICY', "readonly"):
+            llm_client._create_completion(self.MESSAGES)
+        llm_client._create_completion(self.MESSAGES)
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_replay_policy_raises_on_miss(self):
+        with patch.object(llm_client, 'LLM_CACHE_POLICY', "replay"):
+            with self.assertRaises(LookupError):
+                llm_client._create_completion(self.MESSAGES)
+        self.create.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -44,7 +44,8 @@ export default function FileUpload() {
           analyzedData = analyzedData.replace(/\n```$/, '');
         }
 
-        const parsedData = JSON.parse(analyzedData);
+        // The service sends the sections as JSON, or as text if the model's output was not valid JSON
+        const parsedData = typeof analyzedData === 'string' ? JSON.parse(analyzedData) : analyzedData;
         
         if (data.data) {
           localStorage.setItem(`analysis_${data.fileId}`, JSON.stringify(parsedData))